@@ -1,9 +1,14 @@
+import hashlib
 import json
+import os
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict
+from typing import Callable, Dict, List, Optional, Tuple
 from fastapi import HTTPException
-from models import AnalystResponse, RescuePlan, Analyst, AnalystCore, AnalystStrategy, AnalystValidation
+from pydantic import BaseModel
+from models import AnalystResponse, RescuePlan, Analyst, AnalystStepOutput
 from utils import (
     openai_client, 
     tavily_client, 
@@ -12,6 +17,10 @@ from utils import (
     clean_text_for_json,
     optimize_query
 )
+import metrics
+from context_packing import pack_context, fit_text
+from sources import SourceRegistry
+from translation import translate_model
 
 def calculate_pos(breakdown: list, confidence_level: str = "Medium") -> int:
     """
@@ -116,11 +125,13 @@ def search_market_data(idea: str) -> Dict:
         benchmark_results = extract_tavily_results(r4)
         all_results.extend(benchmark_results)
         
-        context = format_tavily_context(all_results)
+        # Most relevant, de-duplicated sources within the synthesis token budget
+        sources = SourceRegistry().add_results(all_results)
+        context = pack_context(idea, sources, "analyst_research").text
         tavily_duration = time.time() - tavily_start
         print(f"[Tavily] ✅ Completed 4 searches ({len(all_results)} total results) in {tavily_duration:.2f}s\n")
         
-        return {"context": context, "results_count": len(all_results)}
+        return {"context": context, "sources": sources, "results_count": len(all_results)}
         
     except Exception as e:
         print(f"[Tavily] ⚠️ Search failed: {e}")
@@ -169,6 +180,7 @@ CRITICAL RULES:
             temperature=0.3,
             max_tokens=2500
         )
+        metrics.record_llm_usage("analyst", response)
         synthesized_data = response.choices[0].message.content
         synthesis_duration = time.time() - synthesis_start
         print(f"[Synthesis] ✅ Compressed data in {synthesis_duration:.2f}s\n")
@@ -179,89 +191,85 @@ CRITICAL RULES:
 
 def translate_analysis_to_language(analysis: AnalystResponse, target_language: str, idea: str) -> AnalystResponse:
     """
-    Translates an AnalystResponse from English to the target language using GPT-4o-mini.
+    Translates an AnalystResponse from English to the target language
+    (field by field, with the translation memory, see translation.py).
     """
     if target_language == "en":
         return analysis
     
     print(f"\n[Translation] Translating analysis to {target_language}...")
     translation_start = time.time()
-    
-    analysis_dict = analysis.model_dump()
-    analysis_json = json.dumps(analysis_dict, ensure_ascii=False, indent=2)
-    
-    language_mapping = {
-        "fr": "French", "es": "Spanish", "de": "German", "it": "Italian", 
-        "pt": "Portuguese", "nl": "Dutch", "pl": "Polish", "ru": "Russian", 
-        "zh": "Chinese", "ja": "Japanese", "ko": "Korean", "ar": "Arabic"
-    }
-    target_lang_name = language_mapping.get(target_language, target_language)
-    
-    translation_prompt = f"""You are a professional translator specializing in business and market analysis reports.
-TASK: Translate the following startup analysis report from English to {target_lang_name}.
-
-CRITICAL RULES:
-1. **Preserve ALL URLs** - Do NOT translate or modify any URLs (verified_url fields)
-2. **Preserve ALL numbers** - Keep exact numbers, percentages, currency amounts
-3. **Preserve structure** - Keep the exact JSON structure and field names
-4. **Translate ALL text** - Translate descriptions, quotes, recommendations, etc.
-5. **Cultural adaptation** - Adapt idioms and expressions naturally to {target_lang_name}
-6. **Professional tone** - Maintain business/professional language
-
-ORIGINAL IDEA: {idea}
-ANALYSIS TO TRANSLATE:
-{analysis_json}
-Return ONLY the translated JSON with the exact same structure. Do not add explanations."""
-
-    try:
-        response = openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": f"You are a professional translator. Translate business analysis reports to {target_lang_name} while preserving structure and URLs."},
-                {"role": "user", "content": translation_prompt}
-            ],
-            temperature=0.3,
-            response_format={"type": "json_object"}
-        )
-        
-        translated_json = response.choices[0].message.content
-        translated_dict = json.loads(translated_json)
-        translated_analysis = AnalystResponse(**translated_dict)
-        
-        translation_duration = time.time() - translation_start
-        print(f"[Translation] ✅ Translated to {target_lang_name} in {translation_duration:.2f}s\n")
-        return translated_analysis
-        
-    except Exception as e:
-        print(f"[Translation] ⚠️ Translation failed: {e}. Returning original English version.")
-        return analysis
+    translated = translate_model(analysis, target_language, context=idea)
+    print(f"[Translation] ✅ Translated to {target_language} in {time.time() - translation_start:.2f}s\n")
+    return translated
 
 
 # ==========================================
-# MODULAR ANALYSIS STEPS
+# ANALYST DAG
 # ==========================================
+# The analysis is split into small structured sub-calls (nodes) with declared
+# dependencies. A node starts as soon as its dependencies are done, so the
+# independent ones (core, risks, seo) run in parallel:
+#
+#     core ──┬── gtm ────────────┐
+#            └── unit_economics ─┼── verdict
+#     risks ─────────────────────┘
+#     seo
+#
+# All nodes share one prompt prefix: response schema (AnalystStepOutput),
+# then ANALYST_PREFIX + idea + market data as the first system message. Only
+# what comes after it (node instructions, upstream outputs) differs, so later
+# nodes reuse the cached prefix (OpenAI caches prompts > 1024 tokens by exact
+# prefix) instead of re-processing the whole context.
 
-def step_1_core_analysis(idea: str, market_data_context: str) -> AnalystCore:
-    """
-    STEP 1: FOUNDATION
-    Focus: Problem, Competitors (Type C/D), Value Prop, Customer Persona.
-    """
-    print(f"\n[Analyst] 🧠 Step 1: Core Analysis (The Brain)...")
-    start_time = time.time()
-    
-    system_prompt = f"""You are a Ruthless VC Analyst (The "Shark").
-    
-    TASK: Tear down this startup idea to its core foundations.
-    
-    CONTEXT:
-    {market_data_context}
-    
-    ### YOUR PERSONA:
+ANALYST_MODEL = "gpt-4o-2024-08-06"
+ANALYST_MAX_PARALLEL = int(os.getenv("ANALYST_MAX_PARALLEL", "4"))
+
+ANALYST_PREFIX = """You are part of Verdyct's VC analysis team. Specialists tear down the same startup idea together, each one filling one part of the report, using the market data below as their only evidence:
+    - core: The Shark (problem, competitors, value proposition, customer persona)
+    - gtm, unit_economics: The Strategist (segments, go-to-market, pricing)
+    - risks, seo, verdict: The Skeptic (pre-mortem, SEO opportunity, scoring)
+Your role and the field you must fill are given in the next message. Fill ONLY that field and set the other fields to null.
+"""
+
+SHARK_PERSONA = """### YOUR PERSONA:
     - You are NOT here to be nice. You are here to make money.
     - You hate "Wrapper" ideas. If this is just a ChatGPT wrapper, CALL IT OUT aggressively.
     - You value "Unfair Advantages" and "Moats".
     - Tone: Professional but extremely direct, confident, and cutting. No "fluff".
+"""
+
+STRATEGIST_PERSONA = """### YOUR PERSONA:
+    - You care about **LTV/CAC** and **Unit Economics**.
+    - You despise "Freemium" unless it leads to high enterprise contracts.
+    - You want "Viral Loops" and "Lock-in".
+"""
+
+SKEPTIC_PERSONA = """### YOUR PERSONA:
+    - You have seen 1000 pitch decks and rejected 999.
+    - **Wrapper Detector**: If this is just OpenAI API with a UI, destroy the score.
+    - **Moat Check**: "First mover" is not a moat. "Data network effect" is a moat.
+"""
+
+
+@dataclass(frozen=True)
+class AnalystNode:
+    name: str  # Also the AnalystStepOutput field it fills
+    label: str
+    instructions: str
+    task: str
+    depends_on: Tuple[str, ...] = ()
+
+
+ANALYST_DAG: List[AnalystNode] = [
+    AnalystNode(
+        name="core",
+        label="🧠 Core Analysis (The Brain)",
+        instructions=f"""You are a Ruthless VC Analyst (The "Shark"). Fill the `core` field.
+    
+    TASK: Tear down this startup idea to its core foundations.
     
+    {SHARK_PERSONA}
     ### RULE 1: MURDER THE COMPETITION (Classification)
     - **Identify the Enemy**: Don't just list competitors. Tell me who I need to kill.
     - **Type C/D Only**: Ignore Google/Amazon (Type A/B). Focus on the SaaS startups (Type C) and Niche players (Type D).
@@ -274,198 +282,260 @@ def step_1_core_analysis(idea: str, market_data_context: str) -> AnalystCore:
     
     ### OUTPUT INSTRUCTION:
     - **market_overview**: This is your THESIS. simple paragraph. Start with a "Hook" (e.g., "This market is a bloodbath, but..."). 
-    """
+    """,
+        task="Analyze the core foundation for: {idea}",
+    ),
+    AnalystNode(
+        name="risks",
+        label="💀 Pre-Mortem (The Skeptic)",
+        instructions=f"""You are The Executioner (The "Skeptic"). Fill the `risks` field.
     
-    # DEBUG: Print step intent
-    print(f"Step 1 Prompt Length: {len(system_prompt)}")
+    TASK: Find what kills this startup, and what must be proven before building it.
     
-    try:
-        response = openai_client.beta.chat.completions.parse(
-            model="gpt-4o-2024-08-06",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Analyze the core foundation for: {idea}"}
-            ],
-            response_format=AnalystCore,
-            temperature=0.7
-        )
-        print(f"[Analyst] ✅ Step 1 completed in {time.time() - start_time:.2f}s")
-        return response.choices[0].message.parsed
-    except Exception as e:
-        print(f"[Analyst] ❌ Step 1 Failed: {e}")
-        # Add simpler fallback or retry logic here if needed
-        raise
-
-def step_2_strategy(idea: str, core_analysis: AnalystCore, market_data_context: str) -> AnalystStrategy:
-    """
-    STEP 2: STRATEGY
-    Focus: Segments, Pricing, GTM, Business Model.
-    """
-    print(f"\n[Analyst] ♟️ Step 2: Strategic Logic (The Strategist)...")
-    start_time = time.time()
-    
-    # Serialize core analysis for context
-    core_json = core_analysis.model_dump_json()
-    
-    system_prompt = f"""You are a Growth & Monetization Mercenary (The "Strategist").
-    
-    TASK: Build a monetization machine, not just a "business model".
+    {SKEPTIC_PERSONA}
+    ### RULE 1: THE PRE-MORTEM
+    - Tell the user exactly how they will die in 12 months.
+    - Be specific: "Google releases this feature for free in Q4."
+    - Critical assumptions come with a concrete validation method. Red flags come with the action to take.
+    """,
+        task="Run the pre-mortem for: {idea}",
+    ),
+    AnalystNode(
+        name="seo",
+        label="🔎 SEO Opportunity (The Skeptic)",
+        instructions=f"""You are The Executioner (The "Skeptic"). Fill the `seo` field.
     
-    CORE ANALYSIS CONTEXT:
-    {core_json}
+    TASK: Find the organic acquisition opening, if there is one.
     
-    MARKET DATA:
-    {market_data_context}
+    ### RULE 2: SEO OPPORTUNITY (The Long Tail)
+    - Identify "Money Keywords" (High intent, low competition).
+    - Tease: "For a full keyword volume analysis, you'd need deep SEMrush data."
+    """,
+        task="Map the SEO opportunity for: {idea}",
+    ),
+    AnalystNode(
+        name="gtm",
+        label="♟️ Go-To-Market (The Strategist)",
+        instructions=f"""You are a Growth & Monetization Mercenary (The "Strategist"). Fill the `gtm` field.
     
-    ### YOUR PERSONA:
-    - You care about **LTV/CAC** and **Unit Economics**.
-    - You despise "Freemium" unless it leads to high enterprise contracts.
-    - You want "Viral Loops" and "Lock-in".
-    
-    ### RULE 1: AGGRESSIVE PRICING & UPSELLS
-    - **Tier Strategy**: Don't just give prices. Give psychological hooks.
-    - **Tease the 'Financier'**: Explicitly mention: "The exact margins depend on your churn, which the Financier Agent can model."
+    TASK: Pick the segments to attack and the way in.
     
+    {STRATEGIST_PERSONA}
     ### RULE 2: GTM (Go-To-Market) WARFARE
     - **No Generic Advice**: "SEO" is bad. "Programmatic SEO targeting 'vs' keywords" is good.
     - **Trojan Horse**: How do we get in? (e.g., Free tool, Chrome Extension, Open Source).
-    """
+    """,
+        task="Develop the go-to-market strategy for: {idea}",
+        depends_on=("core",),
+    ),
+    AnalystNode(
+        name="unit_economics",
+        label="💰 Unit Economics (The Strategist)",
+        instructions=f"""You are a Growth & Monetization Mercenary (The "Strategist"). Fill the `unit_economics` field.
     
-    try:
-        response = openai_client.beta.chat.completions.parse(
-            model="gpt-4o-2024-08-06",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Develop the strategy for: {idea}"}
-            ],
-            response_format=AnalystStrategy,
-            temperature=0.7
-        )
-        print(f"[Analyst] ✅ Step 2 completed in {time.time() - start_time:.2f}s")
-        return response.choices[0].message.parsed
-    except Exception as e:
-        print(f"[Analyst] ❌ Step 2 Failed: {e}")
-        raise
-
-def step_3_validation(idea: str, core: AnalystCore, strategy: AnalystStrategy, market_data_context: str) -> AnalystValidation:
-    """
-    STEP 3: VALIDATION
-    Focus: Risks, SEO, Scoring, Summary.
-    """
-    print(f"\n[Analyst] ⚖️ Step 3: Validation & Risk (The Skeptic)...")
-    start_time = time.time()
-    
-    context_json = json.dumps({
-        "core": core.model_dump(),
-        "strategy": strategy.model_dump()
-    }, default=str)
+    TASK: Build a monetization machine, not just a "business model".
     
-    system_prompt = f"""You are The Executioner (The "Skeptic").
+    {STRATEGIST_PERSONA}
+    ### RULE 1: AGGRESSIVE PRICING & UPSELLS
+    - **Tier Strategy**: Don't just give prices. Give psychological hooks.
+    - **Tease the 'Financier'**: Explicitly mention: "The exact margins depend on your churn, which the Financier Agent can model."
+    """,
+        task="Estimate the unit economics for: {idea}",
+        depends_on=("core",),
+    ),
+    AnalystNode(
+        name="verdict",
+        label="⚖️ Verdict (The Skeptic)",
+        instructions=f"""You are The Executioner (The "Skeptic"). Fill the `verdict` field.
     
     TASK: Validate the startup. Kill it if it's weak. Score it brutally.
     
-    FULL PLAN CONTEXT:
-    {context_json}
-    
-    MARKET DATA:
-    {market_data_context}
-    
-    ### YOUR PERSONA:
-    - You have seen 1000 pitch decks and rejected 999.
-    - **Wrapper Detector**: If this is just OpenAI API with a UI, destroy the score.
-    - **Moat Check**: "First mover" is not a moat. "Data network effect" is a moat.
-    
-    ### RULE 1: THE PRE-MORTEM
-    - Tell the user exactly how they will die in 12 months.
-    - Be specific: "Google releases this feature for free in Q4."
-    
-    ### RULE 2: SEO OPPORTUNITY (The Long Tail)
-    - Identify "Money Keywords" (High intent, low competition).
-    - Tease: "For a full keyword volume analysis, you'd need deep SEMrush data."
-    
+    {SKEPTIC_PERSONA}
     ### RULE 3: SCORING (The Verdict)
     - Score rigorously.
     - **verdyct_summary** field: This is your final word. Start with "VERDICT: [ONE ADJECTIVE]". Then explains why.
       Examples: "VERDICT: SUICIDAL.", "VERDICT: GOLD MINE.", "VERDICT: CROWDED."
       Make it stick.
+    """,
+        task="Validate and score: {idea}",
+        depends_on=("core", "gtm", "unit_economics", "risks"),
+    ),
+]
+
+
+def _check_dag(nodes: List[AnalystNode]):
+    """Nodes must be listed after their dependencies (rules out cycles and typos)."""
+    seen = set()
+    for node in nodes:
+        missing = [dep for dep in node.depends_on if dep not in seen]
+        if missing:
+            raise ValueError(f"Analyst node {node.name} depends on {missing}, which must be declared before it")
+        if node.name not in AnalystStepOutput.model_fields:
+            raise ValueError(f"Analyst node {node.name} has no field in AnalystStepOutput")
+        seen.add(node.name)
+
+
+_check_dag(ANALYST_DAG)
+
+
+def build_shared_prefix(idea: str, market_data_context: str) -> str:
+    """Identical for every node of a report: keep anything node-specific out of it."""
+    return f"{ANALYST_PREFIX}\nSTARTUP IDEA: {idea}\n\nMARKET DATA:\n{market_data_context}"
+
+
+def run_analyst_node(node: AnalystNode, idea: str, market_data_context: str, upstream: Dict[str, BaseModel]):
     """
-    
-    try:
-        response = openai_client.beta.chat.completions.parse(
-            model="gpt-4o-2024-08-06",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Validate and score: {idea}"}
-            ],
-            response_format=AnalystValidation,
-            temperature=0.7
-        )
-        print(f"[Analyst] ✅ Step 3 completed in {time.time() - start_time:.2f}s")
-        return response.choices[0].message.parsed
-    except Exception as e:
-        print(f"[Analyst] ❌ Step 3 Failed: {e}")
-        raise
+    One structured analyst call: shared prefix first, node instructions and
+    upstream outputs last. Returns the node's field of the AnalystStepOutput envelope.
+    """
+    instructions = node.instructions
+    if upstream:
+        upstream_json = json.dumps({name: output.model_dump() for name, output in upstream.items()}, default=str)
+        instructions += f"\n    UPSTREAM ANALYSIS:\n    {upstream_json}\n"
 
-def generate_analysis(idea: str, market_data_context: str, language: str = "en") -> AnalystResponse:
+    prefix = build_shared_prefix(idea, market_data_context)
+    response = openai_client.beta.chat.completions.parse(
+        model=ANALYST_MODEL,
+        messages=[
+            {"role": "system", "content": prefix},
+            {"role": "system", "content": instructions},
+            {"role": "user", "content": node.task.format(idea=idea)}
+        ],
+        response_format=AnalystStepOutput,
+        temperature=0.7,
+        # Routes the nodes of one report to the same cache (passed as extra_body for older SDKs)
+        extra_body={"prompt_cache_key": "analyst-" + hashlib.sha256(prefix.encode()).hexdigest()[:16]}
+    )
+    cached_tokens = metrics.record_llm_usage("analyst", response, step=node.name)
+    prompt_tokens = getattr(response.usage, "prompt_tokens", 0) if response.usage else 0
+
+    output = response.choices[0].message.parsed
+    result = getattr(output, node.name, None) if output else None
+    if result is None:
+        raise ValueError(f"Analyst node {node.name} returned no `{node.name}`")
+    return result, cached_tokens, prompt_tokens
+
+
+def run_analyst_dag(
+    idea: str,
+    market_data_context: str,
+    on_node: Optional[Callable[[Dict], None]] = None,
+    on_result: Optional[Callable[[str, BaseModel], None]] = None,
+    nodes: List[AnalystNode] = ANALYST_DAG
+) -> Dict[str, BaseModel]:
+    """
+    Runs every node with maximum parallelism (a node is submitted as soon as
+    its dependencies are done). `on_node` gets one event per finished node:
+    {"node", "duration", "started_at", "depends_on", "cached_tokens"};
+    `on_result` gets (node name, output) as soon as it is available.
+    Raises the first node error (pending nodes are not started).
+    """
+    dag_start = time.time()
+    results: Dict[str, BaseModel] = {}
+    pending = list(nodes)
+    running = {}
+
+    def run(node: AnalystNode, upstream: Dict[str, BaseModel]):
+        start = time.time()
+        print(f"[Analyst] {node.label}...")
+        result, cached_tokens, prompt_tokens = run_analyst_node(node, idea, market_data_context, upstream)
+        duration = time.time() - start
+        print(f"[Analyst] ✅ {node.name} completed in {duration:.2f}s (prompt cache: {cached_tokens}/{prompt_tokens} tokens)")
+        return result, {
+            "node": node.name,
+            "duration": f"{duration:.2f}s",
+            "started_at": f"{start - dag_start:.2f}s",
+            "depends_on": list(node.depends_on),
+            "cached_tokens": cached_tokens
+        }
+
+    with ThreadPoolExecutor(max_workers=ANALYST_MAX_PARALLEL, thread_name_prefix="analyst") as pool:
+        while pending or running:
+            for node in [n for n in pending if all(dep in results for dep in n.depends_on)]:
+                pending.remove(node)
+                running[pool.submit(run, node, {dep: results[dep] for dep in node.depends_on})] = node
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                node = running.pop(future)
+                try:
+                    results[node.name], event = future.result()
+                except Exception as e:
+                    print(f"[Analyst] ❌ Node {node.name} failed: {e}")
+                    pending.clear()
+                    raise
+                if on_result:
+                    on_result(node.name, results[node.name])
+                if on_node:
+                    on_node(event)
+
+    print(f"[Analyst] 🕸️ DAG completed in {time.time() - dag_start:.2f}s")
+    return results
+
+def generate_analysis(
+    idea: str,
+    market_data_context: str,
+    language: str = "en",
+    on_node: Optional[Callable[[Dict], None]] = None
+) -> AnalystResponse:
     """
-    Orchestrates the modular analysis pipeline (Steps 1 -> 2 -> 3).
+    Orchestrates the analysis DAG and merges the node outputs into one AnalystResponse.
+    `on_node` receives per-node timing events (see run_analyst_dag).
     """
-    print(f"\n[Analyst] 🚀 Starting MODULAR analysis for: {idea}...")
+    print(f"\n[Analyst] 🚀 Starting DAG analysis for: {idea}...")
     total_start = time.time()
+
+    # The same context goes into every node: cap it once
+    market_data_context = fit_text("analyst_steps", market_data_context)
+    
+    # Non-English reports: each node output is translated as soon as it's ready,
+    # while the rest of the DAG runs, instead of one big call at the end
+    translator = ThreadPoolExecutor(max_workers=len(ANALYST_DAG), thread_name_prefix="analyst-translate") if language != "en" else None
+    translations = {}
+
+    def translate_node(name: str, output: BaseModel):
+        translations[name] = translator.submit(translate_model, output, language, idea)
     
     try:
-        # Step 1: Core
-        core = step_1_core_analysis(idea, market_data_context)
-        
-        # Step 2: Strategy
-        strategy = step_2_strategy(idea, core, market_data_context)
-        
-        # Step 3: Validation
-        validation = step_3_validation(idea, core, strategy, market_data_context)
+        results = run_analyst_dag(idea, market_data_context, on_node=on_node, on_result=translate_node if translator else None)
+        if translator:
+            translation_start = time.time()
+            results = {name: future.result() for name, future in translations.items()}
+            print(f"[Translation] ✅ {language} ready {time.time() - translation_start:.2f}s after the last node")
+        core = results["core"]
+        gtm = results["gtm"]
+        unit_economics = results["unit_economics"]
+        verdict = results["verdict"]
         
         # Assembly
         print(f"[Analyst] 🧩 Assembling final report...")
         
-        # Validate confidence match
-
-        
         # Construct final object
         analyst = Analyst(
             title=f"Market Analysis: {idea}",
             analysis_for=idea,
-            score=validation.pcs_score,
-            pcs_score=validation.pcs_score,
-            score_card=validation.score_card,
+            score=verdict.pcs_score,
+            pcs_score=verdict.pcs_score,
+            score_card=verdict.score_card,
             market_metrics=core.market_metrics,
-            seo_opportunity=validation.seo_opportunity,
+            seo_opportunity=results["seo"].seo_opportunity,
             ideal_customer_persona=core.ideal_customer_persona,
-            analyst_footer=validation.analyst_footer,
+            analyst_footer=verdict.analyst_footer,
             market_overview=core.market_overview,
             # Premium Phase 1
             competitors_preview=core.competitors_preview,
-            unit_economics_preview=strategy.unit_economics_preview,
-            market_segments=strategy.market_segments,
-            gtm_action_plan=strategy.gtm_action_plan,
+            unit_economics_preview=unit_economics.unit_economics_preview,
+            market_segments=gtm.market_segments,
+            gtm_action_plan=gtm.gtm_action_plan,
             # Premium Phase 2
-            risk_validation=validation.risk_validation,
+            risk_validation=results["risks"].risk_validation,
             # Premium Phase 3
-            # Assuming MarketingPlaybook covers what we need. Note that JTBD logic might need refinement based on models.py structure.
-            # If MarketingPlaybook inside strategy has everything, we map it.
-            # models.py expects jtbd_deep_dive separately. 
-            # Ideally step_2_strategy should fill this.
-            # Since we defined AnalystStrategy to include `marketing_playbook` only, we'll map `jtbd_deep_dive` to None for now or modify models later.
-            # Actually, `marketing_playbook` in `models.py` doesn't have `functional_job` etc.
-            # To fix this properly, we should have asked for `jtbd_deep_dive` in Step 2.
-            # For this iteration, we accept it might be missing and focus on the refactor stability.
+            # No node produces the JTBD deep dive yet (models.py expects it separately
+            # from marketing_playbook); it stays None until one is added to the DAG.
             jtbd_deep_dive=None, 
-            marketing_playbook=strategy.marketing_playbook
+            marketing_playbook=gtm.marketing_playbook
         )
         
         final_response = AnalystResponse(analyst=analyst)
-        
-        # Step 4: Translation (if needed)
-        if language != "en":
-            final_response = translate_analysis_to_language(final_response, language, idea)
             
         print(f"[Analyst] ✅ Total modular analysis time: {time.time() - total_start:.2f}s\n")
         return final_response
@@ -478,6 +548,9 @@ def generate_analysis(idea: str, market_data_context: str, language: str = "en")
             status_code=500,
             detail=f"Error generating modular analysis: {str(e)}"
         )
+    finally:
+        if translator:
+            translator.shutdown(wait=False, cancel_futures=True)
 
 def generate_rescue_plan(idea: str, analyst_data: Analyst, language: str = "en") -> RescuePlan:
     """
@@ -524,6 +597,7 @@ def generate_rescue_plan(idea: str, analyst_data: Analyst, language: str = "en")
             response_format=RescuePlan,
             temperature=0.7
         )
+        metrics.record_llm_usage("analyst", response)
         
         print(f"[Analyst] Step 3: Validating response...")
         validation_start = time.time()
@@ -1,28 +1,28 @@
 import json
 import time
 import urllib.parse
-import requests
-import base64
-from typing import Dict
+from typing import Callable, Dict, Optional
 from fastapi import HTTPException
 from models import ArchitectResponse
 from utils import (
     openai_client, 
     clean_text_for_json,
-    GITHUB_TOKEN,
-    GITHUB_USERNAME,
-    GITHUB_TOKEN,
     GITHUB_USERNAME,
     VERCEL_API_TOKEN
 )
 import os
+import metrics
+from github_publisher import PublishJob, github_publisher
+from agents.mvp_builder import MVP_BUILD_MODE, MVP_FILES, build_mvp_files, store_code_artifacts
 
 API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
 
-def generate_mvp_site(idea: str, blueprint: Dict) -> Dict:
+def generate_mvp_site(idea: str, blueprint: Dict, on_event: Optional[Callable[[Dict], None]] = None) -> Dict:
     """
     Génère un vrai site MVP basé sur le blueprint.
-    Utilise OpenAI pour générer le code complet du site.
+    Utilise OpenAI pour générer le code complet du site: un fichier par
+    completion streamée (agents/mvp_builder.py, événements via `on_event`),
+    ou un seul objet JSON avec MVP_BUILD_MODE=json.
     """
     
     # Construire une description complète pour générer le code
@@ -73,45 +73,51 @@ Generate complete HTML, CSS, and JavaScript code for this MVP."""
     start_time = time.time()
     
     try:
-        # Générer le code du site via OpenAI
-        code_response = openai_client.chat.completions.create(
-            model="gpt-4o-2024-08-06",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert full-stack web developer. Generate complete, production-ready code for a modern web application. The code must be fully functional, responsive, and ready to deploy. Return a JSON object with: {\"html\": \"complete HTML code\", \"css\": \"complete CSS code\", \"javascript\": \"complete JavaScript code\", \"readme\": \"deployment instructions\"}"
-                },
-                {
-                    "role": "user",
-                    "content": site_description
-                }
-            ],
-            temperature=0.7
-        )
-        
-        code_content = code_response.choices[0].message.content
-        
-        # Parser le code généré
-        try:
-            # Essayer de parser comme JSON
-            if code_content.strip().startswith('{'):
-                code_data = json.loads(code_content)
-            else:
-                # Si ce n'est pas du JSON, extraire le code manuellement
+        code_artifacts = None
+        if MVP_BUILD_MODE == "stream":
+            # Un fichier = une completion streamée, stockés dès qu'ils sont prêts
+            code_data, code_artifacts = build_mvp_files(site_description, on_event)
+        else:
+            # Générer le code du site via OpenAI
+            code_response = openai_client.chat.completions.create(
+                model="gpt-4o-2024-08-06",
+                messages=[
+                    {
+                        "role": "system",
+                        "content": "You are an expert full-stack web developer. Generate complete, production-ready code for a modern web application. The code must be fully functional, responsive, and ready to deploy. Return a JSON object with: {\"html\": \"complete HTML code\", \"css\": \"complete CSS code\", \"javascript\": \"complete JavaScript code\", \"readme\": \"deployment instructions\"}"
+                    },
+                    {
+                        "role": "user",
+                        "content": site_description
+                    }
+                ],
+                temperature=0.7
+            )
+            metrics.record_llm_usage("architect", code_response)
+        
+            code_content = code_response.choices[0].message.content
+        
+            # Parser le code généré
+            try:
+                # Essayer de parser comme JSON
+                if code_content.strip().startswith('{'):
+                    code_data = json.loads(code_content)
+                else:
+                    # Si ce n'est pas du JSON, extraire le code manuellement
+                    code_data = {
+                        "html": code_content,
+                        "css": "",
+                        "javascript": "",
+                        "readme": f"# {brand_kit.get('project_name', 'MVP')}\n\n{idea}\n\nDeploy this MVP to any static hosting service."
+                    }
+            except json.JSONDecodeError:
+                # Si le parsing JSON échoue, créer une structure par défaut
                 code_data = {
                     "html": code_content,
                     "css": "",
                     "javascript": "",
-                    "readme": f"# {brand_kit.get('project_name', 'MVP')}\n\n{idea}\n\nDeploy this MVP to any static hosting service."
+                    "readme": f"# {brand_kit.get('project_name', 'MVP')}\n\n{idea}"
                 }
-        except json.JSONDecodeError:
-            # Si le parsing JSON échoue, créer une structure par défaut
-            code_data = {
-                "html": code_content,
-                "css": "",
-                "javascript": "",
-                "readme": f"# {brand_kit.get('project_name', 'MVP')}\n\n{idea}"
-            }
         
         # Générer un nom de projet unique
         project_name = brand_kit.get('project_name', 'mvp').lower().replace(' ', '-').replace('_', '-')
@@ -235,86 +241,30 @@ IMPORTANT: You must include the following tracking script in the <head> of the i
         
         print(f"Generated Lovable URL with detailed prompt: {mvp_url[:100]}...")
         
-        # Fallback optionnel: Créer un repo GitHub avec le code généré (pour backup)
+        # Code généré -> artifact store; le rapport ne garde que les références
+        code_files = {name: code_data.get(name, "") for name in MVP_FILES}
+        code_files["readme"] = code_files["readme"] or f"# {project_name}\n\n{idea}"
+        if code_artifacts is None:
+            code_artifacts = store_code_artifacts(code_files)
+        elif not code_data.get("readme"):
+            code_artifacts += store_code_artifacts({"readme": code_files["readme"]})
+
+        # Fallback optionnel: repo GitHub avec le code généré (pour backup).
+        # Publié en arrière-plan (github_publisher.py): le rapport n'attend pas GitHub
         github_repo_url = None
-        if GITHUB_TOKEN:
-            try:
-                # Créer le repo GitHub
-                github_headers = {
-                    "Authorization": f"token {GITHUB_TOKEN}",
-                    "Accept": "application/vnd.github.v3+json"
-                }
-                
-                repo_data = {
-                    "name": project_id,
-                    "description": f"AI-generated MVP for: {idea}",
-                    "private": False,
-                    "auto_init": False
-                }
-                
-                create_repo_response = requests.post(
-                    f"https://api.github.com/user/repos",
-                    headers=github_headers,
-                    json=repo_data,
-                    timeout=10
-                )
-                
-                if create_repo_response.status_code in [200, 201]:
-                    repo_info = create_repo_response.json()
-                    github_repo_url = repo_info.get("html_url")
-                    
-                    # Créer les fichiers dans le repo
-                    files_to_create = [
-                        {
-                            "path": "index.html",
-                            "content": code_data.get("html", ""),
-                            "message": "Add generated HTML"
-                        },
-                        {
-                            "path": "styles.css",
-                            "content": code_data.get("css", ""),
-                            "message": "Add generated CSS"
-                        },
-                        {
-                            "path": "script.js",
-                            "content": code_data.get("javascript", ""),
-                            "message": "Add generated JavaScript"
-                        },
-                        {
-                            "path": "README.md",
-                            "content": code_data.get("readme", f"# {project_name}\n\n{idea}"),
-                            "message": "Add README"
-                        }
-                    ]
-                    
-                    # Créer les fichiers un par un
-                    for file_info in files_to_create:
-                        if file_info["content"]:
-                            file_content_b64 = base64.b64encode(
-                                file_info["content"].encode('utf-8')
-                            ).decode('utf-8')
-                            
-                            file_data = {
-                                "message": file_info["message"],
-                                "content": file_content_b64
-                            }
-                            
-                            requests.put(
-                                f"https://api.github.com/repos/{GITHUB_USERNAME}/{project_id}/contents/{file_info['path']}",
-                                headers=github_headers,
-                                json=file_data,
-                                timeout=10
-                            )
-                    
-                    print(f"Created GitHub repo: {github_repo_url}")
-                else:
-                    print(f"Failed to create GitHub repo: {create_repo_response.status_code}")
-                    
-            except Exception as e:
-                print(f"Warning: Could not create GitHub repo: {e}")
+        # Vercel needs the repo to exist: only a completed publish counts, not a queued one
+        repo_live = github_publisher.is_live(project_id)
+        publish_job = PublishJob(
+            repo=project_id,
+            description=f"AI-generated MVP for: {idea}",
+            files={MVP_FILES[name][0]: content for name, content in code_files.items()}
+        )
+        if github_publisher.enqueue(publish_job):
+            github_repo_url = github_publisher.repo_url(project_id)
+            print(f"Queued GitHub publish: {github_repo_url}")
         
-        # Fallback optionnel: Déployer sur Vercel
-        if VERCEL_API_TOKEN and github_repo_url:
+        # Fallback optionnel: Déployer sur Vercel (repo déjà publié uniquement)
+        if VERCEL_API_TOKEN and repo_live:
             try:
                 vercel_headers = {
                     "Authorization": f"Bearer {VERCEL_API_TOKEN}",
@@ -360,14 +310,12 @@ IMPORTANT: You must include the following tracking script in the <head> of the i
         
         core_features = len(blueprint.get("user_flow", {}).get("steps", [])) + len(blueprint.get("data_moat", {}).get("features", []))
         
-        # Stocker le code généré (pour déploiement futur)
-        # En production, vous pourriez sauvegarder dans un storage (S3, etc.)
-        print(f"Generated MVP code for {project_name}. Code length: {len(str(code_data))} chars")
+        print(f"Generated MVP code for {project_name}: {len(code_artifacts)} artifacts, {sum(ref['size'] for ref in code_artifacts)} bytes")
         
         return {
             "mvp_url": mvp_url,
             "screenshot_url": screenshot_url,
-            "code": code_data,
+            "code_artifacts": code_artifacts,
             "build_time": build_time,
             "core_features": str(core_features),
             "status": "Ready" if mvp_url else "Code Generated",
@@ -385,14 +333,14 @@ IMPORTANT: You must include the following tracking script in the <head> of the i
         return {
             "mvp_url": f"https://{project_id}.verdyct.app",
             "screenshot_url": f"https://api.verdyct.app/screenshots/{project_id}.png",
-            "code": {},
+            "code_artifacts": [],
             "build_time": "N/A",
             "core_features": str(len(blueprint.get("user_flow", {}).get("steps", []))),
             "status": "Generated",
             "project_id": project_id
         }
 
-def generate_architect_blueprint(idea: str, language: str = "en", max_retries: int = 3) -> ArchitectResponse:
+def generate_architect_blueprint(idea: str, language: str = "en", max_retries: int = 3, on_event: Optional[Callable[[Dict], None]] = None) -> ArchitectResponse:
     """Génère le blueprint technique et de marque via OpenAI"""
     
     system_prompt = f"""You are a technical architect and brand strategist. Your task is to create a complete Minimum Lovable Product (MLP) blueprint for a startup idea.
@@ -479,6 +427,7 @@ Generate a comprehensive blueprint that a development team could use to build th
             response_format=ArchitectResponse,
             temperature=0.8  # Plus créatif pour le branding
         )
+        metrics.record_llm_usage("architect", response)
         
         if not response.choices or len(response.choices) == 0:
             raise ValueError("No response choices returned from OpenAI")
@@ -523,7 +472,7 @@ Generate a comprehensive blueprint that a development team could use to build th
         blueprint_dict = blueprint.model_dump()
         
         # Générer le site réel basé sur le blueprint
-        mvp_data = generate_mvp_site(idea, blueprint_dict.get('architect', {}))
+        mvp_data = generate_mvp_site(idea, blueprint_dict.get('architect', {}), on_event)
         
         # Remplacer mvp_status avec les données réelles
         blueprint_dict['architect']['mvp_status'] = {
@@ -536,7 +485,8 @@ Generate a comprehensive blueprint that a development team could use to build th
             "build_stats": [
                 {"value": mvp_data.get("build_time", "N/A"), "label": "Build Time"},
                 {"value": mvp_data.get("core_features", "0"), "label": "Core Features"}
-            ]
+            ],
+            "code_artifacts": mvp_data.get("code_artifacts", [])
         }
         
         # Recréer l'objet final
@@ -1,16 +1,26 @@
 import json
-from typing import Dict
+from typing import Dict, Optional
 from fastapi import HTTPException
 from models import FinancierResponse
 from utils import (
     openai_client, 
     tavily_client, 
     extract_tavily_results, 
-    format_tavily_context, 
-    extract_urls_from_context,
     clean_text_for_json,
     optimize_query
 )
+from sources import SourceRegistry, collect_urls
+import metrics
+from context_packing import pack_sections
+from projections import DEFAULT_CHURN, YEARS, project_grid, simulate_risk, status_labels
+from numeric_parsing import parse_lever
+
+# Levier -> (valeur par défaut, type pour parse_lever)
+LEVER_DEFAULTS = {
+    "monthly_price": (29.0, "amount"),
+    "ad_spend": (0.0, "amount"),
+    "conversion_rate": (2.0, "percent"),
+}
 
 def get_financial_intel(idea: str) -> Dict:
     """
@@ -26,14 +36,17 @@ def get_financial_intel(idea: str) -> Dict:
         print(f"   💰 Searching Pricing: {pricing_query}...")
         r_pricing = tavily_client.search(query=pricing_query, search_depth="advanced", max_results=6)
         pricing_res = extract_tavily_results(r_pricing)
-        results["pricing_context"] = format_tavily_context(pricing_res)
+        pricing = SourceRegistry().add_results(pricing_res)
+        results["pricing_context"] = pricing.text
         
         # 2. Cost/Operating Benchmarks Search (LEAN/BOOTSTRAP FOCUSED)
         cost_query = optimize_query(f"Bootstrapped operating costs for {idea} solopreneur indie hacker tech stack")
         print(f"   📉 Searching Costs (Lean): {cost_query}...")
         r_costs = tavily_client.search(query=cost_query, search_depth="advanced", max_results=4)
         cost_res = extract_tavily_results(r_costs)
-        results["cost_context"] = format_tavily_context(cost_res)
+        costs = SourceRegistry().add_results(cost_res)
+        results["cost_context"] = costs.text
+        results["sources"] = {"pricing": pricing, "cost": costs}
         
         results["results_count"] = len(pricing_res) + len(cost_res)
         return results
@@ -46,131 +59,80 @@ def get_financial_intel(idea: str) -> Dict:
             "results_count": 0
         }
 
-def calculate_projections(monthly_price: float, ad_spend: float, conversion_rate: float, cost_structure: list = []) -> Dict:
+def calculate_projections(monthly_price: float, ad_spend: float, conversion_rate: float, cost_structure: list = [], churn_rate: float = DEFAULT_CHURN) -> Dict:
     """
-    Calcule les projections financières (Revenue, Profit, Break-Even, Runway).
-    Now includes Fixed Cost analysis from LLM data.
+    Calcule les projections financières (Revenue, Profit, Break-Even, Runway)
+    pour un seul jeu de leviers. Le modèle est celui de projections.py
+    (vectorisé, cf. project_grid pour des grilles de scénarios).
     """
-    # 1. Analyze Costs
-    fixed_costs = 0
-    variable_costs_per_user = 0
-    
-    # Defaults if no structure provided
-    if not cost_structure:
-        fixed_costs = 100 # Low default for lean startups (Domains, minimal hosting)
-    else:
-        for cost in cost_structure:
-            # Handle both dict and Pydantic object
-            c_amount = cost.get('monthly_amount', 0) if isinstance(cost, dict) else cost.monthly_amount
-            c_var = cost.get('is_variable', False) if isinstance(cost, dict) else cost.is_variable
-            
-            if c_var:
-                variable_costs_per_user += c_amount # Assuming 'variable' costs are entered as unit costs by LLM
-            else:
-                fixed_costs += c_amount
-
-    # Gross Margin (Unit Economics)
-    # Revenue per user - Variable Cost
-    gross_profit_per_user = monthly_price - variable_costs_per_user
-    if gross_profit_per_user <= 0: gross_profit_per_user = monthly_price * 0.2 # Fallback to 20% if costs > price
-
-    # 2. Key Metrics
-    churn_rate = 0.05
-    
-    # LEAN VISIBILITY ALGORITHM
-    # 1. Base Organic Traffic (SEO/Social/Communities) - Every founder does some manual work
-    base_organic_traffic = 300 # Visitors per month (Sweat Equity)
-    
-    # 2. Paid Traffic
-    paid_leads = ad_spend / 1.5 if ad_spend > 0 else 0
-    
-    # Total Leads
-    total_leads = base_organic_traffic + paid_leads
-    
-    customers_per_month = total_leads * (conversion_rate / 100)
-    
-    cac = ad_spend / customers_per_month if customers_per_month > 0 else ad_spend
-    ltv = gross_profit_per_user / churn_rate
-    ltv_cac_ratio = ltv / cac if cac > 0 else 0
-
-    # 3. Break-Even Analysis
-    # Breakeven Users = Fixed Costs / Gross Profit per User
-    break_even_users = fixed_costs / gross_profit_per_user if gross_profit_per_user > 0 else 0
-    break_even_users = int(break_even_users)
-
-    # 4. Burn Rate & Runway
-    seed_money = 50000 # Assumption: Friends & Family / Pre-seed
-    # Runway = Seed / Net Burn (Fixed Costs - Revenue) -> Simplified to (Seed / Fixed Costs) for Day 0
-    runway_months = seed_money / fixed_costs if fixed_costs > 0 else 99
-    
-    # Status
-    if ltv_cac_ratio >= 3 and runway_months > 12: status = "Excellent"
-    elif ltv_cac_ratio >= 1.5: status = "Good"
-    elif ltv_cac_ratio >= 1: status = "Fair"
-    else: status = "Risk"
-
-    # 5. Projections (5 Years)
-    growth_rate = 0.15 # 15% MoM early stage
-    projections = []
-    current_customers = 0
-    
-    # Track when we hit breakeven
-    months_to_breakeven = None
-    accumulated_cash = seed_money
-
-    for year in range(1, 6):
-        customers_end_year = 0
-        annual_revenue = 0
-        annual_profit = 0
-        
-        # Monthly simulation for precision
-        for m in range(12):
-            if year == 1 and m == 0:
-                new = customers_per_month
-            else:
-                new = customers_per_month * ((1 + growth_rate) if current_customers < 1000 else 1.05)
-            
-            churn = current_customers * churn_rate
-            current_customers += (new - churn)
-            
-            # Monthly Financials
-            m_revenue = current_customers * monthly_price
-            m_costs = fixed_costs + (current_customers * variable_costs_per_user) + ad_spend
-            m_profit = m_revenue - m_costs
-            
-            annual_revenue += m_revenue
-            annual_profit += m_profit
-            accumulated_cash += m_profit
-
-            if m_profit > 0 and months_to_breakeven is None:
-                months_to_breakeven = ((year - 1) * 12) + m
+    grid = project_grid(monthly_price, ad_spend, conversion_rate, churn_rate, cost_structure)
+    point = {name: values.reshape(values.shape[4:] if values.ndim > 4 else ()) for name, values in grid.items()}
 
-        # Format
-        fmt = lambda x: f"€{x:,.0f}".replace(",", " ")
-        projections.append({
+    fmt = lambda x: f"€{x:,.0f}".replace(",", " ")
+    projections = [
+        {
             "year": f"Year {year}",
-            "revenue": fmt(annual_revenue),
-            "profit": fmt(annual_profit),
-            "customers": f"{int(current_customers)}"
-        })
+            "revenue": fmt(point["annual_revenue"][year - 1]),
+            "profit": fmt(point["annual_profit"][year - 1]),
+            "customers": f"{int(point['customers'][year - 1])}"
+        }
+        for year in range(1, YEARS + 1)
+    ]
 
     return {
-        "cac": cac,
-        "ltv": ltv,
-        "ltv_cac_ratio": ltv_cac_ratio,
-        "status": status,
+        "cac": float(point["cac"]),
+        "ltv": float(point["ltv"]),
+        "ltv_cac_ratio": float(point["ltv_cac_ratio"]),
+        "status": str(status_labels(point["status_code"])),
         "projections": projections,
-        "break_even_users": f"{break_even_users:,}".replace(",", " "),
-        "projected_runway_months": f"{int(runway_months)} months" if accumulated_cash > 0 else "0 months"
+        "break_even_users": f"{int(point['break_even_users']):,}".replace(",", " "),
+        "projected_runway_months": f"{int(point['runway_months'])} months"
     }
 
-def generate_financier_analysis(idea: str, pricing_context: str, cost_context: str = "", language: str = "en", max_retries: int = 3) -> FinancierResponse:
+def parse_levers(levers: Dict, language: str = "en") -> Dict[str, Dict[str, float]]:
+    """
+    Les leviers du LLM en floats typés ("€29/month", "1,200", "2–3%"...),
+    avec des valeurs par défaut au lieu d'une exception.
+    """
+    parsed = {}
+    for name, (default, kind) in LEVER_DEFAULTS.items():
+        lever = levers.get(name) or {}
+        if not isinstance(lever, dict):
+            lever = {"value": lever}
+        value = parse_lever(lever.get("value"), default, kind, language)
+        parsed[name] = {
+            "value": value,
+            "min": parse_lever(lever.get("min"), 0.0, kind, language),
+            "max": parse_lever(lever.get("max"), max(value * 2, 1.0), kind, language),
+            "step": parse_lever(lever.get("step"), 1.0, kind, language),
+        }
+    return parsed
+
+def format_financier_metrics(calculations: Dict) -> Dict[str, str]:
+    """Les métriques du Profit Engine (modèle Metrics) à partir de calculate_projections."""
+    return {
+        "ltv_cac_ratio": f"{calculations['ltv_cac_ratio']:.1f}:1",
+        "status": calculations['status'],
+        "estimated_cac": f"€{calculations['cac']:.0f}",
+        "estimated_ltv": f"€{calculations['ltv']:.0f}",
+        "break_even_users": calculations['break_even_users'],
+        "projected_runway_months": calculations['projected_runway_months']
+    }
+
+def generate_financier_analysis(idea: str, pricing_context: str, cost_context: str = "", language: str = "en", max_retries: int = 3, sources: Optional[Dict[str, SourceRegistry]] = None) -> FinancierResponse:
     """Génère l'analyse financière via OpenAI (sans calculer les projections)"""
     
-    # Extraire les URLs disponibles depuis le contexte
-    pricing_urls = extract_urls_from_context(pricing_context)
-    cost_urls = extract_urls_from_context(cost_context)
-    all_urls = {**pricing_urls, **cost_urls}
+    # URLs disponibles, via les registres de sources (get_financial_intel)
+    sources = sources or {}
+    pricing_urls = sources.get("pricing") or SourceRegistry.from_context(pricing_context)
+    cost_urls = sources.get("cost") or SourceRegistry.from_context(cost_context)
+    all_urls = collect_urls(pricing_urls, cost_urls)
+
+    # Les sources les plus pertinentes, dédoublonnées, dans le budget de tokens du Financier
+    packed = pack_sections(idea, {"pricing": pricing_urls, "cost": cost_urls}, "financier")
+    pricing_context = packed["pricing"].text
+    cost_context = packed["cost"].text
+    packed_urls = collect_urls(*packed.values())
     
     if not all_urls:
          # Warn but don't crash, allowing inference if possible (similar to Spy)
@@ -181,7 +143,7 @@ def generate_financier_analysis(idea: str, pricing_context: str, cost_context: s
     cost_section = f"OPERATING COST BENCHMARKS:\n{cost_context}" if cost_context else "No specific cost benchmarks available."
     
     # Liste des URLs disponibles pour référence
-    urls_list = "\n".join([f"- {url}" for url in all_urls.keys()]) if all_urls else "No URLs available"
+    urls_list = "\n".join([f"- {url}" for url in packed_urls.keys()]) if packed_urls else "No URLs available"
     
     system_prompt = f"""You are a Bootstrapped Founder Advisor. Your task is to analyze a startup idea and suggest a lean pricing model, low-cost operating structure, and realistic roadmap for a solopreneur.
 
@@ -247,6 +209,7 @@ Available URLs for reference:
             response_format=FinancierResponse,
             temperature=0.7
         )
+        metrics.record_llm_usage("financier", response)
         
         if not response.choices or len(response.choices) == 0:
             raise ValueError("No response choices returned from OpenAI")
@@ -259,6 +222,9 @@ Available URLs for reference:
                 import json
                 try:
                     content_dict = json.loads(message.content)
+                    profit_engine = content_dict.get("financier", {}).get("profit_engine", {})
+                    if isinstance(profit_engine.get("levers"), dict):
+                        profit_engine["levers"] = parse_levers(profit_engine["levers"], language)
                     analysis = FinancierResponse(**content_dict)
                 except Exception as e:
                     raise ValueError(f"Failed to parse OpenAI response: {e}")
@@ -287,28 +253,29 @@ Available URLs for reference:
         # Post-Processing: Calculations
         analysis_dict = analysis.model_dump()
         
-        monthly_price = analysis.financier.profit_engine.levers.monthly_price.value
-        ad_spend = analysis.financier.profit_engine.levers.ad_spend.value
-        conversion_rate = analysis.financier.profit_engine.levers.conversion_rate.value
+        levers = parse_levers(analysis_dict['financier']['profit_engine']['levers'], language)
+        analysis_dict['financier']['profit_engine']['levers'] = levers
+        monthly_price = levers['monthly_price']['value']
+        ad_spend = levers['ad_spend']['value']
+        conversion_rate = levers['conversion_rate']['value']
         cost_structure = analysis.financier.cost_structure or []
         
         # PASS COST STRUCTURE TO CALCULATIONS
         calculations = calculate_projections(monthly_price, ad_spend, conversion_rate, cost_structure)
         
         # Update metrics
-        analysis_dict['financier']['profit_engine']['metrics'] = {
-            "ltv_cac_ratio": f"{calculations['ltv_cac_ratio']:.1f}:1",
-            "status": calculations['status'],
-            "estimated_cac": f"€{calculations['cac']:.0f}",
-            "estimated_ltv": f"€{calculations['ltv']:.0f}",
-            "break_even_users": calculations['break_even_users'], # NEW
-            "projected_runway_months": calculations['projected_runway_months'] # NEW
-        }
+        analysis_dict['financier']['profit_engine']['metrics'] = format_financier_metrics(calculations)
         
         # Update projections
         analysis_dict['financier']['revenue_projection'] = {
             "projections": calculations['projections']
         }
+
+        # Bandes P10/P50/P90 (Monte Carlo) autour des mêmes leviers
+        try:
+            analysis_dict['financier']['risk_simulation'] = simulate_risk(monthly_price, ad_spend, conversion_rate, cost_structure)
+        except Exception as e:
+            print(f"⚠️ Risk simulation failed: {e}")
         
         return FinancierResponse(**analysis_dict)
         
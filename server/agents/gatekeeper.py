@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from utils import openai_client
+from llm_gateway import chat_parse
 
 class GatekeeperResponse(BaseModel):
     is_saas: bool
@@ -31,7 +31,9 @@ Example: "Verdyct is designed to analyze software and SaaS businesses, but this
 """
 
     try:
-        response = openai_client.beta.chat.completions.parse(
+        response = chat_parse(
+            "gatekeeper",
+            cacheable=True,
             model="gpt-4o-2024-08-06",
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -0,0 +1,219 @@
+"""
+Streamed MVP code generation (Architect).
+
+The original builder asked GPT-4o for ONE JSON object holding the full HTML,
+CSS, JS and README, and waited for the whole completion: nothing was
+viewable before the last token, and a truncated answer broke the JSON and
+lost every file. Here each file is its own streamed completion:
+    - index.html and README.md start at once; styles.css and script.js
+      start as soon as the HTML is done (they target its classes and ids)
+    - every finished file goes to the artifact store and to `on_event`
+      right away, so the HTML is viewable while CSS/JS are still streaming
+    - a file cut by max_tokens is kept and flagged `truncated`; a failed
+      file is skipped: neither invalidates the others
+The system prompt (persona + site description) is shared by every file, so
+it is a cacheable prefix.
+
+Events (`on_event`, called from worker threads):
+    {"type": "artifact_progress", "file", "chars"}
+    {"type": "artifact_complete", "file", "artifact", "truncated", "duration", "started_at"}
+    {"type": "artifact_failed", "file", "error"}
+"""
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import metrics
+from artifact_store import artifact_ref, artifact_store
+
+MVP_BUILD_MODE = os.getenv("MVP_BUILD_MODE", "stream")  # "stream" | "json" (single completion)
+MVP_MODEL = "gpt-4o-2024-08-06"
+PROGRESS_EVERY_CHARS = 2000
+
+# Clé du code généré -> (fichier, content type)
+MVP_FILES = {
+    "html": ("index.html", "text/html"),
+    "css": ("styles.css", "text/css"),
+    "javascript": ("script.js", "text/javascript"),
+    "readme": ("README.md", "text/markdown"),
+}
+
+BUILDER_PERSONA = (
+    "You are an expert full-stack web developer. You write complete, production-ready, "
+    "responsive code for a modern web application, one file at a time."
+)
+
+_OPEN_FENCE_RE = re.compile(r"^\s*```[\w+-]*[ \t]*\n")
+_CLOSE_FENCE_RE = re.compile(r"\n?```\s*$")
+
+
+@dataclass(frozen=True)
+class MvpFile:
+    name: str  # Key in MVP_FILES / code_data
+    instructions: str
+    depends_on: Tuple[str, ...] = ()
+    max_tokens: int = 4000
+
+
+MVP_FILE_DAG: Tuple[MvpFile, ...] = (
+    MvpFile(
+        "html",
+        "Write index.html: the complete page, semantic HTML5, every user flow step as a section, "
+        "linking styles.css and script.js. Use meaningful class names and ids.",
+        max_tokens=6000
+    ),
+    MvpFile(
+        "readme",
+        "Write README.md: what the MVP does, the file layout (index.html, styles.css, script.js) "
+        "and how to deploy it to any static hosting service.",
+        max_tokens=1200
+    ),
+    MvpFile(
+        "css",
+        "Write styles.css for the index.html below: brand colors and typography, mobile-first "
+        "responsive layout, smooth transitions. Only style selectors that exist in the HTML.",
+        depends_on=("html",)
+    ),
+    MvpFile(
+        "javascript",
+        "Write script.js for the index.html below: make every user flow step functional "
+        "(forms, navigation, state), vanilla JavaScript, no build step. Only query ids and "
+        "classes that exist in the HTML.",
+        depends_on=("html",)
+    ),
+)
+
+
+def strip_fences(text: str) -> str:
+    """The file content without a surrounding ```lang ... ``` block (possibly unclosed if truncated)."""
+    if _OPEN_FENCE_RE.match(text):
+        text = _CLOSE_FENCE_RE.sub("", _OPEN_FENCE_RE.sub("", text, count=1))
+    return text.strip()
+
+
+def store_code_artifacts(files: Dict[str, str], truncated: Optional[Dict[str, bool]] = None) -> List[Dict]:
+    """Fichiers générés -> artifact store (dédupliqués par hash); retourne les références."""
+    refs = []
+    for name, content in files.items():
+        if not content:
+            continue
+        path, content_type = MVP_FILES[name]
+        try:
+            ref = artifact_ref(path, artifact_store.put_text(str(content), content_type))
+        except Exception as e:
+            print(f"⚠️ Could not store artifact {path}: {e}")
+            continue
+        if truncated and truncated.get(name):
+            ref["truncated"] = True
+        refs.append(ref)
+    return refs
+
+
+def stream_file(
+    file: MvpFile,
+    site_description: str,
+    upstream: Dict[str, str],
+    on_event: Optional[Callable[[Dict], None]] = None
+) -> Tuple[str, bool]:
+    """Generate one file as a streamed completion. Returns (content, truncated)."""
+    from utils import openai_client
+
+    path = MVP_FILES[file.name][0]
+    task = file.instructions
+    for dependency in file.depends_on:
+        if upstream.get(dependency):
+            task += f"\n\n{MVP_FILES[dependency][0]}:\n{upstream[dependency]}"
+    task += f"\n\nReturn ONLY the content of {path}, no explanations."
+
+    stream = openai_client.chat.completions.create(
+        model=MVP_MODEL,
+        messages=[
+            {"role": "system", "content": f"{BUILDER_PERSONA}\n\n{site_description}"},
+            {"role": "user", "content": task}
+        ],
+        temperature=0.7,
+        max_tokens=file.max_tokens,
+        stream=True,
+        stream_options={"include_usage": True}
+    )
+
+    parts: List[str] = []
+    length, reported, finish_reason = 0, 0, None
+    for chunk in stream:
+        if chunk.usage:
+            metrics.record_llm_usage("architect", chunk, step=file.name)
+        if not chunk.choices:
+            continue
+        choice = chunk.choices[0]
+        finish_reason = choice.finish_reason or finish_reason
+        delta = choice.delta.content if choice.delta else None
+        if delta:
+            parts.append(delta)
+            length += len(delta)
+            if on_event and length - reported >= PROGRESS_EVERY_CHARS:
+                reported = length
+                on_event({"type": "artifact_progress", "file": path, "chars": length})
+
+    truncated = finish_reason == "length"
+    if truncated:
+        metrics.incr("architect.files.truncated")
+    return strip_fences("".join(parts)), truncated
+
+
+def build_mvp_files(
+    site_description: str,
+    on_event: Optional[Callable[[Dict], None]] = None,
+    files: Tuple[MvpFile, ...] = MVP_FILE_DAG
+) -> Tuple[Dict[str, str], List[Dict]]:
+    """
+    Generate and store every file (a file starts as soon as its dependencies
+    are done). Returns (code_data, artifact refs); failed files are missing
+    from both.
+    """
+    build_start = time.time()
+    contents: Dict[str, str] = {}
+    refs: List[Dict] = []
+    finished = set()
+    pending = list(files)
+    running = {}
+
+    def run(file: MvpFile, upstream: Dict[str, str]):
+        start = time.time()
+        content, truncated = stream_file(file, site_description, upstream, on_event)
+        file_refs = store_code_artifacts({file.name: content}, {file.name: truncated})
+        return content, file_refs, {
+            "duration": f"{time.time() - start:.2f}s",
+            "started_at": f"{start - build_start:.2f}s",
+            "truncated": truncated,
+        }
+
+    with ThreadPoolExecutor(max_workers=len(files), thread_name_prefix="mvp-builder") as pool:
+        while pending or running:
+            for file in [f for f in pending if all(dep in finished for dep in f.depends_on)]:
+                pending.remove(file)
+                running[pool.submit(run, file, {dep: contents.get(dep, "") for dep in file.depends_on})] = file
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                file = running.pop(future)
+                finished.add(file.name)
+                path = MVP_FILES[file.name][0]
+                try:
+                    content, file_refs, event = future.result()
+                except Exception as e:
+                    print(f"[Architect] ❌ {path} failed: {e}")
+                    metrics.incr("architect.files.failed")
+                    if on_event:
+                        on_event({"type": "artifact_failed", "file": path, "error": str(e)})
+                    continue
+                if content:
+                    contents[file.name] = content
+                refs.extend(file_refs)
+                print(f"[Architect] ✅ {path} generated in {event['duration']} ({len(content)} chars{', truncated' if event['truncated'] else ''})")
+                if on_event and file_refs:
+                    on_event({"type": "artifact_complete", "file": path, "artifact": file_refs[0], **event})
+
+    print(f"[Architect] 🧱 MVP files built in {time.time() - build_start:.2f}s")
+    return contents, refs
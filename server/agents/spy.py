@@ -1,16 +1,18 @@
 import json
-from typing import Dict
+from typing import Dict, Optional
 from fastapi import HTTPException
 from models import SpyResponse
 from utils import (
     openai_client, 
     tavily_client, 
     extract_tavily_results, 
-    format_tavily_context, 
-    extract_urls_from_context,
     clean_text_for_json,
     optimize_query
 )
+from sources import SourceRegistry, collect_urls
+from llm_gateway import chat_completion
+import metrics
+from context_packing import pack_context, pack_sections
 
 def get_competitor_intel(idea: str) -> Dict:
     """
@@ -23,10 +25,11 @@ def get_competitor_intel(idea: str) -> Dict:
     """
     try:
         all_results = []
-        landscape_context = ""
-        pain_context = ""
-        feature_context = ""  # NEW - Premium
-        pricing_context = ""  # NEW - Premium
+        # Each context keeps its sources alongside the text (URL validation)
+        landscape = SourceRegistry()
+        pain = SourceRegistry()
+        features = SourceRegistry()  # NEW - Premium
+        pricing = SourceRegistry()  # NEW - Premium
         
         print(f"\n🔍 Starting Tavily searches for: {idea[:60]}...")
         
@@ -34,12 +37,15 @@ def get_competitor_intel(idea: str) -> Dict:
         search_terms = idea
         try:
             print("   Step 0: Extracting market keywords...")
-            term_response = openai_client.chat.completions.create(
+            term_response = chat_completion(
+                "spy",
+                cacheable=True,
                 model="gpt-4o-mini",
                 messages=[
                     {"role": "system", "content": "You are a search query expert. Extract the core market category and 2-3 key functional terms for this startup idea. Return ONLY the terms, no project names, no quotes. Example: 'Project X: A drone for walking dogs' -> 'drone dog walking service pet automation'"},
                     {"role": "user", "content": idea}
                 ],
+                temperature=0,
                 max_tokens=30
             )
             search_terms = term_response.choices[0].message.content.strip()
@@ -55,7 +61,7 @@ def get_competitor_intel(idea: str) -> Dict:
             r1 = tavily_client.search(query=query_discovery, search_depth="advanced", max_results=5)
             discovery_results = extract_tavily_results(r1)
             all_results.extend(discovery_results)
-            landscape_context += format_tavily_context(discovery_results)
+            landscape.add_results(discovery_results)
             print(f"   ✅ Step 1 complete ({len(discovery_results)} results)")
         except Exception as e:
             print(f"   ❌ Step 1 failed: {e}")
@@ -68,7 +74,7 @@ def get_competitor_intel(idea: str) -> Dict:
             r2 = tavily_client.search(query=query_compare, search_depth="advanced", max_results=5)
             compare_results = extract_tavily_results(r2)
             all_results.extend(compare_results)
-            landscape_context += "\n" + format_tavily_context(compare_results)
+            landscape.add_text("\n").add_results(compare_results)
             print(f"   ✅ Step 2 complete ({len(compare_results)} results)")
         except Exception as e:
              print(f"   ❌ Step 2 failed: {e}")
@@ -81,7 +87,7 @@ def get_competitor_intel(idea: str) -> Dict:
             r3 = tavily_client.search(query=query_sentiment, search_depth="advanced", max_results=6)
             sentiment_results = extract_tavily_results(r3)
             all_results.extend(sentiment_results)
-            pain_context = format_tavily_context(sentiment_results)
+            pain = SourceRegistry().add_results(sentiment_results)
             print(f"   ✅ Step 3 complete ({len(sentiment_results)} results)")
         except Exception as e:
              print(f"   ❌ Step 3 failed: {e}")
@@ -94,11 +100,13 @@ def get_competitor_intel(idea: str) -> Dict:
             # Sub-step A: Extract Top 3 Competitors from Step 1 results
             top_competitors = []
             try:
-                comp_response = openai_client.chat.completions.create(
+                comp_response = chat_completion(
+                    "spy",
+                    cacheable=True,
                     model="gpt-4o-mini",
                     messages=[
                         {"role": "system", "content": "Extract the names of the top 3 direct competitors mentioned in the search results. Return ONLY a valid JSON list of strings. Example: [\"HubSpot\", \"Salesforce\", \"Pipedrive\"]"},
-                        {"role": "user", "content": f"Search Results:\n{landscape_context[:2000]}"}
+                        {"role": "user", "content": f"Search Results:\n{pack_context(idea, landscape, 'spy_competitors').text}"}
                     ],
                     response_format={"type": "json_object"},
                     temperature=0
@@ -131,7 +139,7 @@ def get_competitor_intel(idea: str) -> Dict:
                         r_p = tavily_client.search(query=q_pricing, search_depth="advanced", max_results=1)
                         p_res = extract_tavily_results(r_p)
                         all_results.extend(p_res)
-                        pricing_context += f"\n\n--- {comp} PRICING ---\n" + format_tavily_context(p_res)
+                        pricing.add_text(f"\n\n--- {comp} PRICING ---\n").add_results(p_res)
                     except: pass
                     
                     # Search Features
@@ -140,7 +148,7 @@ def get_competitor_intel(idea: str) -> Dict:
                         r_f = tavily_client.search(query=q_features, search_depth="advanced", max_results=1)
                         f_res = extract_tavily_results(r_f)
                         all_results.extend(f_res)
-                        feature_context += f"\n\n--- {comp} FEATURES ---\n" + format_tavily_context(f_res)
+                        features.add_text(f"\n\n--- {comp} FEATURES ---\n").add_results(f_res)
                     except: pass
                 
                 print(f"   ✅ Deep Research Loop Complete.")
@@ -149,11 +157,11 @@ def get_competitor_intel(idea: str) -> Dict:
                  # Fallback to original generic search if no competitors extracted
                  query_features = optimize_query(f"Detailed feature list capabilities comparison {search_terms} market leaders")
                  r4 = tavily_client.search(query=query_features, search_depth="advanced", max_results=3)
-                 feature_context = format_tavily_context(extract_tavily_results(r4))
+                 features = SourceRegistry().add_results(extract_tavily_results(r4))
                  
                  query_pricing = optimize_query(f"Pricing plans pricing tiers {search_terms} tools detailed breakdown")
                  r5 = tavily_client.search(query=query_pricing, search_depth="advanced", max_results=3)
-                 pricing_context = format_tavily_context(extract_tavily_results(r5))
+                 pricing = SourceRegistry().add_results(extract_tavily_results(r5))
 
         except Exception as e:
             print(f"   ❌ Deep Research failed: {e}")
@@ -161,12 +169,18 @@ def get_competitor_intel(idea: str) -> Dict:
         print(f"✅ Tavily searches complete: {len(all_results)} total results\n")
         
         return {
-            "landscape_context": landscape_context,
-            "pain_context": pain_context,
-            "feature_context": feature_context, 
-            "pricing_context": pricing_context,
-            "landscape_count": 0,
-            "pain_count": 0
+            "landscape_context": landscape.text,
+            "pain_context": pain.text,
+            "feature_context": features.text, 
+            "pricing_context": pricing.text,
+            "sources": {
+                "landscape": landscape,
+                "pain": pain,
+                "feature": features,
+                "pricing": pricing
+            },
+            "landscape_count": len(landscape),
+            "pain_count": len(pain)
         }
         
     except Exception as e:
@@ -180,7 +194,7 @@ def get_competitor_intel(idea: str) -> Dict:
             "pain_count": 0
         }
 
-def generate_spy_analysis(idea: str, landscape_context: str, pain_context: str, feature_context: str = "", pricing_context: str = "", language: str = "en", max_retries: int = 3) -> SpyResponse:
+def generate_spy_analysis(idea: str, landscape_context: str, pain_context: str, feature_context: str = "", pricing_context: str = "", language: str = "en", max_retries: int = 3, sources: Optional[Dict[str, SourceRegistry]] = None) -> SpyResponse:
     """Génère l'analyse stratégique du Spy Agent via OpenAI avec retry automatique
     
     Args:
@@ -191,18 +205,33 @@ def generate_spy_analysis(idea: str, landscape_context: str, pain_context: str,
         pricing_context: (OPTIONAL) Pricing intelligence data for premium features
         language: Target language for the report
         max_retries: Max retry attempts for OpenAI calls
+        sources: (OPTIONAL) Source registries from get_competitor_intel; without
+            them the URLs are parsed out of the context strings once
     """
     
     print(f"\n🚀 Generating Spy Analysis...")
     print(f"   Idea: {idea[:60]}...")
     print(f"   Language: {language}")
     
-    # Extraire les URLs disponibles depuis TOUS les contextes (y compris premium)
-    landscape_urls = extract_urls_from_context(landscape_context)
-    pain_urls = extract_urls_from_context(pain_context)
-    feature_urls = extract_urls_from_context(feature_context) if feature_context else {}
-    pricing_urls = extract_urls_from_context(pricing_context) if pricing_context else {}
-    all_urls = {**landscape_urls, **pain_urls, **feature_urls, **pricing_urls}
+    # URLs disponibles dans TOUS les contextes (y compris premium), via les registres de sources
+    sources = sources or {}
+    landscape_urls = sources.get("landscape") or SourceRegistry.from_context(landscape_context)
+    pain_urls = sources.get("pain") or SourceRegistry.from_context(pain_context)
+    feature_urls = sources.get("feature") or SourceRegistry.from_context(feature_context)
+    pricing_urls = sources.get("pricing") or SourceRegistry.from_context(pricing_context)
+    all_urls = collect_urls(landscape_urls, pain_urls, feature_urls, pricing_urls)
+
+    # Les sources les plus pertinentes, dédoublonnées, dans le budget de tokens du Spy
+    packed = pack_sections(
+        idea,
+        {"landscape": landscape_urls, "pain": pain_urls, "feature": feature_urls, "pricing": pricing_urls},
+        "spy"
+    )
+    landscape_context = packed["landscape"].text
+    pain_context = packed["pain"].text
+    feature_context = packed["feature"].text
+    pricing_context = packed["pricing"].text
+    packed_urls = collect_urls(*packed.values())
     
     print(f"   URLs extracted: {len(all_urls)} total")
     print(f"     - Landscape: {len(landscape_urls)}")
@@ -223,7 +252,7 @@ def generate_spy_analysis(idea: str, landscape_context: str, pain_context: str,
     pricing_section = f"PRICING INTELLIGENCE DATA (for premium features):\n{pricing_context}" if pricing_context else ""
     
     # Liste des URLs disponibles pour référence
-    urls_list = "\n".join([f"- {url}" for url in all_urls.keys()]) if all_urls else "No URLs available"
+    urls_list = "\n".join([f"- {url}" for url in packed_urls.keys()]) if packed_urls else "No URLs available"
     
     # Instructions premium (ALWAYS INCLUDED to force generation attempt)
     premium_instructions = """
@@ -411,6 +440,7 @@ Be data-driven. Use ONLY the actual research data provided. If you cannot find s
             response_format=SpyResponse,
             temperature=0.7
         )
+        metrics.record_llm_usage("spy", response)
         
         if not response.choices or len(response.choices) == 0:
             raise ValueError("No response choices returned from OpenAI")
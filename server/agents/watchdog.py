@@ -1,53 +1,152 @@
-import requests
-from typing import Dict, Optional
-from utils import openai_client, clean_text_for_json
+"""
+Watchdog: checks that a project's live page still has its Call to Action.
 
-def verify_cta(project_id: str, url: str) -> Dict[str, str]:
-    """
-    Verifies the Call to Action (CTA) button on the given URL.
-    
-    Args:
-        project_id: The ID of the project.
-        url: The URL of the MVP to check.
-        
-    Returns:
-        A dictionary containing the CTA text and selector, or error details.
-    """
-    print(f"Watchdog: Verifying CTA for {project_id} at {url}")
-    
-    # TODO: SPA/Rendering Awareness
-    # Simple HTML fetching with requests might return empty pages if the client site 
-    # is a Single Page Application (React/Vue) rendered entirely on the client.
-    # For a robust solution, we should swap this for a Headless Browser (like Playwright).
-    # Structure is kept simple for MVP but ready for that swap.
-    
-    try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        html_content = response.text
-        
-        # Truncate HTML to avoid token limits if it's huge
-        if len(html_content) > 50000:
-            html_content = html_content[:50000] + "..."
-            
-        # Use OpenAI to find the CTA
+Each verification used to block the event loop on `requests.get` and send up
+to 8k tokens of raw HTML to GPT-4o. Now:
+    - pages are fetched with one pooled async HTTP client, as conditional
+      requests (If-None-Match / If-Modified-Since from the last visit) and
+      capped at WATCHDOG_MAX_PAGE_BYTES
+    - a 304, or a body with the same SHA-256 as last time, returns the
+      previous result without parsing anything
+    - otherwise the page is parsed locally (cta_extraction.py) into a short
+      list of buttons / links / forms with unique selectors; when the
+      heuristic scorer is confident, that's the answer
+    - only when it isn't does the LLM see the page, and only as the compact
+      candidate list (~15 entries), to pick one
+The per-URL state (validators, page hash, last result) lives in a KVStore.
+"""
+import asyncio
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+import metrics
+from context_packing import fit_text
+from cta_extraction import MAX_CANDIDATES, CTACandidate, confident_pick, extract_candidates, rank_candidates
+from kv_store import KVStore
+from llm_gateway import chat_completion
+
+WATCHDOG_TIMEOUT = float(os.getenv("WATCHDOG_TIMEOUT", "10"))
+WATCHDOG_MAX_CONNECTIONS = int(os.getenv("WATCHDOG_MAX_CONNECTIONS", "20"))
+WATCHDOG_MAX_PAGE_BYTES = int(os.getenv("WATCHDOG_MAX_PAGE_BYTES", str(2 * 1024 * 1024)))
+WATCHDOG_STATE_TTL = 30 * 24 * 3600  # Validators and last result, per URL
+WATCHDOG_USER_AGENT = "VerdyctWatchdog/1.0 (+https://verdyct.com)"
+WATCHDOG_MODEL = "gpt-4o-2024-08-06"
+
+# TODO: SPA/Rendering Awareness
+# A Single Page Application (React/Vue) rendered entirely on the client returns
+# an almost empty HTML shell: no candidates. A headless browser (Playwright)
+# would be needed for those; `fetch_page` is the place to swap it in.
+
+
+@dataclass
+class FetchedPage:
+    body: bytes
+    encoding: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        return self.body.decode(self.encoding, errors="replace")
+
+
+class CTAWatchdog:
+    def __init__(self, store: Optional[KVStore] = None, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.store = store if store is not None else KVStore("watchdog", ttl_seconds=WATCHDOG_STATE_TTL)
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+
+    # ---------- HTTP ----------
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Created lazily, inside the running loop; shared by every verification
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                transport=self._transport,
+                timeout=WATCHDOG_TIMEOUT,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=WATCHDOG_MAX_CONNECTIONS, max_keepalive_connections=WATCHDOG_MAX_CONNECTIONS),
+                headers={"User-Agent": WATCHDOG_USER_AGENT, "Accept": "text/html,application/xhtml+xml"}
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def fetch_page(self, url: str, state: Dict[str, Any]) -> Optional[FetchedPage]:
+        """
+        Conditional GET. Returns None on 304 (page not modified), otherwise the
+        page, whose body is read up to WATCHDOG_MAX_PAGE_BYTES.
+        """
+        headers = {}
+        if state.get("etag"):
+            headers["If-None-Match"] = state["etag"]
+        if state.get("last_modified"):
+            headers["If-Modified-Since"] = state["last_modified"]
+
+        async with self._get_client().stream("GET", url, headers=headers) as response:
+            if response.status_code == 304:
+                return None
+            response.raise_for_status()
+            body = bytearray()
+            async for chunk in response.aiter_bytes():
+                body.extend(chunk)
+                if len(body) >= WATCHDOG_MAX_PAGE_BYTES:
+                    metrics.incr("watchdog.pages.capped")
+                    break
+            return FetchedPage(
+                body=bytes(body[:WATCHDOG_MAX_PAGE_BYTES]),
+                encoding=response.charset_encoding or "utf-8",
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified")
+            )
+
+    # ---------- State ----------
+
+    def _load_state(self, url: str) -> Dict[str, Any]:
+        raw = self.store.get(url)
+        return json.loads(raw) if raw else {}
+
+    def _save_state(self, url: str, state: Dict[str, Any]):
+        self.store.set(url, json.dumps(state).encode("utf-8"))
+
+    # ---------- CTA ----------
+
+    @staticmethod
+    def pick_with_llm(ranked: List[CTACandidate]) -> Dict[str, Any]:
+        """Let the LLM choose among the compact candidates (blocking, run in a thread)."""
+        shortlist = ranked[:MAX_CANDIDATES]
+        listing = fit_text("watchdog", json.dumps(
+            [{"index": index, **candidate.compact()} for index, candidate in enumerate(shortlist)],
+            ensure_ascii=False
+        ))
         prompt = f"""
-        Analyze the following HTML content and identify the primary Call to Action (CTA) button.
-        The CTA is usually the most prominent button (e.g., "Sign Up", "Get Started", "Buy Now").
-        
+        Below are the clickable elements of a landing page (buttons, links, form submits),
+        in page order, with a unique CSS selector each. Identify the primary Call to Action:
+        the main conversion action (e.g., "Sign Up", "Get Started", "Buy Now"), not navigation,
+        login or cookie buttons.
+
         Return a JSON object with:
-        - "cta_text": The text content of the button.
-        - "cta_selector": A unique CSS selector to identify this element.
+        - "index": The index of the CTA element, or null if there is no clear CTA.
         - "confidence": High/Medium/Low.
-        
-        If no clear CTA is found, return null values.
-        
-        HTML Content:
-        {html_content}
+
+        Elements:
+        {listing}
         """
-        
-        completion = openai_client.chat.completions.create(
-            model="gpt-4o-2024-08-06",
+
+        # Same candidates -> same CTA: memoized for a day
+        completion = chat_completion(
+            "watchdog",
+            cacheable=True,
+            ttl_seconds=24 * 3600,
+            model=WATCHDOG_MODEL,
             messages=[
                 {"role": "system", "content": "You are an expert web scraper and QA engineer."},
                 {"role": "user", "content": prompt}
@@ -55,13 +154,79 @@ def verify_cta(project_id: str, url: str) -> Dict[str, str]:
             response_format={"type": "json_object"},
             temperature=0
         )
-        
-        result = completion.choices[0].message.content
-        import json
-        data = json.loads(result)
-        
-        return data
-        
-    except Exception as e:
-        print(f"Watchdog Error: {e}")
-        return {"error": str(e)}
+        data = json.loads(completion.choices[0].message.content)
+        index = data.get("index")
+        if not isinstance(index, int) or not 0 <= index < len(shortlist):
+            return {"cta_text": None, "cta_selector": None, "confidence": data.get("confidence") or "Low"}
+        chosen = shortlist[index]
+        return {"cta_text": chosen.text, "cta_selector": chosen.selector, "confidence": data.get("confidence") or "Medium"}
+
+    async def find_cta(self, html: str) -> Dict[str, Any]:
+        ranked = rank_candidates(extract_candidates(html))
+        if not ranked:
+            metrics.incr("watchdog.llm_skip.hits")
+            return {"cta_text": None, "cta_selector": None, "confidence": "Low", "source": "heuristic", "candidates": 0}
+
+        best = confident_pick(ranked)
+        if best is not None:
+            metrics.incr("watchdog.llm_skip.hits")
+            return {"cta_text": best.text, "cta_selector": best.selector, "confidence": "High", "source": "heuristic", "candidates": len(ranked)}
+
+        metrics.incr("watchdog.llm_skip.misses")
+        result = await asyncio.to_thread(self.pick_with_llm, ranked)
+        return {**result, "source": "llm", "candidates": len(ranked)}
+
+    async def verify(self, project_id: str, url: str) -> Dict[str, Any]:
+        """
+        CTA of the page at `url`: {cta_text, cta_selector, confidence, source,
+        candidates}, or {"error"}. `source` is "not_modified" / "unchanged"
+        when the previous result was reused, else "heuristic" or "llm".
+        """
+        print(f"Watchdog: Verifying CTA for {project_id} at {url}")
+        state = self._load_state(url)
+        try:
+            page = await self.fetch_page(url, state)
+            if page is None:
+                if state.get("result"):
+                    metrics.incr("watchdog.pages.not_modified")
+                    return {**state["result"], "source": "not_modified"}
+                # 304 without a stored result: fetch unconditionally
+                page = await self.fetch_page(url, {})
+
+            content_hash = hashlib.sha256(page.body).hexdigest()
+            if content_hash == state.get("hash") and state.get("result"):
+                metrics.incr("watchdog.pages.unchanged")
+                result = {**state["result"], "source": "unchanged"}
+            else:
+                metrics.incr("watchdog.pages.changed")
+                result = await self.find_cta(page.text)
+
+            self._save_state(url, {
+                "etag": page.etag,
+                "last_modified": page.last_modified,
+                "hash": content_hash,
+                "result": {key: value for key, value in result.items() if key != "source"}
+            })
+            return result
+
+        except Exception as e:
+            print(f"Watchdog Error: {e}")
+            metrics.incr("watchdog.errors")
+            return {"error": str(e)}
+
+
+cta_watchdog = CTAWatchdog()
+
+
+async def verify_cta(project_id: str, url: str) -> Dict[str, Any]:
+    """
+    Verifies the Call to Action (CTA) button on the given URL.
+
+    Args:
+        project_id: The ID of the project.
+        url: The URL of the MVP to check.
+
+    Returns:
+        A dictionary containing the CTA text and selector, or error details.
+    """
+    return await cta_watchdog.verify(project_id, url)
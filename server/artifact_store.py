@@ -0,0 +1,197 @@
+"""
+Content-addressed artifact store for generated files (Architect MVP code).
+
+Artifacts are keyed by the SHA-256 of their content and stored gzip
+compressed, once: regenerating an identical file costs no storage (a
+dedup hit), and the key doubles as a strong ETag. Projects only keep small
+references ({path, key, size, content_type}) in report_json; the files are
+served by routers/artifacts.py, streamed, with Range support.
+
+Backends:
+    - local (default): ARTIFACT_DIR/ab/cd/<key>.gz + <key>.json metadata,
+      written atomically
+    - s3: any S3-compatible storage (ARTIFACT_S3_BUCKET, ARTIFACT_S3_ENDPOINT),
+      needs boto3; falls back to local when it isn't installed
+"""
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import zlib
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterator, Optional
+
+import metrics
+
+ARTIFACT_BACKEND = os.getenv("ARTIFACT_BACKEND", "local")
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", "./artifacts")
+ARTIFACT_S3_BUCKET = os.getenv("ARTIFACT_S3_BUCKET")
+ARTIFACT_S3_ENDPOINT = os.getenv("ARTIFACT_S3_ENDPOINT")  # e.g. R2 / MinIO; None for AWS
+ARTIFACT_S3_PREFIX = os.getenv("ARTIFACT_S3_PREFIX", "artifacts/")
+COMPRESSION_LEVEL = 6
+CHUNK_SIZE = 64 * 1024
+
+
+@dataclass(frozen=True)
+class ArtifactInfo:
+    key: str  # sha256 of the raw content
+    size: int  # Raw bytes
+    compressed_size: int
+    content_type: str = "application/octet-stream"
+
+
+class ArtifactNotFound(KeyError):
+    pass
+
+
+# ========== BACKENDS ==========
+
+class LocalBackend:
+    def __init__(self, root: str = ARTIFACT_DIR):
+        self.root = root
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.root, key[:2], key[2:4], f"{key}{suffix}")
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key, ".json"))
+
+    def write(self, info: ArtifactInfo, blob: bytes) -> None:
+        directory = os.path.dirname(self._path(info.key, ".gz"))
+        os.makedirs(directory, exist_ok=True)
+        # Blob first, metadata last: an artifact exists once its .json does
+        for suffix, data in ((".gz", blob), (".json", json.dumps(asdict(info)).encode())):
+            fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self._path(info.key, suffix))
+
+    def info(self, key: str) -> ArtifactInfo:
+        try:
+            with open(self._path(key, ".json"), "rb") as f:
+                return ArtifactInfo(**json.loads(f.read()))
+        except FileNotFoundError:
+            raise ArtifactNotFound(key)
+
+    def stream(self, key: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """The compressed blob, chunk by chunk."""
+        try:
+            f = open(self._path(key, ".gz"), "rb")
+        except FileNotFoundError:
+            raise ArtifactNotFound(key)
+        with f:
+            while chunk := f.read(chunk_size):
+                yield chunk
+
+
+class S3Backend:
+    def __init__(self, bucket: str, endpoint_url: Optional[str] = ARTIFACT_S3_ENDPOINT, prefix: str = ARTIFACT_S3_PREFIX):
+        import boto3
+        from botocore.exceptions import ClientError
+        self._client_error = ClientError
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = boto3.client("s3", endpoint_url=endpoint_url)
+
+    def _name(self, key: str) -> str:
+        return f"{self.prefix}{key[:2]}/{key}.gz"
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.info(key)
+            return True
+        except ArtifactNotFound:
+            return False
+
+    def write(self, info: ArtifactInfo, blob: bytes) -> None:
+        self.client.put_object(
+            Bucket=self.bucket, Key=self._name(info.key), Body=blob,
+            ContentType=info.content_type, ContentEncoding="gzip",
+            Metadata={"size": str(info.size)}
+        )
+
+    def info(self, key: str) -> ArtifactInfo:
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=self._name(key))
+        except self._client_error:
+            raise ArtifactNotFound(key)
+        return ArtifactInfo(key, int(head["Metadata"].get("size", 0)), head["ContentLength"], head.get("ContentType") or "application/octet-stream")
+
+    def stream(self, key: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        try:
+            body = self.client.get_object(Bucket=self.bucket, Key=self._name(key))["Body"]
+        except self.client.exceptions.NoSuchKey:
+            raise ArtifactNotFound(key)
+        yield from body.iter_chunks(chunk_size)
+
+
+# ========== STORE ==========
+
+class ArtifactStore:
+    def __init__(self, backend=None):
+        self.backend = backend or LocalBackend()
+
+    def put(self, data: bytes, content_type: str = "application/octet-stream") -> ArtifactInfo:
+        """Store `data` (no-op if the same content is already stored) and return its info."""
+        key = hashlib.sha256(data).hexdigest()
+        if self.backend.exists(key):
+            metrics.incr("artifacts.dedup.hits")
+            return self.backend.info(key)
+        blob = gzip.compress(data, compresslevel=COMPRESSION_LEVEL, mtime=0)
+        info = ArtifactInfo(key=key, size=len(data), compressed_size=len(blob), content_type=content_type)
+        self.backend.write(info, blob)
+        metrics.incr("artifacts.dedup.misses")
+        metrics.incr("artifacts.bytes_stored", len(blob))
+        return info
+
+    def put_text(self, text: str, content_type: str = "text/plain") -> ArtifactInfo:
+        return self.put(text.encode("utf-8"), f"{content_type}; charset=utf-8")
+
+    def info(self, key: str) -> ArtifactInfo:
+        return self.backend.info(key)
+
+    def stream_compressed(self, key: str) -> Iterator[bytes]:
+        """The stored gzip bytes as is (for clients that accept gzip)."""
+        return self.backend.stream(key)
+
+    def stream(self, key: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        """
+        Raw bytes [start, end] (inclusive, like HTTP ranges), decompressed on
+        the fly chunk by chunk: memory stays flat whatever the artifact size.
+        """
+        decompressor = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+        position = 0
+        for chunk in self.backend.stream(key):
+            data = decompressor.decompress(chunk)
+            if not data:
+                continue
+            chunk_start, position = position, position + len(data)
+            if position <= start:
+                continue
+            if end is not None and chunk_start > end:
+                return
+            yield data[max(start - chunk_start, 0):(end - chunk_start + 1) if end is not None else None]
+        tail = decompressor.flush()
+        if tail and (end is None or position <= end):
+            yield tail[max(start - position, 0):(end - position + 1) if end is not None else None]
+
+    def read(self, key: str) -> bytes:
+        return b"".join(self.stream(key))
+
+
+def artifact_ref(path: str, info: ArtifactInfo) -> Dict[str, Any]:
+    """What a project keeps in report_json for one file."""
+    return {"path": path, "key": info.key, "size": info.size, "content_type": info.content_type}
+
+
+def _default_backend():
+    if ARTIFACT_BACKEND == "s3" and ARTIFACT_S3_BUCKET:
+        try:
+            return S3Backend(ARTIFACT_S3_BUCKET)
+        except ImportError:
+            print("⚠️ boto3 not installed. Artifacts will be stored locally.")
+    return LocalBackend()
+
+
+artifact_store = ArtifactStore(_default_backend())
@@ -0,0 +1,96 @@
+"""
+Micro-benchmark: original clean_text_for_json / format_tavily_context vs
+text_normalize, on synthetic payloads shaped like real Tavily responses
+(5-10 results per search, titles ~80 chars, contents ~500-3000 chars with
+newlines, tabs, nbsp and the odd control character).
+
+Run: python bench_clean_text.py [--searches 200]
+"""
+import argparse
+import random
+import re
+import time
+
+from text_normalize import clean_text, format_sources, _clean_cached
+
+WORDS = (
+    "market SaaS revenue growth CAGR billion customers churn pricing "
+    "enterprise SMB platform AI automation workflow competitors funding "
+    "Series A 2024 report analysis users retention $12.5B 18% adoption"
+).split()
+SEPARATORS = [" ", " ", " ", " ", "  ", "\n", "\n\n", "\t", "\xa0", " \r\n"]
+
+
+def legacy_clean_text_for_json(text: str) -> str:
+    if not text:
+        return ""
+    text = re.sub(r'[\x00-\x08\x0B-\x0C\x0E-\x1F\x7F]', ' ', text)
+    text = re.sub(r'\n+', ' ', text)
+    text = re.sub(r'\r+', ' ', text)
+    text = re.sub(r'\t+', ' ', text)
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+
+def legacy_format_tavily_context(results):
+    if not results:
+        return ""
+    context_parts = []
+    for idx, r in enumerate(results, 1):
+        title = r.get('title', '')
+        content = r.get('content', '')
+        url = r.get('url', '')
+        title = legacy_clean_text_for_json(title)
+        content = legacy_clean_text_for_json(content)
+        url = legacy_clean_text_for_json(url) if url else ""
+        if title or content:
+            context_parts.append(f"[SOURCE {idx}]\nTitle: {title}\nContent: {content}\nVERIFIED_URL: {url}\n---")
+    return "\n\n".join(context_parts)
+
+
+def fake_text(rng: random.Random, n_words: int) -> str:
+    parts = []
+    for _ in range(n_words):
+        parts.append(rng.choice(WORDS))
+        parts.append(rng.choice(SEPARATORS))
+        if rng.random() < 0.002:
+            parts.append("\x0b")
+    return "".join(parts)
+
+
+def make_searches(n_searches: int, seed: int = 7):
+    rng = random.Random(seed)
+    # Searches overlap: the same pages come back for related queries
+    pages = [
+        {
+            "title": fake_text(rng, 12),
+            "content": fake_text(rng, rng.randint(80, 500)),
+            "url": f"https://example{i}.com/article/{rng.randint(1, 10**6)}\n",
+        }
+        for i in range(n_searches * 3)
+    ]
+    return [rng.sample(pages, rng.randint(5, 10)) for _ in range(n_searches)]
+
+
+def bench(label: str, fn, searches) -> float:
+    start = time.perf_counter()
+    for results in searches:
+        fn(results)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed * 1000:8.1f} ms  ({elapsed / len(searches) * 1e6:7.0f} µs/search)")
+    return elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--searches", type=int, default=200)
+    args = parser.parse_args()
+
+    searches = make_searches(args.searches)
+    assert all(legacy_format_tavily_context(r) == format_sources(r) for r in searches), "Output mismatch"
+
+    legacy = bench("legacy (5 x re.sub)", legacy_format_tavily_context, searches)
+    _clean_cached.cache_clear()
+    cold = bench("text_normalize (cold cache)", format_sources, searches)
+    warm = bench("text_normalize (warm cache)", format_sources, searches)
+    print(f"Speedup: {legacy / cold:.1f}x cold, {legacy / warm:.1f}x warm")
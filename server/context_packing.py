@@ -0,0 +1,199 @@
+"""
+Token-budgeted context packing for agent prompts.
+
+Instead of cutting contexts at an arbitrary character count, each agent gets
+a token budget (CONTEXT_BUDGETS) and the research sources are packed into it:
+    1. every source block is embedded (MiniLM, cached by content hash)
+    2. near-identical snippets (same page returned by several searches,
+       syndicated articles) are dropped
+    3. sources are ranked by similarity to the idea and added until the
+       budget is full, each section keeping at least its best source
+       (trimmed to its share of the budget when it is larger on its own)
+Packed blocks keep their original order and format, so prompts don't change
+shape, they just get shorter.
+
+Tokens are counted with tiktoken (o200k_base, the GPT-4o encoding). If the
+encoding can't be loaded (tiktoken missing, no network for the first
+download) we fall back to ~4 characters per token.
+
+Before/after token counts are recorded per agent in `metrics`
+(context.tokens_in.<agent> / context.tokens_out.<agent>).
+"""
+import os
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import metrics
+from sources import SourceRegistry
+
+TOKEN_ENCODING = os.getenv("TOKEN_ENCODING", "o200k_base")
+CHARS_PER_TOKEN = 4
+DUPLICATE_SIMILARITY = 0.95
+MIN_BLOCK_TOKENS = 32  # A section's best source is never trimmed below this
+
+# Prompt context budgets, in tokens
+CONTEXT_BUDGETS: Dict[str, int] = {
+    "analyst_research": 6000,   # raw Tavily results -> synthesis (gpt-4o-mini)
+    "analyst_steps": 2500,      # synthesized context, sent to each of the 3 analyst steps
+    "spy_competitors": 600,     # competitor-name extraction
+    "spy": 7000,                # landscape + pain + features + pricing
+    "financier": 3500,          # pricing + cost benchmarks
+    "watchdog": 8000,           # page HTML for CTA detection
+}
+
+
+# ========== TOKENIZER ==========
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(TOKEN_ENCODING)
+    except Exception as e:
+        print(f"⚠️ tiktoken encoding unavailable ({e}). Estimating tokens from length.")
+        return None
+
+
+@lru_cache(maxsize=16384)
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    encoding = _encoding()
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """`text` cut to at most `max_tokens` tokens (unchanged if it already fits)."""
+    if not text or count_tokens(text) <= max_tokens:
+        return text
+    encoding = _encoding()
+    if encoding is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+
+
+def budget_for(agent: str) -> int:
+    return int(os.getenv(f"CONTEXT_BUDGET_{agent.upper()}", CONTEXT_BUDGETS[agent]))
+
+
+def fit_text(agent: str, text: str) -> str:
+    """Plain-text version of pack_*: truncate to the agent's budget, with metrics."""
+    budget = budget_for(agent)
+    packed = truncate_to_tokens(text, budget)
+    _record(agent, count_tokens(text), count_tokens(packed))
+    return packed
+
+
+def _record(agent: str, tokens_in: int, tokens_out: int):
+    metrics.incr(f"context.tokens_in.{agent}", tokens_in)
+    metrics.incr(f"context.tokens_out.{agent}", tokens_out)
+
+
+# ========== RANKING ==========
+
+def _embed(texts: List[str]) -> np.ndarray:
+    from embeddings import embedding_service, hashing_encode
+
+    vectors = embedding_service.encode(texts)
+    if vectors is None:
+        vectors = hashing_encode(texts)
+    return np.asarray(vectors, dtype=np.float32).reshape(len(texts), -1)
+
+
+def _rank(idea: str, bodies: List[str]) -> Tuple[np.ndarray, List[bool]]:
+    """(relevance score per body, is-near-duplicate-of-an-earlier-body flags)."""
+    vectors = _embed([idea] + bodies)
+    query, docs = vectors[0], vectors[1:]
+    scores = docs @ query
+
+    duplicate = [False] * len(bodies)
+    similarities = docs @ docs.T
+    # Keep the most relevant copy of each near-duplicate group
+    for i in np.argsort(-scores):
+        if duplicate[i]:
+            continue
+        for j in np.nonzero(similarities[i] >= DUPLICATE_SIMILARITY)[0]:
+            if j != i:
+                duplicate[j] = True
+    return scores, duplicate
+
+
+# ========== PACKING ==========
+
+def pack_sections(idea: str, sections: Dict[str, Optional[SourceRegistry]], agent: str, budget: Optional[int] = None) -> Dict[str, SourceRegistry]:
+    """
+    Pack several contexts (e.g. spy landscape/pain/features/pricing) into one
+    shared token budget. Returns a new registry per section, with the chosen
+    sources renumbered in their original order and group headers kept.
+    """
+    budget = budget if budget is not None else budget_for(agent)
+    candidates = []  # (section, registry, source, body)
+    tokens_in = 0
+    for name, registry in sections.items():
+        if not registry:
+            continue
+        tokens_in += count_tokens(registry.text)
+        for source in registry.sources:
+            candidates.append((name, registry, source, registry.body(source)))
+
+    if not candidates:
+        _record(agent, tokens_in, 0)
+        return {name: SourceRegistry() for name in sections}
+
+    scores, duplicate = _rank(idea, [c[3] for c in candidates])
+    costs = [count_tokens(c[3]) + count_tokens(c[2].url) + 8 for c in candidates]  # + block framing
+
+    chosen = set()
+    bodies = {}  # Trimmed bodies, for best sources larger than their share
+    used = 0
+    order = [i for i in np.argsort(-scores) if not duplicate[i]]
+    # Each non-empty section keeps its best source, trimmed to an even share
+    # of what's left if needed (smallest first, so unused share carries over)
+    best_per_section = {}
+    for i in order:
+        best_per_section.setdefault(candidates[i][0], i)
+    best = sorted(best_per_section.values(), key=lambda i: costs[i])
+    for rank, i in enumerate(best):
+        share = (budget - used) // (len(best) - rank)
+        if costs[i] > share:
+            framing = costs[i] - count_tokens(candidates[i][3])
+            # Re-add the body's line break: VERIFIED_URL must stay on its own line
+            body = candidates[i][3].rstrip("\n")
+            bodies[i] = truncate_to_tokens(body, max(share - framing - 1, MIN_BLOCK_TOKENS)).rstrip("\n") + "\n"
+            costs[i] = count_tokens(bodies[i]) + framing
+        chosen.add(i)
+        used += costs[i]
+    # Then best-first overall, whole sources only
+    for i in order:
+        if i in chosen or used + costs[i] > budget:
+            continue
+        chosen.add(i)
+        used += costs[i]
+
+    packed = {name: SourceRegistry() for name in sections}
+    counters = {name: 0 for name in sections}
+    last_group = {name: "" for name in sections}
+    for i in sorted(chosen):
+        name, _, source, body = candidates[i]
+        body = bodies.get(i, body)
+        registry = packed[name]
+        if source.group and source.group != last_group[name]:
+            registry.add_text(("\n\n" if registry else "") + source.group + "\n")
+            last_group[name] = source.group
+            counters[name] = 0
+        elif registry:
+            registry.add_text("\n\n")
+        counters[name] += 1
+        registry.add_block(counters[name], body, source.url, source.title)
+
+    _record(agent, tokens_in, sum(count_tokens(r.text) for r in packed.values()))
+    return packed
+
+
+def pack_context(idea: str, registry: Optional[SourceRegistry], agent: str, budget: Optional[int] = None) -> SourceRegistry:
+    """Single-context version of pack_sections."""
+    return pack_sections(idea, {"context": registry}, agent, budget)["context"]
@@ -0,0 +1,255 @@
+"""
+Local CTA candidate extraction and scoring (Watchdog).
+
+The Watchdog used to send up to 8k tokens of raw page HTML to GPT-4o to find
+the primary call to action. Almost all of it is irrelevant: the answer is
+one of the page's buttons or links. `extract_candidates` finds them in one
+streaming pass of the standard library HTML parser (no DOM is built):
+buttons, links, submit inputs and role="button" elements, with their text,
+href, form / nav / footer context and a CSS selector that is unique in the
+page. `score_candidate` ranks them with simple heuristics (action words in
+English and French, btn/cta classes, position, forms vs navigation), and
+`confident_pick` says when the best one is clear enough to skip the LLM.
+"""
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+
+MAX_CANDIDATES = 15  # Sent to the LLM when the heuristic isn't confident
+MAX_TEXT_CHARS = 80
+CONFIDENT_SCORE = 6.0
+CONFIDENT_MARGIN = 2.0
+
+_SKIP_CONTENT = {"script", "style", "noscript", "template", "svg"}
+_VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+_SUBMIT_TYPES = {"submit", "button"}
+
+_ACTION_RE = re.compile(
+    r"\b(sign ?up|get started|start|try|buy|subscribe|join|book|request|get (?:access|early access|a demo|the)|"
+    r"demo|register|order|download|free trial|pre-?order|waitlist|"
+    r"commencer|essayer|s'inscrire|inscri|acheter|rejoindre|réserver|demander|télécharger|découvrir|démarrer)",
+    re.IGNORECASE
+)
+_WEAK_RE = re.compile(
+    r"\b(log ?in|sign ?in|se connecter|connexion|learn more|read more|en savoir plus|cookie|accept|accepter|"
+    r"close|fermer|menu|privacy|terms|contact|back|retour)\b",
+    re.IGNORECASE
+)
+_CTA_CLASS_RE = re.compile(r"(^|[-_])(btn|button|cta|primary|hero|signup|get-started)([-_]|$)", re.IGNORECASE)
+_SIMPLE_NAME_RE = re.compile(r"^[A-Za-z_][\w-]*$")
+
+
+@dataclass
+class CTACandidate:
+    tag: str
+    text: str
+    selector: str
+    position: int  # Order of appearance among candidates
+    href: Optional[str] = None
+    element_id: Optional[str] = None
+    classes: Tuple[str, ...] = ()
+    in_form: bool = False
+    in_nav: bool = False  # nav, header menu or footer
+    score: float = 0.0
+
+    def compact(self) -> Dict:
+        """What the LLM sees of a candidate."""
+        data = {"text": self.text, "selector": self.selector, "tag": self.tag}
+        if self.href:
+            data["href"] = self.href[:100]
+        if self.in_form:
+            data["in_form"] = True
+        if self.in_nav:
+            data["in_nav"] = True
+        return data
+
+
+@dataclass
+class _Element:
+    tag: str
+    element_id: Optional[str]
+    classes: Tuple[str, ...]
+    nth_of_type: int
+    child_types: Counter = field(default_factory=Counter)
+    candidate: Optional[CTACandidate] = None
+    text: List[str] = field(default_factory=list)
+
+
+def _selector_part(element: _Element) -> str:
+    if element.element_id and _SIMPLE_NAME_RE.match(element.element_id):
+        return f"#{element.element_id}"
+    return f"{element.tag}:nth-of-type({element.nth_of_type})"
+
+
+class _CandidateParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack: List[_Element] = [_Element("#root", None, (), 1)]
+        self.candidates: List[CTACandidate] = []
+        self.open_candidates: List[_Element] = []
+        self.ids: Counter = Counter()
+        self.signatures: Counter = Counter()  # (tag, classes) -> count
+        self.skip_depth = 0
+
+    def _context(self, *tags: str) -> bool:
+        return any(element.tag in tags for element in self.stack)
+
+    def handle_starttag(self, tag: str, attrs):
+        if self.skip_depth:
+            if tag in _SKIP_CONTENT:
+                self.skip_depth += 1
+            return
+        if tag in _SKIP_CONTENT:
+            self.skip_depth = 1
+            return
+
+        attributes = {name: value or "" for name, value in attrs}
+        element_id = attributes.get("id") or None
+        classes = tuple(sorted(name for name in attributes.get("class", "").split() if _SIMPLE_NAME_RE.match(name)))
+        parent = self.stack[-1]
+        parent.child_types[tag] += 1
+        element = _Element(tag, element_id, classes, parent.child_types[tag])
+        if element_id:
+            self.ids[element_id] += 1
+        self.signatures[(tag, classes)] += 1
+
+        input_type = attributes.get("type", "").lower()
+        is_candidate = (
+            tag == "button"
+            or (tag == "a" and attributes.get("href") is not None)
+            or (tag == "input" and input_type in _SUBMIT_TYPES)
+            or attributes.get("role") == "button"
+        )
+        if is_candidate and not self.open_candidates:
+            path = [_selector_part(e) for e in self.stack[1:]] + [_selector_part(element)]
+            candidate = CTACandidate(
+                tag=tag,
+                text=(attributes.get("value") or attributes.get("aria-label") or "").strip() if tag == "input" else "",
+                selector=" > ".join(path),  # Refined once the whole page is known
+                position=len(self.candidates),
+                href=attributes.get("href"),
+                element_id=element_id,
+                classes=classes,
+                in_form=self._context("form"),
+                in_nav=self._context("nav", "footer")
+            )
+            if tag != "input" and attributes.get("aria-label"):
+                candidate.text = attributes["aria-label"].strip()
+            element.candidate = candidate
+            self.candidates.append(candidate)
+            if tag != "input":
+                self.open_candidates.append(element)
+
+        if tag not in _VOID_TAGS:
+            self.stack.append(element)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in _VOID_TAGS and self.stack[-1].tag == tag:
+            self._close(self.stack.pop())
+
+    def handle_endtag(self, tag: str):
+        if self.skip_depth:
+            if tag in _SKIP_CONTENT:
+                self.skip_depth -= 1
+            return
+        # Close up to the matching open tag (tolerates unclosed children)
+        for index in range(len(self.stack) - 1, 0, -1):
+            if self.stack[index].tag == tag:
+                for element in reversed(self.stack[index:]):
+                    self._close(element)
+                del self.stack[index:]
+                return
+
+    def _close(self, element: _Element):
+        if element in self.open_candidates:
+            self.open_candidates.remove(element)
+            text = " ".join(" ".join(element.text).split())
+            if text:
+                element.candidate.text = text[:MAX_TEXT_CHARS]
+
+    def handle_data(self, data: str):
+        if self.skip_depth or not self.open_candidates:
+            return
+        for element in self.open_candidates:
+            element.text.append(data)
+
+
+def _unique_selector(candidate: CTACandidate, parser: _CandidateParser) -> str:
+    """Shortest selector that only matches this element: #id, tag.classes, a[href], else the nth-of-type path."""
+    if candidate.element_id and parser.ids[candidate.element_id] == 1 and _SIMPLE_NAME_RE.match(candidate.element_id):
+        return f"#{candidate.element_id}"
+    if candidate.classes:
+        # tag.a.b also matches every element whose classes include a and b
+        wanted = set(candidate.classes)
+        matching = sum(count for (tag, classes), count in parser.signatures.items() if tag == candidate.tag and wanted.issubset(classes))
+        if matching == 1:
+            return ".".join((candidate.tag,) + candidate.classes)
+    if candidate.tag == "a" and candidate.href and '"' not in candidate.href:
+        same_href = sum(1 for other in parser.candidates if other.tag == "a" and other.href == candidate.href)
+        if same_href == 1:
+            return f'a[href="{candidate.href}"]'
+    # Path from the closest ancestor with an id (selector_part stops there)
+    parts = candidate.selector.split(" > ")
+    for index in range(len(parts) - 2, -1, -1):
+        if parts[index].startswith("#"):
+            return " > ".join(parts[index:])
+    return " > ".join(parts)
+
+
+def extract_candidates(html: str) -> List[CTACandidate]:
+    """Every clickable CTA-like element of the page, in document order, with a unique selector."""
+    parser = _CandidateParser()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception as e:
+        # html.parser is lenient; keep whatever was found before the error
+        print(f"⚠️ CTA extraction stopped early: {e}")
+    for candidate in parser.candidates:
+        candidate.selector = _unique_selector(candidate, parser)
+    return [candidate for candidate in parser.candidates if candidate.text or candidate.element_id or candidate.classes]
+
+
+def score_candidate(candidate: CTACandidate, total: int) -> float:
+    score = 0.0
+    if _ACTION_RE.search(candidate.text):
+        score += 4.0
+    if _WEAK_RE.search(candidate.text):
+        score -= 3.0
+    if any(_CTA_CLASS_RE.search(name) for name in candidate.classes) or (candidate.element_id and _CTA_CLASS_RE.search(candidate.element_id)):
+        score += 2.0
+    if candidate.tag == "button" or candidate.tag == "input":
+        score += 1.0
+    if candidate.in_form:
+        score += 1.0
+    if candidate.in_nav:
+        score -= 2.0
+    if candidate.href and candidate.href.startswith(("mailto:", "tel:", "javascript:")):
+        score -= 1.0
+    if candidate.href == "#" and candidate.tag == "a":
+        score -= 0.5
+    if not candidate.text:
+        score -= 2.0
+    elif len(candidate.text) > 40:
+        score -= 1.0
+    # Above the fold: the first candidates of the page
+    score += 1.5 * max(0.0, 1 - candidate.position / max(total, 1) * 3)
+    return round(score, 2)
+
+
+def rank_candidates(candidates: List[CTACandidate]) -> List[CTACandidate]:
+    for candidate in candidates:
+        candidate.score = score_candidate(candidate, len(candidates))
+    return sorted(candidates, key=lambda candidate: (-candidate.score, candidate.position))
+
+
+def confident_pick(ranked: List[CTACandidate]) -> Optional[CTACandidate]:
+    """The best candidate if the heuristic is sure enough to skip the LLM."""
+    if not ranked or ranked[0].score < CONFIDENT_SCORE:
+        return None
+    if len(ranked) > 1 and ranked[0].score - ranked[1].score < CONFIDENT_MARGIN:
+        return None
+    return ranked[0]
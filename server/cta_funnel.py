@@ -0,0 +1,125 @@
+"""
+CTA funnel: joins pixel clicks with the CTA verified by the Watchdog.
+
+The pixel sends the clicked element's id, class list, text (first 50 chars)
+and tag; the Watchdog stores a CSS selector and the CTA text. Matching raw
+events against them at query time would mean string-matching every event of
+a project on each stats call. Instead each event is matched once, at ingest:
+    - `compile_matcher` turns (selector, text) into a `CTAMatcher` made of
+      precomputed fields (id, class set, tag, normalized text), cached
+      (a new selector simply compiles a new matcher)
+    - `record_funnel_event` increments the project's daily counters
+      (`CTAFunnelDaily`: clicks, cta_clicks) with one upsert, in the same
+      transaction as the event itself
+The stats endpoint (routers/funnel.py) only reads those counters.
+
+Only the last compound of the selector can be checked against an event:
+`#id` and `tag.class` selectors match on id / classes; positional or
+attribute selectors (`:nth-of-type`, `a[href=...]`) fall back to the CTA text.
+"""
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import FrozenSet, Optional
+
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import metrics
+from models import CTAFunnelDaily, PixelEvent, Project
+
+MATCHER_CACHE_SIZE = 4096
+PIXEL_TEXT_CHARS = 50  # The pixel truncates element_text (static/verdyct-pixel.js)
+
+_COMPOUND_RE = re.compile(
+    r"^(?P<tag>[a-zA-Z][\w-]*)?(?P<id>#[A-Za-z_][\w-]*)?(?P<classes>(?:\.[A-Za-z_][\w-]*)*)(?P<rest>.*)$"
+)
+_COMBINATOR_RE = re.compile(r"\s*[>+~]\s*|\s+")
+
+
+def normalize_text(text: Optional[str]) -> str:
+    return " ".join((text or "").split()).casefold()
+
+
+@dataclass(frozen=True)
+class CTAMatcher:
+    kind: str  # "id" | "class" | "text"
+    element_id: Optional[str] = None
+    classes: FrozenSet[str] = frozenset()
+    tag: Optional[str] = None  # Lowercase
+    text: str = ""  # Normalized CTA text
+
+    def _text_matches(self, element_text: Optional[str]) -> bool:
+        clicked = normalize_text(element_text)
+        if not clicked or not self.text:
+            return False
+        if clicked == self.text:
+            return True
+        # Truncated by the pixel: compare the prefix it kept
+        return len(element_text or "") >= PIXEL_TEXT_CHARS and self.text.startswith(clicked)
+
+    def matches(self, element_id: Optional[str], element_class: Optional[str], element_text: Optional[str], tag_name: Optional[str]) -> bool:
+        if self.tag and tag_name and tag_name.lower() != self.tag:
+            return False
+        if self.kind == "id":
+            return element_id == self.element_id
+        if self.kind == "class":
+            return self.classes.issubset((element_class or "").split())
+        return self._text_matches(element_text)
+
+
+@lru_cache(maxsize=MATCHER_CACHE_SIZE)
+def compile_matcher(cta_selector: Optional[str], cta_text: Optional[str]) -> Optional[CTAMatcher]:
+    """Matcher for a verified CTA, None when there's nothing to match on."""
+    text = normalize_text(cta_text)
+    selector = (cta_selector or "").strip()
+    if selector and "," not in selector:
+        last = _COMBINATOR_RE.split(selector)[-1]
+        match = _COMPOUND_RE.match(last)
+        if match:
+            tag = (match.group("tag") or "").lower() or None
+            if match.group("id"):
+                return CTAMatcher("id", element_id=match.group("id")[1:], tag=tag)
+            classes = frozenset(name for name in match.group("classes").split(".") if name)
+            # Pseudo-classes / attributes on top of the classes can't be observed: the classes alone decide
+            if classes:
+                return CTAMatcher("class", classes=classes, tag=tag)
+            if text:
+                return CTAMatcher("text", tag=tag, text=text)
+    return CTAMatcher("text", text=text) if text else None
+
+
+def is_cta_click(project: Project, event: PixelEvent) -> bool:
+    matcher = compile_matcher(project.cta_selector, project.cta_text)
+    return matcher is not None and matcher.matches(event.element_id, event.element_class, event.element_text, event.tag_name)
+
+
+async def record_funnel_event(session: AsyncSession, project: Project, event: PixelEvent, now: Optional[datetime] = None) -> bool:
+    """
+    Count the event in the project's daily funnel (one upsert, not
+    committed: the caller commits it with the event). Returns True for a
+    click on the verified CTA.
+    """
+    cta_click = is_cta_click(project, event)
+    values = {
+        "project_id": project.id,
+        "day": (now or datetime.utcnow()).strftime("%Y-%m-%d"),
+        "clicks": 1,
+        "cta_clicks": int(cta_click),
+    }
+    insert = postgresql_insert if session.bind.dialect.name == "postgresql" else sqlite_insert
+    statement = insert(CTAFunnelDaily).values(**values)
+    statement = statement.on_conflict_do_update(
+        index_elements=["project_id", "day"],
+        set_={
+            "clicks": CTAFunnelDaily.clicks + statement.excluded.clicks,
+            "cta_clicks": CTAFunnelDaily.cta_clicks + statement.excluded.cta_clicks,
+        }
+    )
+    await session.exec(statement)
+    metrics.incr("funnel.clicks")
+    if cta_click:
+        metrics.incr("funnel.cta_clicks")
+    return cta_click
@@ -0,0 +1,318 @@
+"""
+Scheduled fleet-wide CTA verification (Watchdog sweeps).
+
+Without it a project's CTA is only checked when someone calls
+/api/verify-cta. `CTASweeper` re-verifies every project with a live URL in
+the background, every CTA_SWEEP_INTERVAL_SECONDS:
+    - only projects not verified for CTA_SWEEP_STALE_SECONDS are due; they
+      are ordered by staleness weighted by recent pixel activity (a busy
+      project with an old check first, an idle one verified yesterday last),
+      at most CTA_SWEEP_MAX_PROJECTS per run. The staleness filter and a
+      first cut (the DUE_CANDIDATE_FACTOR x max stalest) run in SQL; activity
+      comes from the CTAFunnelDaily counters of those candidates only, not
+      from a scan of pixelevent
+    - CTA_SWEEP_CONCURRENCY verifications at once, and per host at most
+      CTA_SWEEP_PER_HOST in flight, started CTA_SWEEP_HOST_DELAY_SECONDS
+      apart (many MVPs share a hosting domain)
+    - results are written back CTA_SWEEP_WRITE_BATCH projects per UPDATE
+      round trip, not one transaction per project
+    - failed checks leave the project untouched: it stays due and comes
+      back first at the next run
+Each run ends with a `SweepSummary` (throughput, sources, failures), kept as
+`last_summary` and served by /api/metrics.
+"""
+import asyncio
+import math
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from sqlalchemy import bindparam, or_, update
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import metrics
+from database import engine
+from models import CTAFunnelDaily, Project
+
+CTA_SWEEP_INTERVAL_SECONDS = float(os.getenv("CTA_SWEEP_INTERVAL_SECONDS", str(6 * 3600)))  # 0 disables sweeps
+CTA_SWEEP_STALE_SECONDS = float(os.getenv("CTA_SWEEP_STALE_SECONDS", str(CTA_SWEEP_INTERVAL_SECONDS or 6 * 3600)))
+CTA_SWEEP_MAX_PROJECTS = int(os.getenv("CTA_SWEEP_MAX_PROJECTS", "500"))
+CTA_SWEEP_CONCURRENCY = int(os.getenv("CTA_SWEEP_CONCURRENCY", "10"))
+CTA_SWEEP_PER_HOST = int(os.getenv("CTA_SWEEP_PER_HOST", "2"))
+CTA_SWEEP_HOST_DELAY_SECONDS = float(os.getenv("CTA_SWEEP_HOST_DELAY_SECONDS", "1.0"))
+CTA_SWEEP_WRITE_BATCH = int(os.getenv("CTA_SWEEP_WRITE_BATCH", "50"))
+CTA_SWEEP_STARTUP_DELAY_SECONDS = 60.0
+ACTIVITY_WINDOW = timedelta(days=7)
+DUE_CANDIDATE_FACTOR = 4  # Stalest candidates loaded per project checked, before weighting by activity
+NEVER_VERIFIED_STALENESS = 10.0  # In stale periods: never verified ranks like a very old check
+MAX_REPORTED_FAILURES = 20
+
+VerifyFn = Callable[[str, str], Awaitable[Dict[str, Any]]]
+
+
+@dataclass
+class SweepTarget:
+    project_id: str
+    url: str
+    last_verified: Optional[str]
+    events: int = 0  # Pixel events in ACTIVITY_WINDOW (daily funnel counters)
+    priority: float = 0.0
+
+
+@dataclass
+class SweepSummary:
+    started_at: str
+    due: int = 0  # Projects due for a check (before the per-run cap)
+    checked: int = 0
+    updated: int = 0  # Rows written back
+    failed: int = 0
+    sources: Dict[str, int] = field(default_factory=dict)  # heuristic / llm / not_modified / unchanged
+    duration_seconds: float = 0.0
+    projects_per_second: float = 0.0
+    failures: List[Dict[str, str]] = field(default_factory=list)  # First MAX_REPORTED_FAILURES
+
+
+def _parse_verified(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def sweep_priority(events: int, last_verified: Optional[str], now: datetime, stale_seconds: float = CTA_SWEEP_STALE_SECONDS) -> float:
+    """Staleness (in stale periods) scaled by log activity: both an old check and pixel traffic push a project up."""
+    verified_at = _parse_verified(last_verified)
+    staleness = NEVER_VERIFIED_STALENESS if verified_at is None else (now - verified_at).total_seconds() / stale_seconds
+    return round(staleness * (1 + math.log1p(events)), 4)
+
+
+def host_of(url: str) -> str:
+    return (urlsplit(url).hostname or url).lower()
+
+
+class _HostGate:
+    """Per-host politeness: a concurrency cap and a minimum delay between request starts."""
+
+    def __init__(self, per_host: int, delay_seconds: float):
+        self.per_host = per_host
+        self.delay_seconds = delay_seconds
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._next_start: Dict[str, float] = {}
+
+    async def acquire(self, host: str):
+        semaphore = self._semaphores.setdefault(host, asyncio.Semaphore(self.per_host))
+        await semaphore.acquire()
+        now = time.monotonic()
+        start = max(now, self._next_start.get(host, 0.0))
+        self._next_start[host] = start + self.delay_seconds
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    def release(self, host: str):
+        self._semaphores[host].release()
+
+
+class CTASweeper:
+    def __init__(
+        self,
+        verify: Optional[VerifyFn] = None,
+        session_maker=None,
+        interval_seconds: float = CTA_SWEEP_INTERVAL_SECONDS,
+        stale_seconds: float = CTA_SWEEP_STALE_SECONDS,
+        max_projects: int = CTA_SWEEP_MAX_PROJECTS,
+        concurrency: int = CTA_SWEEP_CONCURRENCY,
+        per_host: int = CTA_SWEEP_PER_HOST,
+        host_delay_seconds: float = CTA_SWEEP_HOST_DELAY_SECONDS,
+        write_batch: int = CTA_SWEEP_WRITE_BATCH
+    ):
+        self._verify = verify
+        self._session_maker = session_maker or sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        self.interval_seconds = interval_seconds
+        self.stale_seconds = stale_seconds
+        self.max_projects = max_projects
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.host_delay_seconds = host_delay_seconds
+        self.write_batch = write_batch
+        self._task: Optional[asyncio.Task] = None
+        self.last_summary: Optional[SweepSummary] = None
+
+    # ---------- Lifecycle ----------
+
+    def start(self) -> None:
+        """Start the sweep loop on the running event loop (no-op when sweeps are disabled)."""
+        if self.interval_seconds <= 0 or (self._task and not self._task.done()):
+            return
+        self._task = asyncio.create_task(self._run(), name="cta-sweeper")
+
+    async def stop(self) -> None:
+        if not self._task:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        # Let the app finish starting before the first sweep
+        await asyncio.sleep(CTA_SWEEP_STARTUP_DELAY_SECONDS)
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ CTA sweep failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    # ---------- Planning ----------
+
+    def _due_filter(self, now: datetime):
+        # last_verified is an isoformat() string: compared as text, like the index orders it
+        cutoff = (now - timedelta(seconds=self.stale_seconds)).isoformat()
+        return (
+            Project.url != None,
+            Project.url != "",
+            or_(Project.last_verified == None, Project.last_verified <= cutoff),
+        )
+
+    async def count_due(self, now: Optional[datetime] = None) -> int:
+        async with self._session_maker() as session:
+            return (await session.exec(
+                select(func.count(Project.id)).where(*self._due_filter(now or datetime.utcnow()))
+            )).one()
+
+    async def due_targets(self, now: Optional[datetime] = None, limit: Optional[int] = None) -> List[SweepTarget]:
+        """
+        Projects with a URL whose last check is older than `stale_seconds`,
+        highest priority first: the `limit * DUE_CANDIDATE_FACTOR` stalest
+        (never verified first), re-ranked by activity and cut to `limit`.
+        """
+        now = now or datetime.utcnow()
+        limit = limit or self.max_projects
+        async with self._session_maker() as session:
+            rows = (await session.exec(
+                select(Project.id, Project.url, Project.last_verified)
+                .where(*self._due_filter(now))
+                .order_by(Project.last_verified.asc().nulls_first())
+                .limit(limit * DUE_CANDIDATE_FACTOR)
+            )).all()
+            targets = [SweepTarget(project_id, url, last_verified) for project_id, url, last_verified in rows]
+            if not targets:
+                return []
+            # Daily counters of the candidates only, over the (project_id, day) primary key
+            activity = dict((await session.exec(
+                select(CTAFunnelDaily.project_id, func.sum(CTAFunnelDaily.clicks))
+                .where(
+                    CTAFunnelDaily.project_id.in_([target.project_id for target in targets]),
+                    CTAFunnelDaily.day >= (now - ACTIVITY_WINDOW).strftime("%Y-%m-%d")
+                )
+                .group_by(CTAFunnelDaily.project_id)
+            )).all())
+
+        for target in targets:
+            target.events = int(activity.get(target.project_id) or 0)
+            target.priority = sweep_priority(target.events, target.last_verified, now, self.stale_seconds)
+        targets.sort(key=lambda target: target.priority, reverse=True)
+        return targets[:limit]
+
+    # ---------- Running ----------
+
+    async def _write(self, results: List[Dict[str, Any]]) -> int:
+        """One executemany UPDATE for a batch of verified projects."""
+        if not results:
+            return 0
+        table = Project.__table__
+        statement = (
+            update(table)
+            .where(table.c.id == bindparam("b_id"))
+            .values(cta_text=bindparam("b_text"), cta_selector=bindparam("b_selector"), last_verified=bindparam("b_verified"))
+        )
+        async with self._session_maker() as session:
+            await session.exec(statement, params=results)
+            await session.commit()
+        metrics.incr("cta_sweep.writes")
+        return len(results)
+
+    async def run_once(self) -> SweepSummary:
+        """One sweep over the due projects; returns (and keeps) its summary."""
+        verify = self._verify
+        if verify is None:
+            from agents.watchdog import verify_cta
+            verify = verify_cta
+
+        start = time.perf_counter()
+        summary = SweepSummary(started_at=datetime.utcnow().isoformat())
+        summary.due = await self.count_due()
+        targets = await self.due_targets(limit=self.max_projects)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        hosts = _HostGate(self.per_host, self.host_delay_seconds)
+        pending: List[Dict[str, Any]] = []
+        writes: List[asyncio.Task] = []
+
+        async def check(target: SweepTarget):
+            host = host_of(target.url)
+            # Host first: waiting on a busy host must not hold a global slot
+            await hosts.acquire(host)
+            try:
+                async with semaphore:
+                    result = await verify(target.project_id, target.url)
+            except Exception as e:
+                result = {"error": str(e)}
+            finally:
+                hosts.release(host)
+
+            summary.checked += 1
+            if "error" in result:
+                summary.failed += 1
+                metrics.incr("cta_sweep.failures")
+                if len(summary.failures) < MAX_REPORTED_FAILURES:
+                    summary.failures.append({"project_id": target.project_id, "url": target.url, "error": str(result["error"])[:200]})
+                return
+            source = result.get("source", "unknown")
+            summary.sources[source] = summary.sources.get(source, 0) + 1
+            pending.append({
+                "b_id": target.project_id,
+                "b_text": result.get("cta_text"),
+                "b_selector": result.get("cta_selector"),
+                "b_verified": datetime.utcnow().isoformat()
+            })
+            if len(pending) >= self.write_batch:
+                batch = pending[:]
+                pending.clear()
+                writes.append(asyncio.create_task(self._write(batch)))
+
+        await asyncio.gather(*(check(target) for target in targets))
+        writes.append(asyncio.create_task(self._write(pending)))
+        for written in await asyncio.gather(*writes, return_exceptions=True):
+            if isinstance(written, Exception):
+                print(f"⚠️ CTA sweep write failed: {written}")
+            else:
+                summary.updated += written
+
+        summary.duration_seconds = round(time.perf_counter() - start, 3)
+        summary.projects_per_second = round(summary.checked / summary.duration_seconds, 2) if summary.duration_seconds else 0.0
+        metrics.incr("cta_sweep.runs")
+        metrics.incr("cta_sweep.checked", summary.checked)
+        self.last_summary = summary
+        print(
+            f"🔎 CTA sweep: {summary.checked}/{summary.due} checked, {summary.updated} updated, "
+            f"{summary.failed} failed in {summary.duration_seconds}s ({summary.projects_per_second}/s)"
+        )
+        return summary
+
+    def summary_dict(self) -> Optional[Dict[str, Any]]:
+        return asdict(self.last_summary) if self.last_summary else None
+
+
+cta_sweeper = CTASweeper()
@@ -1,9 +1,15 @@
 import os
+import re
+import threading
+import uuid
 from typing import AsyncGenerator, List, Dict, Any, Optional
 from sqlmodel import SQLModel
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.orm import sessionmaker
+from migrations import run_migrations
+from embeddings import embedding_service, hashing_encode, EMBEDDING_DIM, EMBEDDING_BATCH_SIZE, HASHING_MODEL_NAME
+from local_index import LocalVectorIndex
 
 # ========== CONFIGURATION ==========
 
@@ -28,6 +34,11 @@ QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
 QDRANT_PATH = "./qdrant_db" if not QDRANT_URL else None
 COLLECTION_NAME = "verdyct_ideas"
 
+# "qdrant" (default): Qdrant, with the in-process index mirroring every write
+# so search keeps working if Qdrant goes away. "local": in-process index only.
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "qdrant").lower()
+LOCAL_VECTOR_INDEX = VECTOR_BACKEND == "local" or os.getenv("LOCAL_VECTOR_INDEX", "1") != "0"
+
 # ========== RELATIONAL DB (ASYNC) ==========
 
 # Config for Supabase/Postgres via asyncpg
@@ -48,9 +59,10 @@ async def init_db():
     """
     Initialize the database: create SQL tables and Vector collection.
     """
-    # Create SQL Tables
+    # Create SQL Tables, then bring existing ones up to date
     async with engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
+        await conn.run_sync(run_migrations)
     
     # Initialize Vector DB
     try:
@@ -73,22 +85,20 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
 # ========== VECTOR DB (QDRANT) ==========
 
 _qdrant_client = None
-_embedding_model = None
 _vector_db_available = False
 
 try:
     from qdrant_client import QdrantClient
     from qdrant_client.http import models
-    from sentence_transformers import SentenceTransformer
     _vector_db_available = True
 except ImportError:
-    print("⚠️ Qdrant or SentenceTransformers not installed. Vector features will be disabled.")
+    print("⚠️ Qdrant not installed. Vector features will be disabled.")
 except Exception as e:
     print(f"⚠️ Vector DB import error: {e}. Vector features will be disabled.")
 
 def get_qdrant_client():
     global _qdrant_client
-    if not _vector_db_available:
+    if not _vector_db_available or VECTOR_BACKEND == "local":
         return None
         
     if _qdrant_client is None:
@@ -107,24 +117,17 @@ def get_qdrant_client():
     return _qdrant_client
 
 def get_embedding_model():
-    global _embedding_model, _vector_db_available
-    if not _vector_db_available:
-        return None
-        
-    if _embedding_model is None:
-        try:
-            # Load model (this might take a moment on first run)
-            _embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-        except Exception as e:
-            print(f"Failed to load embedding model (Network/DNS error?): {e}")
-            _vector_db_available = False # Disable vector DB if model fails to load
-            return None
-    return _embedding_model
+    """
+    The SentenceTransformer model, or None if it can't be loaded.
+    Normally already warm (see embeddings.embedding_service.start_warmup).
+    """
+    return embedding_service.get_model()
 
 def init_vector_db():
-    if not _vector_db_available:
-        return
-        
+    if LOCAL_VECTOR_INDEX:
+        count = len(get_local_index())
+        print(f"✅ Local vector index ready ({count} vectors).")
+
     client = get_qdrant_client()
     if not client:
         return
@@ -137,7 +140,7 @@ def init_vector_db():
             client.create_collection(
                 collection_name=COLLECTION_NAME,
                 vectors_config=models.VectorParams(
-                    size=384,  # Dimension for all-MiniLM-L6-v2
+                    size=EMBEDDING_DIM,
                     distance=models.Distance.COSINE
                 )
             )
@@ -146,100 +149,327 @@ def init_vector_db():
         print(f"Failed to initialize vector DB: {e}")
         raise
 
+    _ensure_payload_indexes(client)
+
+    if LOCAL_VECTOR_INDEX:
+        threading.Thread(target=sync_local_index, name="local-index-sync", daemon=True).start()
+
+# Payload fields used in search filters (see search_similar)
+PAYLOAD_INDEXES = {
+    "status": "keyword",
+    "is_public": "bool",
+    "user_id": "keyword",
+}
+
+def _ensure_payload_indexes(client):
+    """
+    Index the filtered payload fields so filtered HNSW search doesn't fall
+    back to scanning payloads. Idempotent; the local (embedded) client has no
+    payload indexes and just ignores this.
+    """
+    for field_name, schema in PAYLOAD_INDEXES.items():
+        try:
+            client.create_payload_index(
+                collection_name=COLLECTION_NAME,
+                field_name=field_name,
+                field_schema=models.PayloadSchemaType(schema)
+            )
+        except Exception as e:
+            print(f"⚠️ Payload index {field_name} not created: {e}")
+
+# Namespace for deterministic point ids (uuid5) of non-UUID project ids
+_POINT_ID_NAMESPACE = uuid.UUID("6f1c2f4e-3b8a-4c57-9d1e-7a52c0b8e9d4")
+
+def vector_point_id(vector_id: str) -> str:
+    """
+    Qdrant point id for a project. UUIDs are used as-is; anything else maps to
+    a stable uuid5, so re-indexing the same project always hits the same point.
+    """
+    try:
+        return str(uuid.UUID(str(vector_id)))
+    except ValueError:
+        return str(uuid.uuid5(_POINT_ID_NAMESPACE, str(vector_id)))
+
+def vector_store_ready() -> bool:
+    """
+    True when writes can go through right now: the model has finished loading
+    (or failed, then the hashing fallback is used) and there is somewhere to
+    write to.
+    """
+    model_settled = embedding_service.is_ready or not embedding_service.is_available
+    return model_settled and (LOCAL_VECTOR_INDEX or get_qdrant_client() is not None)
+
+# ---------- Local (in-process) index ----------
+
+_local_indexes: Dict[str, LocalVectorIndex] = {}
+_local_indexes_lock = threading.Lock()
+
+def get_local_index(model_name: Optional[str] = None) -> LocalVectorIndex:
+    """The in-process index holding vectors of `model_name` (default: the embedding model)."""
+    model_name = model_name or embedding_service.model_name
+    namespace = f"{COLLECTION_NAME}_" + re.sub(r"[^A-Za-z0-9_.-]", "_", model_name)
+    with _local_indexes_lock:
+        if namespace not in _local_indexes:
+            _local_indexes[namespace] = LocalVectorIndex(namespace, EMBEDDING_DIM)
+        return _local_indexes[namespace]
+
+def _embed(texts: List[str], batch_size: int = EMBEDDING_BATCH_SIZE):
+    """(model_name, vectors): the real model, or the hashing fallback if it can't load."""
+    vectors = embedding_service.encode(texts, batch_size=batch_size)
+    if vectors is not None:
+        return embedding_service.model_name, vectors
+    return HASHING_MODEL_NAME, hashing_encode(texts, EMBEDDING_DIM)
+
+def sync_local_index(batch_size: int = 256):
+    """
+    Bring the local index in line with the Qdrant collection when their
+    sizes differ (first start, or writes made while the index was disabled
+    or owned by another process). Points are upserted in place and only
+    then are local ids missing from Qdrant deleted: searches running during
+    the sync never see an empty index.
+    """
+    client = get_qdrant_client()
+    if not client or not LOCAL_VECTOR_INDEX:
+        return
+    try:
+        index = get_local_index()
+        remote_count = client.count(collection_name=COLLECTION_NAME, exact=True).count
+        if remote_count == len(index):
+            return
+
+        print(f"🔹 Syncing local vector index from Qdrant ({len(index)} -> {remote_count})...")
+        seen = set()
+        offset = None
+        while True:
+            points, offset = client.scroll(
+                collection_name=COLLECTION_NAME,
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True
+            )
+            if points:
+                ids = [(p.payload or {}).get("project_id", str(p.id)) for p in points]
+                index.upsert(ids, [p.vector for p in points], [p.payload or {} for p in points])
+                seen.update(ids)
+            if offset is None:
+                break
+        index.delete([point_id for point_id in index.ids() if point_id not in seen])
+        print(f"✅ Local vector index synced ({len(index)} vectors).")
+    except Exception as e:
+        print(f"⚠️ Local vector index sync failed: {e}")
+
 def upsert_vector(text: str, metadata: Dict[str, Any], vector_id: str):
     """
     Store or update an idea embedding in Qdrant.
     """
-    if not _vector_db_available:
-        print(f"⚠️ Vector upsert skipped (Qdrant unavailable): {metadata.get('project_id')}")
-        return
+    upsert_vectors([{"text": text, "metadata": metadata, "vector_id": vector_id}], wait=True)
+
+def upsert_vectors(items: List[Dict[str, Any]], batch_size: int = EMBEDDING_BATCH_SIZE, wait: bool = False, raise_errors: bool = False) -> int:
+    """
+    Bulk version of upsert_vector. Each item is {"text", "metadata", "vector_id"}.
+    All texts are embedded in a single model.encode call (batched by
+    `batch_size`), then upserted in chunks of `batch_size` points.
+    With wait=False Qdrant acknowledges once the write is queued, not indexed.
+    The local index (if enabled) gets the same points first.
+    Returns the number of points sent. Failures are logged and return 0,
+    unless raise_errors is set (used by the outbox indexer to retry).
+    """
+    if not items:
+        return 0
 
     client = get_qdrant_client()
-    model = get_embedding_model()
-    
-    if not client or not model:
-        print(f"⚠️ Vector upsert skipped (Client/Model unavailable): {metadata.get('project_id')}")
-        return
+    if not client and not LOCAL_VECTOR_INDEX:
+        print(f"⚠️ Vector upsert skipped (Qdrant unavailable): {len(items)} item(s)")
+        return 0
     
     try:
-        # Generate embedding
-        embedding = model.encode(text).tolist()
-        
-        # Upsert
-        client.upsert(
-            collection_name=COLLECTION_NAME,
-            points=[
+        # Generate embeddings
+        model_name, embeddings = _embed([item["text"] for item in items], batch_size=batch_size)
+
+        if LOCAL_VECTOR_INDEX:
+            get_local_index(model_name).upsert(
+                [item["vector_id"] for item in items],
+                embeddings,
+                [item["metadata"] for item in items]
+            )
+
+        if VECTOR_BACKEND != "local":
+            # Local index is up to date; fail so the outbox retries the Qdrant write
+            if not client:
+                raise RuntimeError("Qdrant unavailable (written to the local index only)")
+            if model_name == HASHING_MODEL_NAME:
+                raise RuntimeError("Embedding model unavailable (written to the local index only)")
+
+            points = [
                 models.PointStruct(
-                    id=vector_id, # Qdrant supports UUID strings
-                    vector=embedding,
-                    payload=metadata
+                    id=vector_point_id(item["vector_id"]),
+                    vector=vector.tolist(),
+                    payload=item["metadata"]
                 )
+                for item, vector in zip(items, embeddings)
             ]
-        )
-        print(f"✅ Vector upserted for project: {metadata.get('project_id')}")
+            for i in range(0, len(points), batch_size):
+                client.upsert(
+                    collection_name=COLLECTION_NAME,
+                    points=points[i:i + batch_size],
+                    wait=wait
+                )
+
+        if len(items) == 1:
+            print(f"✅ Vector upserted for project: {items[0]['metadata'].get('project_id')}")
+        else:
+            print(f"✅ {len(items)} vectors upserted.")
+        return len(items)
     except Exception as e:
         print(f"⚠️ Vector upsert failed: {e}")
+        if raise_errors:
+            raise
+        return 0
 
-def search_similar(text: str, n_results: int = 5) -> List[Dict]:
+def _search_filter(status: Optional[str] = None, viewer_id: Optional[str] = None, exclude_id: Optional[str] = None):
     """
-    Search for similar ideas in the vector store.
+    Qdrant filter for similarity search:
+    - status: only ideas with this status ("approved", "rejected")
+    - viewer_id: only ideas this user may see (public ones and their own)
+    - exclude_id: drop this project (the one we search around)
     """
-    if not _vector_db_available:
-        return []
+    must = []
+    if status:
+        must.append(models.FieldCondition(key="status", match=models.MatchValue(value=status)))
+    if viewer_id:
+        must.append(models.Filter(should=[
+            models.FieldCondition(key="is_public", match=models.MatchValue(value=True)),
+            models.FieldCondition(key="user_id", match=models.MatchValue(value=viewer_id)),
+        ]))
+    must_not = [models.HasIdCondition(has_id=[vector_point_id(exclude_id)])] if exclude_id else []
+    if not must and not must_not:
+        return None
+    return models.Filter(must=must or None, must_not=must_not or None)
 
+def _payload_predicate(status: Optional[str] = None, viewer_id: Optional[str] = None, exclude_id: Optional[str] = None):
+    """Same filter as _search_filter, for the local index."""
+    if not (status or viewer_id or exclude_id):
+        return None
+
+    def predicate(point_id: str, payload: Dict[str, Any]) -> bool:
+        if exclude_id and point_id == exclude_id:
+            return False
+        if status and payload.get("status") != status:
+            return False
+        if viewer_id and not (payload.get("is_public") is True or payload.get("user_id") == viewer_id):
+            return False
+        return True
+
+    return predicate
+
+def search_similar(
+    text: str,
+    n_results: int = 5,
+    status: Optional[str] = None,
+    viewer_id: Optional[str] = None,
+    exclude_id: Optional[str] = None
+) -> List[Dict]:
+    """
+    Search for similar ideas in the vector store (optionally filtered, see _search_filter).
+    """
     client = get_qdrant_client()
-    model = get_embedding_model()
-    
-    if not client or not model:
+    if not client and not LOCAL_VECTOR_INDEX:
         return []
         
     try:
         # Generate query embedding
-        query_vector = model.encode(text).tolist()
-        
+        model_name, query_vectors = _embed([text])
+        query_vector = query_vectors[0]
+    except Exception as e:
+        print(f"⚠️ Vector search failed: {e}")
+        return []
+
+    if client and model_name != HASHING_MODEL_NAME:
+        try:
+            return _search_qdrant(client, query_vector.tolist(), n_results, _search_filter(status, viewer_id, exclude_id))
+        except Exception as e:
+            print(f"⚠️ Vector search failed: {e}")
+            if not LOCAL_VECTOR_INDEX:
+                return []
+            print("🔹 Falling back to the local vector index.")
+
+    try:
+        hits = get_local_index(model_name).search(
+            query_vector, n_results, payload_filter=_payload_predicate(status, viewer_id, exclude_id)
+        )
+        return [
+            {"id": hit["id"], "document": hit["payload"].get("text", ""), "metadata": hit["payload"], "score": hit["score"]}
+            for hit in hits
+        ]
+    except Exception as e:
+        print(f"⚠️ Local vector search failed: {e}")
+        return []
+
+def _search_qdrant(client, query_vector: List[float], n_results: int, query_filter) -> List[Dict]:
+    if hasattr(client, "query_points"):
+        results = client.query_points(
+            collection_name=COLLECTION_NAME,
+            query=query_vector,
+            query_filter=query_filter,
+            limit=n_results,
+            with_payload=True
+        ).points
+    else:  # qdrant-client < 1.10
         results = client.search(
             collection_name=COLLECTION_NAME,
             query_vector=query_vector,
+            query_filter=query_filter,
             limit=n_results
         )
-        
-        # Format results
-        formatted_results = []
-        for hit in results:
-            formatted_results.append({
-                "id": hit.id,
-                "document": hit.payload.get("text", "") if hit.payload else "", # Note: we didn't store text explicitly in payload in previous code, might want to add it? 
-                # Actually, in the previous code we passed 'text' as document. 
-                # Qdrant stores payload. We should ensure 'text' is in metadata if we want it back.
-                # But for now, let's just return metadata.
-                "metadata": hit.payload,
-                "score": hit.score
-            })
-                
-        return formatted_results
-    except Exception as e:
-        print(f"⚠️ Vector search failed: {e}")
-        return []
+    
+    # Format results
+    formatted_results = []
+    for hit in results:
+        payload = hit.payload or {}
+        formatted_results.append({
+            "id": payload.get("project_id", hit.id),
+            "document": payload.get("text", ""),
+            "metadata": payload,
+            "score": hit.score
+        })
+    return formatted_results
 
 def delete_vector(vector_id: str):
     """
     Delete a vector by ID from Qdrant.
     """
-    if not _vector_db_available:
-        return
+    delete_vectors([vector_id])
+
+def delete_vectors(vector_ids: List[str], raise_errors: bool = False) -> int:
+    """
+    Delete vectors by ID from Qdrant (and the local index). Returns the number of ids sent.
+    """
+    if not vector_ids:
+        return 0
 
     client = get_qdrant_client()
-    if not client:
-        return
+    if not client and not LOCAL_VECTOR_INDEX:
+        return 0
         
     try:
-        from qdrant_client.http import models
-        client.delete(
-            collection_name=COLLECTION_NAME,
-            points_selector=models.PointIdsList(
-                points=[vector_id]
+        if LOCAL_VECTOR_INDEX:
+            # Fallback vectors may sit in the hashing index as well
+            for model_name in (embedding_service.model_name, HASHING_MODEL_NAME):
+                get_local_index(model_name).delete(vector_ids)
+        if VECTOR_BACKEND != "local":
+            if not client:
+                raise RuntimeError("Qdrant unavailable (deleted from the local index only)")
+            client.delete(
+                collection_name=COLLECTION_NAME,
+                points_selector=models.PointIdsList(
+                    points=[vector_point_id(v) for v in vector_ids]
+                )
             )
-        )
-        print(f"✅ Vector deleted for project: {vector_id}")
+        print(f"✅ Vector deleted for project(s): {', '.join(vector_ids)}")
+        return len(vector_ids)
     except Exception as e:
         print(f"⚠️ Vector delete failed: {e}")
+        if raise_errors:
+            raise
+        return 0
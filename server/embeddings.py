@@ -0,0 +1,221 @@
+"""
+Embedding service (all-MiniLM-L6-v2).
+
+`sentence_transformers` (and torch behind it) is only imported when the model
+is actually loaded, so importing this module is free. `start_warmup()` loads
+the model on a background thread at startup: the API is ready to serve
+immediately and the first report doesn't pay for the model load.
+
+Backends (EMBEDDING_BACKEND):
+    - "torch" (default): plain SentenceTransformer
+    - "onnx": ONNX Runtime on CPU
+    - "onnx-int8": ONNX Runtime with the quantized int8 weights
+ONNX needs `optimum[onnxruntime]`; if it is missing we fall back to torch.
+
+Vectors are cached on disk by content hash (see kv_store.KVStore), so the same
+text is never embedded twice: reindexing, re-submitted ideas and repeated
+similarity searches only encode what's new. Set EMBEDDING_CACHE=0 to disable.
+
+`hashing_encode` is a dependency-free fallback (hashed word/bigram counts)
+for when the model can't be loaded at all. Its vectors live in their own
+space: they are only ever stored in the local index, never in Qdrant.
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+from typing import List, Optional, Union
+
+import numpy as np
+
+import metrics
+from kv_store import KVStore
+
+MODEL_NAME = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+EMBEDDING_DIM = 384  # Dimension for all-MiniLM-L6-v2
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+ONNX_INT8_FILE = os.getenv("EMBEDDING_ONNX_FILE", "onnx/model_qint8_avx512.onnx")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE", "1") != "0"
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "200000"))
+HASHING_MODEL_NAME = "hashing"
+_TOKEN_RE = re.compile(r"\w+")
+
+
+class EmbeddingService:
+    def __init__(self, model_name: str = MODEL_NAME, backend: str = EMBEDDING_BACKEND):
+        self.model_name = model_name
+        self.backend = backend
+        self._model = None
+        self._lock = threading.Lock()
+        self._loaded = threading.Event()
+        self._state = "idle"  # idle, loading, ready, unavailable
+        self._error: Optional[str] = None
+        self._load_seconds: Optional[float] = None
+        self._cache: Optional[KVStore] = None
+        if EMBEDDING_CACHE_ENABLED:
+            # One cache per model: vectors from different models aren't comparable
+            namespace = "embeddings_" + re.sub(r"[^A-Za-z0-9_.-]", "_", model_name)
+            self._cache = KVStore(namespace, max_entries=EMBEDDING_CACHE_SIZE)
+
+    # ---------- Lifecycle ----------
+
+    def start_warmup(self) -> None:
+        """Load the model on a daemon thread. Never blocks the caller."""
+        if self._state != "idle":
+            return
+        self._state = "loading"
+        threading.Thread(target=self.load, name="embedding-warmup", daemon=True).start()
+
+    def load(self):
+        """Load the model (idempotent, thread-safe). Returns None if unavailable."""
+        if self._loaded.is_set():
+            return self._model
+
+        with self._lock:
+            if self._loaded.is_set():
+                return self._model
+
+            self._state = "loading"
+            start = time.time()
+            try:
+                self._model = self._build_model()
+                # First encode compiles kernels / allocates buffers
+                self._model.encode(["warmup"], show_progress_bar=False)
+                self._load_seconds = time.time() - start
+                self._state = "ready"
+                print(f"✅ Embedding model ready ({self.model_name}, {self.backend}) in {self._load_seconds:.1f}s")
+            except Exception as e:
+                self._model = None
+                self._error = str(e)
+                self._state = "unavailable"
+                print(f"⚠️ Embedding model unavailable (Network/DNS error?): {e}")
+            finally:
+                self._loaded.set()
+
+        return self._model
+
+    def _build_model(self):
+        from sentence_transformers import SentenceTransformer
+
+        if self.backend in ("onnx", "onnx-int8"):
+            try:
+                kwargs = {"file_name": ONNX_INT8_FILE} if self.backend == "onnx-int8" else {}
+                return SentenceTransformer(self.model_name, backend="onnx", model_kwargs=kwargs)
+            except Exception as e:
+                print(f"⚠️ ONNX backend failed ({e}). Falling back to torch.")
+                self.backend = "torch"
+
+        return SentenceTransformer(self.model_name, device="cpu")
+
+    # ---------- State ----------
+
+    @property
+    def is_ready(self) -> bool:
+        return self._state == "ready"
+
+    @property
+    def is_available(self) -> bool:
+        return self._state != "unavailable"
+
+    def status(self) -> dict:
+        return {
+            "model": self.model_name,
+            "backend": self.backend,
+            "state": self._state,
+            "ready": self.is_ready,
+            "load_seconds": round(self._load_seconds, 2) if self._load_seconds else None,
+            "error": self._error,
+            "cache": {
+                "enabled": self._cache is not None,
+                "hits": metrics.get("embeddings.cache.hits"),
+                "misses": metrics.get("embeddings.cache.misses"),
+                "hit_rate": metrics.hit_rate("embeddings.cache"),
+            },
+        }
+
+    # ---------- Inference ----------
+
+    def get_model(self):
+        """The loaded model, loading it now if warm-up hasn't finished."""
+        return self._model if self._loaded.is_set() else self.load()
+
+    def _cache_key(self, text: str) -> str:
+        # Backend is part of the key: int8 vectors differ slightly from fp32 ones
+        return f"{self.backend}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+    def encode(self, texts: Union[str, List[str]], batch_size: int = EMBEDDING_BATCH_SIZE):
+        """
+        Encode one text (-> 1D array) or a list of texts (-> 2D array, one
+        forward pass per `batch_size` texts). Cached texts are not re-encoded.
+        Vectors are L2-normalized float32. Returns None if the model is unavailable.
+        """
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+
+        keys = [self._cache_key(t) for t in batch] if self._cache is not None else []
+        cached = {}
+        if self._cache is not None:
+            try:
+                cached = self._cache.get_many(keys)
+            except Exception as e:
+                print(f"⚠️ Embedding cache read failed: {e}")
+        missing = [i for i in range(len(batch)) if self._cache is None or keys[i] not in cached]
+        if self._cache is not None:
+            metrics.incr("embeddings.cache.hits", len(batch) - len(missing))
+            metrics.incr("embeddings.cache.misses", len(missing))
+
+        encoded = None
+        if missing:
+            model = self.get_model()
+            if model is None:
+                return None
+            encoded = model.encode(
+                [batch[i] for i in missing],
+                batch_size=batch_size,
+                normalize_embeddings=True,
+                convert_to_numpy=True,
+                show_progress_bar=False
+            ).astype("float32", copy=False)
+            if self._cache is not None:
+                try:
+                    self._cache.set_many({keys[i]: vector.tobytes() for i, vector in zip(missing, encoded)})
+                except Exception as e:
+                    print(f"⚠️ Embedding cache write failed: {e}")
+
+        if encoded is not None and len(missing) == len(batch):
+            vectors = encoded
+        else:
+            dim = encoded.shape[1] if encoded is not None else (len(next(iter(cached.values()))) // 4 if cached else EMBEDDING_DIM)
+            vectors = np.empty((len(batch), dim), dtype=np.float32)
+            for i, key in enumerate(keys):
+                if key in cached:
+                    vectors[i] = np.frombuffer(cached[key], dtype=np.float32)
+            if encoded is not None:
+                vectors[missing] = encoded
+
+        return vectors[0] if single else vectors
+
+
+def hashing_encode(texts: Union[str, List[str]], dim: int = EMBEDDING_DIM):
+    """
+    Feature-hashing embedding: lowercase words and bigrams hashed into `dim`
+    signed buckets, L2-normalized float32. Lexical only, but deterministic and
+    always available.
+    """
+    single = isinstance(texts, str)
+    batch = [texts] if single else list(texts)
+    vectors = np.zeros((len(batch), dim), dtype=np.float32)
+    for row, text in enumerate(batch):
+        tokens = _TOKEN_RE.findall(text.lower())
+        for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % dim
+            vectors[row, bucket] += 1.0 if digest[4] & 1 else -1.0
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors /= np.where(norms == 0, 1, norms)
+    return vectors[0] if single else vectors
+
+
+embedding_service = EmbeddingService()
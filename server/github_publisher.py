@@ -0,0 +1,278 @@
+"""
+Background GitHub publisher for the generated MVP code.
+
+The Architect used to create the repo and PUT every file through the
+contents API, one blocking `requests` call (and TLS handshake) per file,
+inside the report request. Now it only enqueues a `PublishJob`; workers
+publish it off the request path with one pooled `httpx.AsyncClient`:
+    1. create the repo (auto_init, so it has a branch to build on); an
+       existing repo is reused
+    2. read the branch head and its tree
+    3. skip everything if the tree already holds exactly these files: git
+       blob SHAs are computed locally, so re-publishing is a no-op
+    4. otherwise create the blobs concurrently, then ONE tree, ONE commit
+       and a fast-forward of the branch (Git Data API)
+Transient errors (network, 429, 5xx) are retried with backoff; a lost race
+on the branch (non fast-forward) restarts from step 2.
+
+GITHUB_API_URL points the publisher at a stub server (see
+test_github_publisher.py), and `transport` plugs an in-process one.
+"""
+import asyncio
+import base64
+import hashlib
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+import metrics
+from utils import GITHUB_TOKEN, GITHUB_USERNAME
+
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+GITHUB_BRANCH = "main"
+PUBLISH_WORKERS = int(os.getenv("GITHUB_PUBLISH_WORKERS", "2"))
+PUBLISH_MAX_ATTEMPTS = 4
+PUBLISH_BACKOFF_SECONDS = 1.0
+PUBLISH_MAX_CONNECTIONS = 10
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class PublishError(Exception):
+    pass
+
+
+@dataclass
+class PublishJob:
+    repo: str
+    files: Dict[str, str]  # path -> text content
+    description: str = ""
+    message: str = "Add generated MVP"
+
+
+@dataclass
+class PublishResult:
+    repo: str
+    state: str  # "queued" | "published" | "unchanged" | "failed"
+    html_url: Optional[str] = None
+    commit_sha: Optional[str] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    files: List[str] = field(default_factory=list)
+
+
+def git_blob_sha(content: bytes) -> str:
+    """The SHA git (and GitHub) gives a blob, so unchanged files are detected without uploading them."""
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+class GitHubPublisher:
+    def __init__(
+        self,
+        token: Optional[str] = GITHUB_TOKEN,
+        owner: str = GITHUB_USERNAME,
+        base_url: str = GITHUB_API_URL,
+        workers: int = PUBLISH_WORKERS,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        backoff_seconds: float = PUBLISH_BACKOFF_SECONDS
+    ):
+        self.token = token
+        self.owner = owner
+        self.base_url = base_url
+        self.workers = workers
+        self.transport = transport
+        self.backoff_seconds = backoff_seconds
+        self.results: Dict[str, PublishResult] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.token)
+
+    # ---------- Lifecycle ----------
+
+    def start(self) -> None:
+        """Start the workers on the running event loop (no-op without a token)."""
+        if not self.enabled or self._tasks:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers={
+                "Authorization": f"token {self.token}",
+                "Accept": "application/vnd.github+json",
+                "X-GitHub-Api-Version": "2022-11-28",
+            },
+            timeout=httpx.Timeout(15.0, connect=5.0),
+            limits=httpx.Limits(max_connections=PUBLISH_MAX_CONNECTIONS, max_keepalive_connections=PUBLISH_MAX_CONNECTIONS),
+            transport=self.transport
+        )
+        self._tasks = [asyncio.create_task(self._worker(), name=f"github-publisher-{i}") for i in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        if self._client:
+            await self._client.aclose()
+            self._client = None
+
+    async def join(self) -> None:
+        """Wait until every queued job has been handled (tests, shutdown)."""
+        if self._queue:
+            await self._queue.join()
+
+    # ---------- Producer ----------
+
+    def enqueue(self, job: PublishJob) -> bool:
+        """
+        Queue a job; callable from the event loop or from a worker thread
+        (the agents run in threads). False when the publisher isn't running.
+        """
+        if not self._tasks or not self._loop or self._loop.is_closed():
+            return False
+        self.results[job.repo] = PublishResult(repo=job.repo, state="queued", files=sorted(job.files))
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._queue.put_nowait(job)
+        else:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, job)
+        metrics.incr("github.publish.queued")
+        return True
+
+    def repo_url(self, repo: str) -> str:
+        return f"https://github.com/{self.owner}/{repo}"
+
+    def is_live(self, repo: str) -> bool:
+        """True once a publish of `repo` has completed: the repo exists with its files ("queued" doesn't count)."""
+        result = self.results.get(repo)
+        return result is not None and result.state in ("published", "unchanged")
+
+    # ---------- Workers ----------
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                result = await self.publish(job)
+                metrics.incr(f"github.publish.{result.state}")
+                if result.state == "failed":
+                    print(f"⚠️ GitHub publish failed for {job.repo}: {result.error}")
+                else:
+                    print(f"✅ GitHub repo {result.state}: {result.html_url}")
+            except Exception as e:
+                print(f"⚠️ GitHub publisher error: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _request(self, method: str, path: str, expected: tuple = (200, 201), **kwargs) -> httpx.Response:
+        """One API call, retried on network errors, 429 and 5xx."""
+        for attempt in range(1, PUBLISH_MAX_ATTEMPTS + 1):
+            try:
+                response = await self._client.request(method, path, **kwargs)
+            except httpx.TransportError as e:
+                if attempt == PUBLISH_MAX_ATTEMPTS:
+                    raise PublishError(f"{method} {path}: {e}")
+            else:
+                if response.status_code not in RETRYABLE_STATUSES:
+                    if response.status_code not in expected:
+                        raise PublishError(f"{method} {path}: {response.status_code} {response.text[:200]}")
+                    return response
+                if attempt == PUBLISH_MAX_ATTEMPTS:
+                    raise PublishError(f"{method} {path}: {response.status_code} after {attempt} attempts")
+                retry_after = response.headers.get("Retry-After")
+                if retry_after and retry_after.isdigit():
+                    await asyncio.sleep(min(float(retry_after), 60.0))
+                    continue
+            await asyncio.sleep(self.backoff_seconds * 2 ** (attempt - 1))
+        raise PublishError(f"{method} {path}: retries exhausted")
+
+    async def _ensure_repo(self, job: PublishJob) -> Dict[str, Any]:
+        response = await self._request(
+            "POST", "/user/repos", expected=(201, 422),
+            json={"name": job.repo, "description": job.description[:350], "private": False, "auto_init": True}
+        )
+        if response.status_code == 201:
+            return response.json()
+        # 422: the repo already exists (earlier attempt or re-publish)
+        return (await self._request("GET", f"/repos/{self.owner}/{job.repo}")).json()
+
+    async def _head(self, full_name: str, branch: str) -> Optional[str]:
+        """Branch head SHA; None while a freshly auto-initialized repo has no ref yet."""
+        response = await self._request("GET", f"/repos/{full_name}/git/ref/heads/{branch}", expected=(200, 404, 409))
+        if response.status_code != 200:
+            return None
+        return response.json()["object"]["sha"]
+
+    async def publish(self, job: PublishJob) -> PublishResult:
+        """Publish one job now (what the workers run)."""
+        result = self.results.get(job.repo) or PublishResult(repo=job.repo, state="queued", files=sorted(job.files))
+        self.results[job.repo] = result
+        files = {path: str(content).encode("utf-8") for path, content in job.files.items() if content}
+        try:
+            repo = await self._ensure_repo(job)
+            full_name = repo.get("full_name") or f"{self.owner}/{job.repo}"
+            branch = repo.get("default_branch") or GITHUB_BRANCH
+            result.html_url = repo.get("html_url") or self.repo_url(job.repo)
+
+            for attempt in range(1, PUBLISH_MAX_ATTEMPTS + 1):
+                result.attempts = attempt
+                head = await self._head(full_name, branch)
+                if head is None:
+                    await asyncio.sleep(self.backoff_seconds * attempt)
+                    continue
+
+                commit = (await self._request("GET", f"/repos/{full_name}/git/commits/{head}")).json()
+                base_tree = commit["tree"]["sha"]
+                existing = (await self._request("GET", f"/repos/{full_name}/git/trees/{base_tree}")).json()
+                current = {item["path"]: item["sha"] for item in existing.get("tree", []) if item.get("type") == "blob"}
+                if all(current.get(path) == git_blob_sha(content) for path, content in files.items()):
+                    result.state, result.commit_sha = "unchanged", head
+                    return result
+
+                blobs = await asyncio.gather(*[
+                    self._request(
+                        "POST", f"/repos/{full_name}/git/blobs",
+                        json={"content": base64.b64encode(content).decode("ascii"), "encoding": "base64"}
+                    )
+                    for content in files.values()
+                ])
+                tree = (await self._request("POST", f"/repos/{full_name}/git/trees", json={
+                    "base_tree": base_tree,
+                    "tree": [
+                        {"path": path, "mode": "100644", "type": "blob", "sha": blob.json()["sha"]}
+                        for path, blob in zip(files, blobs)
+                    ],
+                })).json()
+                new_commit = (await self._request("POST", f"/repos/{full_name}/git/commits", json={
+                    "message": job.message, "tree": tree["sha"], "parents": [head],
+                })).json()
+                update = await self._request(
+                    "PATCH", f"/repos/{full_name}/git/refs/heads/{branch}", expected=(200, 422),
+                    json={"sha": new_commit["sha"], "force": False}
+                )
+                if update.status_code == 200:
+                    result.state, result.commit_sha = "published", new_commit["sha"]
+                    return result
+                # 422: the branch moved under us, rebuild on the new head
+
+            raise PublishError(f"could not update {branch} after {PUBLISH_MAX_ATTEMPTS} attempts")
+        except Exception as e:
+            result.state, result.error = "failed", str(e)
+            return result
+
+
+github_publisher = GitHubPublisher()
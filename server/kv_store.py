@@ -0,0 +1,119 @@
+"""
+Small persistent key/value store on SQLite (one file per namespace).
+
+Values are raw bytes, so callers decide the encoding (float32 buffers,
+JSON, ...). Entries can expire (`ttl_seconds`) and the store is bounded
+(`max_entries`): once over the limit, least recently used entries are evicted.
+Safe to share between threads; every process opens its own connection.
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+CACHE_DIR = os.getenv("CACHE_DIR", "./cache")
+
+
+class KVStore:
+    def __init__(self, namespace: str, max_entries: int = 100_000, ttl_seconds: Optional[float] = None, path: Optional[str] = None):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.path = path or os.path.join(CACHE_DIR, f"{namespace}.sqlite3")
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writes_since_trim = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS kv ("
+                "key TEXT PRIMARY KEY, "
+                "value BLOB NOT NULL, "
+                "expires_at REAL, "
+                "accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_kv_accessed_at ON kv (accessed_at)")
+            self._conn = conn
+        return self._conn
+
+    # ---------- Reads ----------
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, bytes]:
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        now = time.time()
+        found: Dict[str, bytes] = {}
+        with self._lock:
+            conn = self._connect()
+            # SQLite caps bound parameters per statement
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT key, value, expires_at FROM kv WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, value, expires_at in rows:
+                    if expires_at is None or expires_at > now:
+                        found[key] = value
+            if found:
+                conn.executemany("UPDATE kv SET accessed_at = ? WHERE key = ?", [(now, k) for k in found])
+        return found
+
+    # ---------- Writes ----------
+
+    def set(self, key: str, value: bytes, ttl_seconds: Optional[float] = None):
+        self.set_many({key: value}, ttl_seconds=ttl_seconds)
+
+    def set_many(self, items: Dict[str, bytes], ttl_seconds: Optional[float] = None):
+        if not items:
+            return
+        now = time.time()
+        ttl = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+        expires_at = now + ttl if ttl else None
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO kv (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                [(k, sqlite3.Binary(v), expires_at, now) for k, v in items.items()]
+            )
+            self._writes_since_trim += len(items)
+            # Trimming costs a COUNT(*): only do it every so often
+            if self._writes_since_trim >= max(self.max_entries // 100, 1):
+                self._trim(conn)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._connect().execute("DELETE FROM kv WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock:
+            self._connect().execute("DELETE FROM kv")
+
+    def _trim(self, conn: sqlite3.Connection):
+        self._writes_since_trim = 0
+        conn.execute("DELETE FROM kv WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+        count = conn.execute("SELECT COUNT(*) FROM kv").fetchone()[0]
+        if count > self.max_entries:
+            conn.execute(
+                "DELETE FROM kv WHERE key IN (SELECT key FROM kv ORDER BY accessed_at LIMIT ?)",
+                (count - self.max_entries,)
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM kv").fetchone()[0]
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._connect().execute("SELECT key FROM kv")]
@@ -0,0 +1,107 @@
+"""
+Memoizing wrapper for OpenAI chat calls that can be cached.
+
+`chat_completion` / `chat_parse` take the same arguments as
+`openai_client.chat.completions.create` / `beta.chat.completions.parse`,
+plus the agent name (usage metrics are recorded here, see metrics.py).
+Only the memoizable call sites go through it (query condensing, gatekeeper,
+spy search terms and competitor extraction, watchdog CTA picks). Calls that
+are never cached (analyst, spy report, financier, architect, coaches, MVP
+builder, translation) still use `openai_client` directly and don't show up
+in the gateway's metrics.
+
+Calls flagged `cacheable=True` are memoized in a persistent KVStore keyed on
+the hash of (method, model, messages, response schema, temperature and other
+parameters): repeated inputs (same query to condense, same idea to gatekeep,
+same page HTML) return the stored response instead of a model round trip.
+Only use it for effectively deterministic calls (temperature ~0, extraction
+or classification), never for generation that should vary between users.
+Only complete answers are stored (finish_reason "stop", no refusal).
+"""
+import hashlib
+import json
+import os
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel
+
+import metrics
+from kv_store import KVStore
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "50000"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+
+_cache: Optional[KVStore] = KVStore("llm_responses", max_entries=LLM_CACHE_SIZE, ttl_seconds=LLM_CACHE_TTL) if LLM_CACHE_ENABLED else None
+
+
+def _client():
+    from utils import openai_client  # utils uses the gateway too
+    return openai_client
+
+
+def _schema_fingerprint(response_format: Any) -> Any:
+    """Pydantic response formats are hashed by JSON schema, so editing the model invalidates its entries."""
+    if isinstance(response_format, type) and issubclass(response_format, BaseModel):
+        return {"model": response_format.__name__, "schema": response_format.model_json_schema()}
+    return response_format
+
+
+def cache_key(method: str, params: Dict[str, Any]) -> str:
+    params = dict(params, response_format=_schema_fingerprint(params.get("response_format")))
+    payload = json.dumps({"method": method, **params}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _cacheable_response(response) -> bool:
+    if not response.choices:
+        return False
+    choice = response.choices[0]
+    return choice.finish_reason == "stop" and not getattr(choice.message, "refusal", None)
+
+
+def _load(method: str, raw: bytes, response_format: Any):
+    from openai.types.chat import ChatCompletion, ParsedChatCompletion
+
+    if method == "parse":
+        return ParsedChatCompletion[response_format].model_validate_json(raw)
+    return ChatCompletion.model_validate_json(raw)
+
+
+def _call(method: str, agent: str, cacheable: bool, ttl_seconds: Optional[float], params: Dict[str, Any]):
+    key = cache_key(method, params) if cacheable and _cache is not None else None
+    if key:
+        try:
+            raw = _cache.get(key)
+            if raw is not None:
+                response = _load(method, raw, params.get("response_format"))
+                metrics.incr("llm.cache.hits")
+                metrics.incr(f"llm.cache_hits.{agent}")
+                return response
+        except Exception as e:
+            print(f"⚠️ LLM cache read failed: {e}")
+        metrics.incr("llm.cache.misses")
+
+    client = _client()
+    if method == "parse":
+        response = client.beta.chat.completions.parse(**params)
+    else:
+        response = client.chat.completions.create(**params)
+    metrics.record_llm_usage(agent, response)
+
+    if key and _cacheable_response(response):
+        try:
+            _cache.set(key, response.model_dump_json().encode("utf-8"), ttl_seconds=ttl_seconds)
+        except Exception as e:
+            print(f"⚠️ LLM cache write failed: {e}")
+    return response
+
+
+def chat_completion(agent: str, *, cacheable: bool = False, ttl_seconds: Optional[float] = None, **params):
+    """`chat.completions.create(**params)`, memoized if `cacheable`."""
+    return _call("create", agent, cacheable, ttl_seconds, params)
+
+
+def chat_parse(agent: str, *, cacheable: bool = False, ttl_seconds: Optional[float] = None, **params):
+    """`beta.chat.completions.parse(**params)` (structured output), memoized if `cacheable`."""
+    return _call("parse", agent, cacheable, ttl_seconds, params)
@@ -0,0 +1,253 @@
+"""
+In-process vector index: the fallback for when Qdrant isn't available.
+
+Vectors live in a float32 matrix memory-mapped from disk (`vectors.f32`),
+one row per point, L2-normalized, so cosine similarity for every point is a
+single matrix-vector product. Ids and payloads are kept in memory and
+persisted per point in SQLite (`meta.sqlite3`): an upsert or delete writes
+only the rows it touches, in one transaction per batch, never the whole
+index. Top-k is exact (brute force + argpartition): at our collection sizes
+this is a few milliseconds and needs no training, unlike IVF.
+
+Same operations as the Qdrant path (upsert / search / delete), with payload
+filters given as a Python predicate. One index per embedding model
+(namespace), since vectors from different models aren't comparable.
+
+Single writer: the in-memory row map is only valid for the process that
+writes. The first process to write takes an exclusive lock on the index
+directory (`writer.lock`) for its lifetime; writes from any other process
+(e.g. reindex_vectors.py while the server runs) are skipped with a warning,
+and the server catches up from Qdrant on its next start (sync_local_index).
+"""
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process writer lock
+    fcntl = None
+
+from kv_store import CACHE_DIR
+
+LOCAL_INDEX_DIR = os.getenv("LOCAL_VECTOR_INDEX_DIR", os.path.join(CACHE_DIR, "vector_index"))
+INITIAL_CAPACITY = 1024
+
+
+class LocalVectorIndex:
+    def __init__(self, namespace: str, dim: int, directory: Optional[str] = None):
+        self.namespace = namespace
+        self.dim = dim
+        self.directory = directory or os.path.join(LOCAL_INDEX_DIR, namespace)
+        self._vectors_path = os.path.join(self.directory, "vectors.f32")
+        self._db_path = os.path.join(self.directory, "meta.sqlite3")
+        self._legacy_meta_path = os.path.join(self.directory, "meta.json")
+        self._lock = threading.RLock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._writer_lock = None  # Open lock file once this process is the writer
+        self._read_only = False
+        self._ids: List[str] = []
+        self._payloads: List[Dict[str, Any]] = []
+        self._rows: Dict[str, int] = {}
+        self._vectors: Optional[np.memmap] = None
+        self._load()
+
+    # ---------- Storage ----------
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self._db_path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS points (id TEXT PRIMARY KEY, row INTEGER NOT NULL, payload TEXT NOT NULL)")
+        return conn
+
+    def _load(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._db = self._connect()
+        meta = dict(self._db.execute("SELECT key, value FROM meta").fetchall())
+        capacity = INITIAL_CAPACITY
+        if meta and int(meta["dim"]) == self.dim and os.path.exists(self._vectors_path):
+            rows = self._db.execute("SELECT id, row, payload FROM points ORDER BY row").fetchall()
+            self._ids = [point_id for point_id, _, _ in rows]
+            self._payloads = [json.loads(payload) for _, _, payload in rows]
+            capacity = max(int(meta["capacity"]), INITIAL_CAPACITY)
+        elif not meta and os.path.exists(self._legacy_meta_path):
+            capacity = self._load_legacy_meta(capacity)
+        elif meta:
+            print(f"⚠️ Local vector index {self.namespace} is stale or has another dimension, rebuilding.")
+            self._db.execute("DELETE FROM points")
+
+        self._rows = {point_id: row for row, point_id in enumerate(self._ids)}
+        mode = "r+" if os.path.exists(self._vectors_path) and self._ids else "w+"
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode=mode, shape=(capacity, self.dim))
+        if not self._read_only and meta != {"dim": str(self.dim), "capacity": str(capacity)}:
+            self._set_meta(capacity)
+
+    def _load_legacy_meta(self, capacity: int) -> int:
+        """Indexes written before meta.sqlite3 kept everything in one meta.json: import it once."""
+        with open(self._legacy_meta_path) as f:
+            meta = json.load(f)
+        if meta.get("dim") != self.dim or not os.path.exists(self._vectors_path):
+            return capacity
+        self._ids, self._payloads = meta["ids"], meta["payloads"]
+        if self._acquire_writer():
+            with self._db:
+                self._db.execute("BEGIN")
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO points (id, row, payload) VALUES (?, ?, ?)",
+                    [(point_id, row, json.dumps(payload)) for row, (point_id, payload) in enumerate(zip(self._ids, self._payloads))]
+                )
+            os.remove(self._legacy_meta_path)
+        return max(meta["capacity"], INITIAL_CAPACITY)
+
+    def _set_meta(self, capacity: int):
+        self._db.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            [("dim", str(self.dim)), ("capacity", str(capacity))]
+        )
+
+    def _acquire_writer(self) -> bool:
+        """Take the directory's writer lock (once). False if another process holds it."""
+        if self._writer_lock is not None:
+            return True
+        if self._read_only:
+            return False
+        lock_file = open(os.path.join(self.directory, "writer.lock"), "a")
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                self._read_only = True
+                print(f"⚠️ Local vector index {self.namespace} is written by another process. Writes from this process are skipped.")
+                return False
+        self._writer_lock = lock_file
+        return True
+
+    def _grow(self, needed: int):
+        capacity = self._vectors.shape[0]
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        count = len(self._ids)
+        self._vectors.flush()
+        old = np.array(self._vectors[:count])
+        del self._vectors
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="w+", shape=(capacity, self.dim))
+        self._vectors[:count] = old
+        self._set_meta(capacity)
+
+    def _persist(self, changed: Sequence[str], removed: Sequence[str] = ()):
+        """Write the rows of `changed` points and drop `removed` ones, in one transaction."""
+        self._vectors.flush()
+        with self._db:
+            self._db.execute("BEGIN")
+            if removed:
+                self._db.executemany("DELETE FROM points WHERE id = ?", [(point_id,) for point_id in removed])
+            self._db.executemany(
+                "INSERT OR REPLACE INTO points (id, row, payload) VALUES (?, ?, ?)",
+                [(point_id, self._rows[point_id], json.dumps(self._payloads[self._rows[point_id]])) for point_id in dict.fromkeys(changed)]
+            )
+
+    # ---------- API ----------
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def upsert(self, ids: Sequence[str], vectors: np.ndarray, payloads: Sequence[Dict[str, Any]]) -> int:
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.dim)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+
+        with self._lock:
+            if not self._acquire_writer():
+                return 0
+            new_ids = [point_id for point_id in dict.fromkeys(ids) if point_id not in self._rows]
+            self._grow(len(self._ids) + len(new_ids))
+            for point_id, vector, payload in zip(ids, vectors, payloads):
+                row = self._rows.get(point_id)
+                if row is None:
+                    row = len(self._ids)
+                    self._rows[point_id] = row
+                    self._ids.append(point_id)
+                    self._payloads.append(payload)
+                else:
+                    self._payloads[row] = payload
+                self._vectors[row] = vector
+            self._persist(ids)
+        return len(ids)
+
+    def delete(self, ids: Sequence[str]) -> int:
+        deleted = 0
+        with self._lock:
+            if not self._acquire_writer():
+                return 0
+            moved, removed = [], []
+            for point_id in ids:
+                row = self._rows.pop(point_id, None)
+                if row is None:
+                    continue
+                # Move the last row into the hole to keep the matrix dense
+                last = len(self._ids) - 1
+                if row != last:
+                    self._vectors[row] = self._vectors[last]
+                    self._ids[row] = self._ids[last]
+                    self._payloads[row] = self._payloads[last]
+                    self._rows[self._ids[row]] = row
+                    moved.append(self._ids[row])
+                self._ids.pop()
+                self._payloads.pop()
+                removed.append(point_id)
+                deleted += 1
+            if deleted:
+                self._persist([point_id for point_id in moved if point_id in self._rows], removed)
+        return deleted
+
+    def search(
+        self,
+        vector: np.ndarray,
+        limit: int = 5,
+        payload_filter: Optional[Callable[[str, Dict[str, Any]], bool]] = None
+    ) -> List[Dict[str, Any]]:
+        """Top-`limit` points by cosine similarity: [{"id", "score", "payload"}]."""
+        query = np.asarray(vector, dtype=np.float32).reshape(self.dim)
+        query = query / (np.linalg.norm(query) or 1)
+
+        with self._lock:
+            count = len(self._ids)
+            if count == 0 or limit <= 0:
+                return []
+            scores = np.asarray(self._vectors[:count] @ query)
+            if payload_filter is not None:
+                mask = np.fromiter(
+                    (payload_filter(point_id, payload) for point_id, payload in zip(self._ids, self._payloads)),
+                    dtype=bool,
+                    count=count
+                )
+                scores = np.where(mask, scores, -np.inf)
+
+            k = min(limit, count)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [
+                {"id": self._ids[row], "score": float(scores[row]), "payload": self._payloads[row]}
+                for row in top
+                if np.isfinite(scores[row])
+            ]
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            return list(self._ids)
+
+    def clear(self):
+        with self._lock:
+            if not self._acquire_writer():
+                return
+            self._ids, self._payloads, self._rows = [], [], {}
+            self._db.execute("DELETE FROM points")
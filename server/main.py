@@ -30,20 +30,30 @@ from agents.spy import generate_spy_analysis, get_competitor_intel
 from agents.financier import generate_financier_analysis, get_financial_intel
 from agents.architect import generate_architect_blueprint
 from agents.timeline_coach import run_timeline_agent, generate_next_step_agent
-from agents.watchdog import verify_cta
-from database import init_db, get_session, upsert_vector, delete_vector, engine
+from agents.watchdog import cta_watchdog, verify_cta
+from database import init_db, get_session, engine
+from vector_indexer import vector_indexer, enqueue_project_vector, enqueue_vector_delete
+from github_publisher import github_publisher
+from cta_sweeper import cta_sweeper
+from cta_funnel import record_funnel_event
+from embeddings import embedding_service
+import metrics
 from sqlmodel import select, delete, func, col
 from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi import Depends
 from fastapi.staticfiles import StaticFiles
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional
 import os
 from utils import generate_project_name
-from routers import webhooks
+from routers import webhooks, similar, financier, artifacts, funnel
 
 app = FastAPI(title="Verdyct Analyst Agent", version="1.0")
 
 app.include_router(webhooks.router)
+app.include_router(similar.router)
+app.include_router(financier.router)
+app.include_router(artifacts.router)
+app.include_router(funnel.router)
 
 # Configuration CORS
 app.add_middleware(
@@ -60,7 +70,22 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 
 @app.on_event("startup")
 async def on_startup():
+    # Load the embedding model in the background: readiness doesn't wait for it
+    embedding_service.start_warmup()
     await init_db()
+    # Applies queued Qdrant writes (see vector_indexer.py)
+    vector_indexer.start()
+    # Publishes generated MVP code to GitHub off the request path (see github_publisher.py)
+    github_publisher.start()
+    # Re-verifies every live project's CTA on a schedule (see cta_sweeper.py)
+    cta_sweeper.start()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await vector_indexer.stop()
+    await github_publisher.stop()
+    await cta_sweeper.stop()
+    await cta_watchdog.aclose()
 
 @app.post("/api/track")
 async def track_event(event: PixelEvent, session: AsyncSession = Depends(get_session)):
@@ -80,8 +105,9 @@ async def track_event(event: PixelEvent, session: AsyncSession = Depends(get_ses
         print(f"⚠️ Warning: Pixel event received for unknown project: {event.project_id}")
         return {"status": "ignored", "reason": "project_not_found"}
     
-    # Save event to DB
+    # Save event to DB, counted in the CTA funnel in the same transaction
     session.add(event)
+    await record_funnel_event(session, project, event)
     await session.commit()
     
     return {"status": "received"}
@@ -98,7 +124,7 @@ async def trigger_cta_verification(project_id: str, session: AsyncSession = Depe
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
         
-    result = verify_cta(project.id, project.url)
+    result = await verify_cta(project.id, project.url)
     
     if "error" in result:
         raise HTTPException(status_code=500, detail=result["error"])
@@ -255,7 +281,79 @@ async def get_user_credits(user: tuple = Depends(verify_token)):
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "service": "Verdyct Analyst Agent"}
+    return {
+        "status": "healthy",
+        "service": "Verdyct Analyst Agent",
+        "embeddings_ready": embedding_service.is_ready,
+        "embeddings": embedding_service.status()
+    }
+
+@app.get("/api/metrics")
+async def get_metrics():
+    """
+    In-process counters (cache hits/misses, ...) and derived hit rates.
+    """
+    reports = metrics.get("reports.generated")
+    prompt_tokens = metrics.totals("llm.prompt_tokens")
+    cached_tokens = metrics.totals("llm.cached_tokens")
+    step_prompt_tokens = metrics.totals("llm.step.prompt_tokens")
+    step_cached_tokens = metrics.totals("llm.step.cached_tokens")
+    context_in = metrics.totals("context.tokens_in")
+    context_out = metrics.totals("context.tokens_out")
+    return {
+        "counters": metrics.snapshot(),
+        "hit_rates": {
+            "embeddings_cache": metrics.hit_rate("embeddings.cache"),
+            "similar_cache": metrics.hit_rate("similar.cache"),
+            "translation_memory": metrics.hit_rate("translation.memory"),
+            "llm_cache": metrics.hit_rate("llm.cache"),
+            "financier_recompute": metrics.hit_rate("financier.recompute"),
+            "watchdog_llm_skip": metrics.hit_rate("watchdog.llm_skip")
+        },
+        "llm_cache_hits": metrics.totals("llm.cache_hits"),
+        "cta_sweep": cta_sweeper.summary_dict(),
+        "prompt_tokens": {
+            "by_agent": prompt_tokens,
+            "per_report": round(sum(prompt_tokens.values()) / reports) if reports else None
+        },
+        "prompt_cache": {
+            "by_agent": {
+                agent: {"cached_tokens": cached_tokens.get(agent, 0), "hit_rate": round(cached_tokens.get(agent, 0) / tokens, 4) if tokens else 0.0}
+                for agent, tokens in prompt_tokens.items()
+            },
+            "by_step": {
+                step: {"cached_tokens": step_cached_tokens.get(step, 0), "hit_rate": round(step_cached_tokens.get(step, 0) / tokens, 4) if tokens else 0.0}
+                for step, tokens in step_prompt_tokens.items()
+            }
+        },
+        "context_packing": {
+            agent: {"tokens_in": context_in[agent], "tokens_out": context_out.get(agent, 0)}
+            for agent in context_in
+        }
+    }
+
+def run_analyst(request: IdeaRequest, on_node=None) -> AnalystResponse:
+    """
+    Pipeline de l'Analyst (bloquant, à lancer dans un thread) :
+    recherche Tavily -> synthèse GPT-4o-mini -> DAG d'analyse.
+    `on_node` reçoit les timings de chaque noeud du DAG.
+    """
+    # Step 1: Recherche de données de marché (mockée pour économiser les coûts)
+    market_data = search_market_data(request.idea)
+    
+    # Step 2: Synthèse des données Tavily avec GPT-4o-mini (compression ~10k → ~2k tokens)
+    synthesized_context = synthesize_tavily_data(
+        raw_tavily_context=market_data["context"],
+        idea=request.idea
+    )
+    
+    # Step 3: Génération de l'analyse avec les données synthétisées
+    return generate_analysis(
+        request.idea,
+        synthesized_context,  # Using synthesized data instead of raw
+        language=request.language,
+        on_node=on_node
+    )
 
 @app.post("/analyze", response_model=AnalystResponse)
 async def analyze_idea(request: IdeaRequest, user: dict = Depends(verify_token)):
@@ -265,23 +363,7 @@ async def analyze_idea(request: IdeaRequest, user: dict = Depends(verify_token))
     synthétise les données avec GPT-4o-mini, puis génère un rapport structuré via OpenAI.
     """
     try:
-        # Step 1: Recherche de données de marché (mockée pour économiser les coûts)
-        market_data = search_market_data(request.idea)
-        
-        # Step 2: Synthèse des données Tavily avec GPT-4o-mini (compression ~10k → ~2k tokens)
-        synthesized_context = synthesize_tavily_data(
-            raw_tavily_context=market_data["context"],
-            idea=request.idea
-        )
-        
-        # Step 3: Génération de l'analyse avec les données synthétisées
-        analysis = generate_analysis(
-            request.idea,
-            synthesized_context,  # Using synthesized data instead of raw
-            language=request.language
-        )
-        
-        return analysis
+        return await asyncio.to_thread(run_analyst, request)
         
     except HTTPException:
         raise
@@ -320,7 +402,8 @@ async def spy_analysis(request: IdeaRequest, user: tuple = Depends(verify_token)
                     feature_context=intel_data.get("feature_context", ""),
                     pricing_context=intel_data.get("pricing_context", ""),
                     language=request.language,
-                    max_retries=max_retries
+                    max_retries=max_retries,
+                    sources=intel_data.get("sources")
                 )
                 
                 # Si on arrive ici, la validation a réussi
@@ -375,69 +458,20 @@ async def financier_analysis(request: IdeaRequest, user: tuple = Depends(verify_
         last_error = None
         while retry_count < max_retries:
             try:
-                # Génération de l'analyse (sans calculs)
+                # Génération de l'analyse (leviers parsés, calculs Python inclus)
                 analysis = generate_financier_analysis(
                     request.idea,
                     financial_data["pricing_context"],
                     cost_context=financial_data.get("cost_context", ""),
                     language=request.language,
-                    max_retries=max_retries
+                    max_retries=max_retries,
+                    sources=financial_data.get("sources")
                 )
 
-                # --- CALCULATE METRICS (The Missing Link) ---
-                try:
-                    # 1. Extract Levers safely
-                    levers = analysis.profit_engine.levers
-                    
-                    # Parse Price (remove currency symbols if LLM hallucinated them)
-                    p_str = str(levers.monthly_price.value).replace("€", "").replace("$", "").replace("/mo", "").strip()
-                    price_val = float(p_str) if p_str else 29.0
-                    
-                    # Parse Ad Spend (Marketing Budget)
-                    a_str = str(levers.ad_spend.value).replace("€", "").replace("$", "").replace(",", "").strip()
-                    ad_val = float(a_str) if a_str else 0.0
-                    
-                    # Parse Conversion
-                    c_str = str(levers.conversion_rate.value).replace("%", "").strip()
-                    conv_val = float(c_str) if c_str else 2.0
-                    
-                    # 2. Run Calculations
-                    metrics_data = calculate_projections(
-                        monthly_price=price_val,
-                        ad_spend=ad_val,
-                        conversion_rate=conv_val,
-                        cost_structure=analysis.cost_structure
-                    )
-                    
-                    # 3. Update Analysis Object with Real Content
-                    # Update Metrics
-                    analysis.profit_engine.metrics.ltv_cac_ratio = f"{metrics_data['ltv_cac_ratio']:.1f}"
-                    analysis.profit_engine.metrics.status = metrics_data['status']
-                    analysis.profit_engine.metrics.estimated_cac = f"€{metrics_data['cac']:.2f}"
-                    analysis.profit_engine.metrics.estimated_ltv = f"€{metrics_data['ltv']:.2f}"
-                    analysis.profit_engine.metrics.break_even_users = metrics_data['break_even_users']
-                    analysis.profit_engine.metrics.projected_runway_months = metrics_data['projected_runway_months']
-                    
-                    # Update Projections
-                    # We need to map the dict back to RevenueProjection objects
-                    new_projections = []
-                    for p in metrics_data['projections']:
-                        new_projections.append({
-                            "year": p['year'],
-                            "revenue": p['revenue']
-                        })
-                    
-                    # Assign back to Pydantic model
-                    # Note: RevenueProjection expects list of objects, we might need to reconstruct
-                    # simpler to just update the 'projections' list if possible, but Pydantic requires objects
-                    from models import RevenueProjection as RP_Model # Inline import to be safe
-                    analysis.revenue_projection.projections = new_projections 
-                    
-                except Exception as calc_error:
-                    print(f"⚠️ Calculation Warning: {calc_error}")
-                    # Don't crash entire request, just return analysis with placeholders/partial data
-                    pass
-                
+                # Metrics, projections et bandes de risque sont calculés par
+                # generate_financier_analysis à partir des leviers parsés
+                # (numeric_parsing), pas de second calcul ici
+
                 # Si on arrive ici, la validation a réussi
                 return analysis
                 
@@ -477,6 +511,13 @@ async def architect_blueprint(request: IdeaRequest, user: tuple = Depends(verify
     Endpoint pour le blueprint technique (Architect Agent).
     Génère un plan technique complet et un MVP fonctionnel.
     """
+    return await run_architect(request)
+
+async def run_architect(request: IdeaRequest, on_event: Optional[Callable[[Dict], None]] = None) -> ArchitectResponse:
+    """
+    Architect avec retries, dans un thread. `on_event` reçoit la progression
+    fichier par fichier du MVP (agents/mvp_builder.py, depuis un thread).
+    """
     max_retries = 3
     retry_count = 0
     
@@ -484,10 +525,12 @@ async def architect_blueprint(request: IdeaRequest, user: tuple = Depends(verify
         last_error = None
         while retry_count < max_retries:
             try:
-                blueprint = generate_architect_blueprint(
+                blueprint = await asyncio.to_thread(
+                    generate_architect_blueprint,
                     request.idea,
                     language=request.language,
-                    max_retries=max_retries
+                    max_retries=max_retries,
+                    on_event=on_event
                 )
                 return blueprint
                 
@@ -555,8 +598,11 @@ async def publish_project(project_id: str, session: AsyncSession = Depends(get_s
         
     project.is_public = True
     session.add(project)
+    # Visibility is a search filter: refresh the vector payload
+    enqueue_project_vector(session, project)
     await session.commit()
     await session.refresh(project)
+    vector_indexer.notify()
     return project
 
 
@@ -577,8 +623,11 @@ async def unpublish_project(project_id: str, session: AsyncSession = Depends(get
         
     project.is_public = False
     session.add(project)
+    # Visibility is a search filter: refresh the vector payload
+    enqueue_project_vector(session, project)
     await session.commit()
     await session.refresh(project)
+    vector_indexer.notify()
     
     return {"ok": True}
 
@@ -609,12 +658,11 @@ async def delete_project(project_id: str, session: AsyncSession = Depends(get_se
         raise HTTPException(status_code=404, detail="Project not found")
         
     try:
-        # Delete from SQL
+        # Delete from SQL, queue the Vector DB delete in the same transaction
         await session.delete(project)
+        enqueue_vector_delete(session, project_id)
         await session.commit()
-        
-        # Delete from Vector DB
-        delete_vector(project_id)
+        vector_indexer.notify()
         
         return {"status": "deleted", "id": project_id}
     except Exception as e:
@@ -727,8 +775,20 @@ async def generate_report(request: IdeaRequest, session: AsyncSession = Depends(
             analyst_start = time.time()
             yield f"data: {json.dumps({'type': 'status', 'agent': 'analyst', 'status': 'running'})}\n\n"
             
-            # Run Analyst
-            analyst_res = await analyze_idea(request)
+            # Run Analyst in a thread; DAG node timings are streamed as nodes finish
+            loop = asyncio.get_running_loop()
+            node_events = asyncio.Queue()
+            analyst_task = asyncio.ensure_future(asyncio.to_thread(
+                run_analyst, request, lambda event: loop.call_soon_threadsafe(node_events.put_nowait, event)
+            ))
+            while not analyst_task.done() or not node_events.empty():
+                next_event = asyncio.ensure_future(node_events.get())
+                await asyncio.wait({analyst_task, next_event}, return_when=asyncio.FIRST_COMPLETED)
+                if not next_event.done():
+                    next_event.cancel()
+                    continue
+                yield f"data: {json.dumps({'type': 'node_complete', 'agent': 'analyst', **next_event.result()})}\n\n"
+            analyst_res = analyst_task.result()
             analyst_duration = time.time() - analyst_start
             print(f"[{datetime.utcnow().isoformat()}] ✅ Analyst completed in {analyst_duration:.2f}s")
             yield f"data: {json.dumps({'type': 'agent_complete', 'agent': 'analyst', 'duration': f'{analyst_duration:.2f}s'})}\n\n"
@@ -777,14 +837,11 @@ async def generate_report(request: IdeaRequest, session: AsyncSession = Depends(
                 async_session_maker = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
                 async with async_session_maker() as new_session:
                     new_session.add(project)
+                    enqueue_project_vector(new_session, project)
                     await new_session.commit()
+                vector_indexer.notify()
                 
-                upsert_vector(
-                    text=request.idea,
-                    metadata={"project_id": project_id, "pos_score": pcs_score, "status": "rejected"},
-                    vector_id=project_id
-                )
-                
+                metrics.incr("reports.generated")
                 yield f"data: {json.dumps({'type': 'complete', 'status': 'rejected', 'data': report_data.dict()})}\n\n"
                 return
 
@@ -829,32 +886,45 @@ async def generate_report(request: IdeaRequest, session: AsyncSession = Depends(
                 parallel_start = time.time()
                 tasks = [] 
                 
+                # MVP files (Architect) are streamed to the client as they are built
+                artifact_events = asyncio.Queue()
+
                 # Spy, Financier, Architect ONLY run if full analysis
                 if request.analysis_type == 'full':
                      tasks = [
                         run_with_tag("spy", spy_analysis(request)),
                         run_with_tag("financier", financier_analysis(request)),
-                        run_with_tag("architect", architect_blueprint(request))
+                        run_with_tag("architect", run_architect(
+                            request, lambda event: loop.call_soon_threadsafe(artifact_events.put_nowait, event)
+                        ))
                     ]
                 else:
                     yield f"data: {json.dumps({'type': 'log', 'message': 'Small Analysis: Skipping Spy, Financier, Architect.'})}\n\n"
                 
                 results = {}
                 
-                # Process as they complete
-                for coro in asyncio.as_completed(tasks):
-                    agent_start = time.time()
-                    tag, result = await coro
-                    agent_duration = time.time() - agent_start
-                    if isinstance(result, Exception):
-                        print(f"[{datetime.utcnow().isoformat()}] ❌ {tag} failed in {agent_duration:.2f}s: {result}")
-                        # We continue even if one fails, but ideally we should handle it
-                        # For now, we might have missing data in the final report
-                        results[tag] = None 
+                # Process as they complete, interleaved with the MVP file events
+                pending_tasks = {asyncio.ensure_future(task) for task in tasks}
+                while pending_tasks or not artifact_events.empty():
+                    next_event = asyncio.ensure_future(artifact_events.get())
+                    done, _ = await asyncio.wait(pending_tasks | {next_event}, return_when=asyncio.FIRST_COMPLETED)
+                    if next_event.done():
+                        yield f"data: {json.dumps({'agent': 'architect', **next_event.result()})}\n\n"
                     else:
-                        print(f"[{datetime.utcnow().isoformat()}] ✅ {tag} completed in {agent_duration:.2f}s")
-                        results[tag] = result
-                        yield f"data: {json.dumps({'type': 'agent_complete', 'agent': tag, 'duration': f'{agent_duration:.2f}s'})}\n\n"
+                        next_event.cancel()
+                    for task in done - {next_event}:
+                        pending_tasks.remove(task)
+                        tag, result = task.result()
+                        agent_duration = time.time() - parallel_start
+                        if isinstance(result, Exception):
+                            print(f"[{datetime.utcnow().isoformat()}] ❌ {tag} failed in {agent_duration:.2f}s: {result}")
+                            # We continue even if one fails, but ideally we should handle it
+                            # For now, we might have missing data in the final report
+                            results[tag] = None 
+                        else:
+                            print(f"[{datetime.utcnow().isoformat()}] ✅ {tag} completed in {agent_duration:.2f}s")
+                            results[tag] = result
+                            yield f"data: {json.dumps({'type': 'agent_complete', 'agent': tag, 'duration': f'{agent_duration:.2f}s'})}\n\n"
 
                 # Check if we have all results (or handle failures)
                 # Re-construct the specific response objects if needed, or just use what we have
@@ -917,17 +987,14 @@ async def generate_report(request: IdeaRequest, session: AsyncSession = Depends(
                 async_session_maker = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
                 async with async_session_maker() as new_session:
                     new_session.add(project)
+                    enqueue_project_vector(new_session, project)
                     await new_session.commit()
-                
-                upsert_vector(
-                    text=request.idea,
-                    metadata={"project_id": project_id, "pos_score": pcs_score, "status": "approved"},
-                    vector_id=project_id
-                )
+                vector_indexer.notify()
                 
                 total_duration = time.time() - parallel_start
                 print(f"[{datetime.utcnow().isoformat()}] ✅ All agents completed. Total time: {total_duration:.2f}s")
                 print(f"{'='*60}\n")
+                metrics.incr("reports.generated")
                 yield f"data: {json.dumps({'type': 'complete', 'status': 'approved', 'data': report_data.dict()})}\n\n"
 
         except Exception as e:
@@ -0,0 +1,69 @@
+"""
+In-process counters (cache hits/misses, tokens, ...), exposed on /api/metrics.
+
+Counters are per process and reset on restart; they're meant for quick
+hit-rate checks, not long-term monitoring.
+"""
+import threading
+from collections import defaultdict
+from typing import Dict, Optional
+
+_lock = threading.Lock()
+_counters: Dict[str, float] = defaultdict(float)
+
+
+def incr(name: str, value: float = 1) -> None:
+    with _lock:
+        _counters[name] += value
+
+
+def record_llm_usage(agent: str, response, step: Optional[str] = None) -> int:
+    """
+    Prompt/completion/cached tokens of an OpenAI response, per agent (and per
+    step, e.g. the analyst steps). Returns the cached prompt tokens.
+    """
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return 0
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached_tokens = getattr(details, "cached_tokens", 0) or 0
+    incr(f"llm.calls.{agent}")
+    incr(f"llm.prompt_tokens.{agent}", prompt_tokens)
+    incr(f"llm.cached_tokens.{agent}", cached_tokens)
+    incr(f"llm.completion_tokens.{agent}", getattr(usage, "completion_tokens", 0) or 0)
+    if step:
+        incr(f"llm.step.prompt_tokens.{agent}.{step}", prompt_tokens)
+        incr(f"llm.step.cached_tokens.{agent}.{step}", cached_tokens)
+    return cached_tokens
+
+
+def totals(prefix: str) -> Dict[str, float]:
+    """{suffix: value} for every counter named `{prefix}.<suffix>`."""
+    start = f"{prefix}."
+    with _lock:
+        return {name[len(start):]: value for name, value in _counters.items() if name.startswith(start)}
+
+
+def get(name: str) -> float:
+    with _lock:
+        return _counters.get(name, 0)
+
+
+def hit_rate(prefix: str) -> float:
+    """`{prefix}.hits / ({prefix}.hits + {prefix}.misses)`, 0.0 when unused."""
+    with _lock:
+        hits = _counters.get(f"{prefix}.hits", 0)
+        misses = _counters.get(f"{prefix}.misses", 0)
+    total = hits + misses
+    return round(hits / total, 4) if total else 0.0
+
+
+def snapshot() -> Dict[str, float]:
+    with _lock:
+        return dict(sorted(_counters.items()))
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
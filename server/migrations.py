@@ -0,0 +1,276 @@
+"""
+Versioned schema migrations for the relational DB.
+
+`SQLModel.metadata.create_all` only creates missing tables, it never touches
+tables that already exist. Everything else (new columns, new indexes on old
+tables) goes here as a numbered migration. Applied versions are recorded in
+the `schema_migrations` table so each step runs exactly once per database.
+
+Usage:
+    python migrations.py                # apply pending migrations
+    python migrations.py --check-plans  # EXPLAIN the hot queries
+"""
+import sys
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from sqlalchemy import inspect, or_, text
+from sqlalchemy.engine import Connection
+from sqlmodel import select, func
+
+from models import PixelEvent, Project, TimelineMessage, TimelineStep
+
+
+@dataclass
+class Migration:
+    version: int
+    name: str
+    upgrade: Callable[[Connection], None]
+
+
+# ========== HELPERS ==========
+
+def _add_column_if_missing(conn: Connection, table: str, column: str, ddl: str):
+    existing = {c["name"] for c in inspect(conn).get_columns(table)}
+    if column not in existing:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+        print(f"   + {table}.{column}")
+
+
+def _create_indexes(conn: Connection, *index_names: str):
+    """Create indexes declared on the models (idempotent)."""
+    from sqlmodel import SQLModel
+
+    wanted = set(index_names)
+    inspector = inspect(conn)
+    for table in SQLModel.metadata.tables.values():
+        for index in table.indexes:
+            if index.name not in wanted:
+                continue
+            wanted.discard(index.name)
+            existing = {i["name"] for i in inspector.get_indexes(table.name)}
+            if index.name not in existing:
+                index.create(bind=conn)
+                print(f"   + index {index.name}")
+    if wanted:
+        raise RuntimeError(f"Unknown indexes in migration: {sorted(wanted)}")
+
+
+# ========== MIGRATIONS ==========
+
+def _0001_project_social_columns(conn: Connection):
+    # Folded in from fix_schema.py / update_db_schema.py
+    _add_column_if_missing(conn, "project", "is_public", "BOOLEAN DEFAULT FALSE")
+    _add_column_if_missing(conn, "project", "upvotes", "INTEGER DEFAULT 0")
+    _add_column_if_missing(conn, "project", "views", "INTEGER DEFAULT 0")
+
+
+def _0002_hot_query_indexes(conn: Connection):
+    _create_indexes(
+        conn,
+        "ix_project_user_id_created_at",
+        "ix_pixelevent_project_id_timestamp",
+        "ix_pixelevent_project_id_element_text",
+        "ix_timelinemessage_timeline_id_step_id_created_at",
+        "ix_timelinestep_timeline_id_order_index",
+    )
+
+
+def _0003_timeline_history_index(conn: Connection):
+    _create_indexes(conn, "ix_timelinemessage_timeline_id_created_at")
+
+
+def _0004_sweep_due_index(conn: Connection):
+    _create_indexes(conn, "ix_project_last_verified")
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "project_social_columns", _0001_project_social_columns),
+    Migration(2, "hot_query_indexes", _0002_hot_query_indexes),
+    Migration(3, "timeline_history_index", _0003_timeline_history_index),
+    Migration(4, "sweep_due_index", _0004_sweep_due_index),
+]
+
+
+# ========== RUNNER ==========
+
+def _ensure_version_table(conn: Connection):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version INTEGER PRIMARY KEY, "
+        "name VARCHAR NOT NULL, "
+        "applied_at VARCHAR NOT NULL)"
+    ))
+
+
+def applied_versions(conn: Connection) -> set:
+    _ensure_version_table(conn)
+    rows = conn.execute(text("SELECT version FROM schema_migrations")).all()
+    return {row[0] for row in rows}
+
+
+def run_migrations(conn: Connection) -> List[int]:
+    """
+    Apply pending migrations in version order. Meant to be called inside a
+    transaction (e.g. `await conn.run_sync(run_migrations)` from init_db).
+    Returns the versions applied by this call.
+    """
+    done = applied_versions(conn)
+    applied = []
+    for migration in sorted(MIGRATIONS, key=lambda m: m.version):
+        if migration.version in done:
+            continue
+        print(f"🔹 Applying migration {migration.version:04d}_{migration.name}...")
+        migration.upgrade(conn)
+        conn.execute(
+            text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:v, :n, :t)"),
+            {"v": migration.version, "n": migration.name, "t": datetime.utcnow().isoformat()}
+        )
+        applied.append(migration.version)
+
+    if applied:
+        print(f"✅ Schema migrated to version {max(applied)}.")
+    return applied
+
+
+# ========== QUERY PLAN REGRESSION CHECK ==========
+
+@dataclass
+class HotQuery:
+    name: str
+    statement: object
+    index: str
+    # True when the ORDER BY must be satisfied by the index (no sort step)
+    ordered_by_index: bool = True
+
+
+def hot_queries() -> List[HotQuery]:
+    """The queries behind the dashboard, stats and timeline endpoints, and the CTA sweeps."""
+    sample_id = "00000000-0000-0000-0000-000000000000"
+    return [
+        HotQuery(
+            "dashboard_projects",
+            select(Project).where(Project.user_id == sample_id).order_by(Project.created_at.desc()),
+            "ix_project_user_id_created_at",
+        ),
+        HotQuery(
+            "stats_last_event",
+            select(PixelEvent).where(PixelEvent.project_id == sample_id).order_by(PixelEvent.timestamp.desc()).limit(1),
+            "ix_pixelevent_project_id_timestamp",
+        ),
+        HotQuery(
+            "stats_top_elements",
+            select(PixelEvent.element_text, func.count(PixelEvent.id).label("count"))
+            .where(PixelEvent.project_id == sample_id)
+            .where(PixelEvent.element_text != None)
+            .group_by(PixelEvent.element_text)
+            .order_by(func.count(PixelEvent.id).desc())
+            .limit(5),
+            "ix_pixelevent_project_id_element_text",
+            ordered_by_index=False,  # ordered by an aggregate
+        ),
+        HotQuery(
+            "timeline_step_history",
+            select(TimelineMessage).where(
+                TimelineMessage.timeline_id == sample_id,
+                TimelineMessage.step_id == sample_id
+            ).order_by(TimelineMessage.created_at),
+            "ix_timelinemessage_timeline_id_step_id_created_at",
+        ),
+        HotQuery(
+            "timeline_general_history",
+            select(TimelineMessage).where(
+                TimelineMessage.timeline_id == sample_id,
+                TimelineMessage.step_id == None
+            ).order_by(TimelineMessage.created_at),
+            "ix_timelinemessage_timeline_id_step_id_created_at",
+        ),
+        HotQuery(
+            "timeline_history",
+            select(TimelineMessage).where(TimelineMessage.timeline_id == sample_id).order_by(TimelineMessage.created_at),
+            "ix_timelinemessage_timeline_id_created_at",
+        ),
+        HotQuery(
+            "timeline_steps",
+            select(TimelineStep).where(TimelineStep.timeline_id == sample_id).order_by(TimelineStep.order_index),
+            "ix_timelinestep_timeline_id_order_index",
+        ),
+        HotQuery(
+            "sweep_due_projects",
+            select(Project.id, Project.url, Project.last_verified)
+            .where(Project.url != None, or_(Project.last_verified == None, Project.last_verified <= "2026-01-01T00:00:00"))
+            .order_by(Project.last_verified.asc().nulls_first())
+            .limit(200),
+            "ix_project_last_verified",
+        ),
+    ]
+
+
+def explain(conn: Connection, statement) -> str:
+    sql = str(statement.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    if conn.dialect.name == "sqlite":
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").all()
+        return "\n".join(str(row[-1]) for row in rows)
+    rows = conn.exec_driver_sql(f"EXPLAIN {sql}").all()
+    return "\n".join(str(row[0]) for row in rows)
+
+
+def check_query_plans(conn: Connection) -> Dict[str, str]:
+    """
+    EXPLAIN every hot query and raise if one no longer uses its index
+    (or needs an explicit sort step that the index should have removed).
+    Returns {query_name: plan}.
+    """
+    if conn.dialect.name == "postgresql":
+        # Tiny/dev tables make the planner prefer seq scans; we only care
+        # whether the index *can* serve the query.
+        conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+
+    plans = {}
+    failures = []
+    for query in hot_queries():
+        plan = explain(conn, query.statement)
+        plans[query.name] = plan
+
+        if query.index not in plan:
+            failures.append(f"{query.name}: expected index {query.index}\n{plan}")
+        elif query.ordered_by_index and _plan_has_sort(conn, plan):
+            failures.append(f"{query.name}: index does not cover ORDER BY\n{plan}")
+
+    if failures:
+        raise AssertionError("Query plan regression:\n" + "\n\n".join(failures))
+    return plans
+
+
+def _plan_has_sort(conn: Connection, plan: str) -> bool:
+    if conn.dialect.name == "sqlite":
+        return "TEMP B-TREE FOR ORDER BY" in plan
+    return any(line.strip().lstrip("-> ").startswith("Sort") for line in plan.splitlines())
+
+
+# ========== CLI ==========
+
+def _sync_database_url() -> str:
+    from database import DATABASE_URL
+    url = DATABASE_URL.replace("sqlite+aiosqlite", "sqlite").replace("postgresql+asyncpg", "postgresql")
+    if url.startswith("postgresql") and "sslmode" not in url and ("supa" in url or "aws-" in url):
+        url += ("&" if "?" in url else "?") + "sslmode=require"
+    return url
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    from sqlmodel import SQLModel, create_engine
+
+    load_dotenv()
+    engine = create_engine(_sync_database_url())
+
+    with engine.begin() as conn:
+        SQLModel.metadata.create_all(conn)
+        run_migrations(conn)
+
+        if "--check-plans" in sys.argv:
+            for name, plan in check_query_plans(conn).items():
+                print(f"--- {name}\n{plan}")
+            print("✅ All hot queries use their indexes.")
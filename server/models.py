@@ -1,7 +1,8 @@
 from pydantic import BaseModel, Field
+from pydantic.json_schema import SkipJsonSchema
 from typing import List, Optional, Dict
 from sqlmodel import SQLModel, Field as SQLField
-from sqlalchemy import JSON, Column
+from sqlalchemy import JSON, Column, Index
 from datetime import datetime
 import uuid
 
@@ -435,7 +436,7 @@ class Spy(BaseModel):
 # ========== MODULAR ANALYST STEPS ==========
 
 class AnalystCore(BaseModel):
-    """Step 1: Core Foundation (The Brain)"""
+    """Node `core`: foundation (The Shark)"""
     market_metrics: List[MarketMetric] = Field(..., min_length=1)
     value_proposition: str
     ideal_customer_persona: IdealCustomerPersona
@@ -443,23 +444,49 @@ class AnalystCore(BaseModel):
     market_overview: str # Summary of the landscape
 
 
-class AnalystStrategy(BaseModel):
-    """Step 2: Market Logic (The Strategist)"""
+class AnalystGTM(BaseModel):
+    """Node `gtm`: segments & go-to-market (The Strategist)"""
     market_segments: List[MarketSegment]
     marketing_playbook: MarketingPlaybook
     gtm_action_plan: GTMActionPlan
+
+
+class AnalystUnitEconomics(BaseModel):
+    """Node `unit_economics`: pricing & unit economics (The Strategist)"""
     unit_economics_preview: UnitEconomicsPreview
 
 
-class AnalystValidation(BaseModel):
-    """Step 3: Risk & Validation (The Skeptic)"""
+class AnalystRisks(BaseModel):
+    """Node `risks`: pre-mortem (The Skeptic)"""
     risk_validation: RiskValidation
+
+
+class AnalystSEO(BaseModel):
+    """Node `seo`: long-tail keyword opportunity (The Skeptic)"""
     seo_opportunity: SEOOpportunity
+
+
+class AnalystVerdict(BaseModel):
+    """Node `verdict`: scoring & final word (The Skeptic)"""
     score_card: ScoreCard
     analyst_footer: AnalystFooter
     pcs_score: int
 
 
+class AnalystStepOutput(BaseModel):
+    """
+    Shared response format of the analyst nodes. The structured output schema
+    is part of the prompt prefix, so every node uses this same envelope and
+    fills only its own field (the others are null).
+    """
+    core: Optional[AnalystCore]
+    gtm: Optional[AnalystGTM]
+    unit_economics: Optional[AnalystUnitEconomics]
+    risks: Optional[AnalystRisks]
+    seo: Optional[AnalystSEO]
+    verdict: Optional[AnalystVerdict]
+
+
 class SpyResponse(BaseModel):
     spy: Spy
 
@@ -531,6 +558,24 @@ class FinancierFooter(BaseModel):
     verdyct_summary: str
     recommendation_text: str
 
+class PercentileBand(BaseModel):
+    p10: Optional[float]
+    p50: Optional[float]
+    p90: Optional[float]
+
+
+class RiskSimulation(BaseModel):
+    """Monte Carlo bands computed by Python (projections.simulate_risk), never by the LLM"""
+    trajectories: int
+    seed: int
+    revenue: List[PercentileBand]  # One band per year
+    cash: List[PercentileBand]  # Year-end cash, one band per year
+    months_to_breakeven: PercentileBand  # None: not within the 60 months
+    breakeven_probability: float
+    cash_out_probability: float
+    assumptions: Dict[str, List[float]]  # (low, mode, high) per sampled assumption
+
+
 class Financier(BaseModel):
     title: str
     score: int
@@ -541,6 +586,15 @@ class Financier(BaseModel):
     # Premium / Enhanced Fields - REQUIRED for Strict Mode
     cost_structure: List[CostCategory]
     financial_roadmap: List[FinancialRoadmapPhase]
+    # Filled after generation; kept out of the structured-output schema
+    risk_simulation: SkipJsonSchema[Optional[RiskSimulation]] = None
+
+
+class LeverRecomputeRequest(BaseModel):
+    monthly_price: float = Field(..., ge=0, description="Monthly price per customer (€)")
+    ad_spend: float = Field(..., ge=0, description="Monthly ad budget (€)")
+    conversion_rate: float = Field(..., gt=0, le=100, description="Visitor to customer conversion (%)")
+    churn_rate: float = Field(0.05, gt=0, le=1, description="Monthly churn rate")
 
 
 class FinancierResponse(BaseModel):
@@ -554,6 +608,15 @@ class BuildStat(BaseModel):
     label: str
 
 
+class CodeArtifact(BaseModel):
+    """A generated file in the artifact store (artifact_store.py), by content hash"""
+    path: str
+    key: str
+    size: int
+    content_type: str
+    truncated: bool = False  # Cut by max_tokens (streamed build)
+
+
 class MVPStatus(BaseModel):
     title: str
     status: str
@@ -562,6 +625,8 @@ class MVPStatus(BaseModel):
     mvp_live_link: str = ""
     mvp_button_text: str = "View MVP"
     build_stats: List[BuildStat] = []
+    # Filled after generation; kept out of the structured-output schema
+    code_artifacts: SkipJsonSchema[List[CodeArtifact]] = []
 
 
 class MVPMilestone(BaseModel):
@@ -717,6 +782,12 @@ class PixelEvent(SQLModel, table=True):
     page_url: str
     timestamp: datetime = SQLField(default_factory=datetime.utcnow)
 
+    __table_args__ = (
+        # Stats endpoint: last activity and top clicked elements per project
+        Index("ix_pixelevent_project_id_timestamp", "project_id", "timestamp"),
+        Index("ix_pixelevent_project_id_element_text", "project_id", "element_text"),
+    )
+
 class Project(SQLModel, table=True):
     id: str = SQLField(default_factory=lambda: str(uuid.uuid4()), primary_key=True)
     name: str
@@ -743,6 +814,11 @@ class Project(SQLModel, table=True):
     upvotes: int = SQLField(default=0)
     views: int = SQLField(default=0)
 
+# Dashboard: a user's projects, newest first
+Index("ix_project_user_id_created_at", Project.user_id, Project.created_at.desc())
+# CTA sweeps: due projects, stalest check first
+Index("ix_project_last_verified", Project.last_verified)
+
 class ProjectUpdate(BaseModel):
     name: Optional[str] = None
 
@@ -768,6 +844,10 @@ class TimelineStep(SQLModel, table=True):
     created_at: datetime = SQLField(default_factory=datetime.utcnow)
     completed_at: Optional[datetime] = None
 
+    __table_args__ = (
+        Index("ix_timelinestep_timeline_id_order_index", "timeline_id", "order_index"),
+    )
+
 class TimelineMessage(SQLModel, table=True):
     id: str = SQLField(default_factory=lambda: str(uuid.uuid4()), primary_key=True)
     timeline_id: str = SQLField(index=True)
@@ -775,3 +855,47 @@ class TimelineMessage(SQLModel, table=True):
     role: str  # user, assistant
     content: str
     created_at: datetime = SQLField(default_factory=datetime.utcnow)
+
+    __table_args__ = (
+        # Chat history per timeline / per step, in order
+        Index("ix_timelinemessage_timeline_id_step_id_created_at", "timeline_id", "step_id", "created_at"),
+        # Whole-timeline history (all steps), in order
+        Index("ix_timelinemessage_timeline_id_created_at", "timeline_id", "created_at"),
+    )
+
+
+# ========== VECTOR OUTBOX ==========
+
+class VectorOutbox(SQLModel, table=True):
+    """
+    Pending Qdrant writes, committed in the same transaction as the project
+    change that caused them and applied by vector_indexer.VectorIndexer.
+    """
+    id: Optional[int] = SQLField(default=None, primary_key=True)
+    operation: str  # upsert, delete
+    point_id: str = SQLField(index=True)  # project id
+    text: Optional[str] = None
+    payload: Dict = SQLField(default={}, sa_column=Column(JSON))
+    status: str = "pending"  # pending, done, superseded, failed
+    attempts: int = 0
+    last_error: Optional[str] = None
+    next_attempt_at: datetime = SQLField(default_factory=datetime.utcnow)
+    created_at: datetime = SQLField(default_factory=datetime.utcnow)
+    processed_at: Optional[datetime] = None
+
+    __table_args__ = (
+        # Indexer poll: due pending rows, oldest first
+        Index("ix_vectoroutbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+# ========== CTA FUNNEL ==========
+
+class CTAFunnelDaily(SQLModel, table=True):
+    """
+    Per-project, per-day pixel click counters, incremented at ingest by
+    cta_funnel.record_funnel_event (clicks on the verified CTA vs all clicks).
+    """
+    project_id: str = SQLField(primary_key=True)
+    day: str = SQLField(primary_key=True)  # YYYY-MM-DD (UTC)
+    clicks: int = 0
+    cta_clicks: int = 0
@@ -0,0 +1,139 @@
+"""
+Numeric extraction for LLM output ("€29/month", "1,200", "2–3%", "1 200,50 €").
+
+The Financier levers used to go through chained .replace("€", "")... and
+float(), which raised on anything unexpected and fell back to placeholders.
+`parse_number` reads the first number of a value with precompiled patterns:
+    - currency symbols and codes (€, $, £, EUR, USD, GBP) are recorded, not parsed
+    - ranges ("2-3%", "€20 to €40", "de 2 à 3 %") become their midpoint
+    - thousands separators and decimal marks follow the locale: "1,200" is
+      1200 in `en` and 1.2 in `fr`, "1 200,5" is 1200.5 in `fr`; when both
+      marks appear (or a mark cannot be a thousands separator) the locale
+      does not matter
+    - k / M suffixes, percentages and billing periods (/month, /an, per year)
+
+`parse_lever` turns that into the float a lever expects (€ per month, or a
+percentage), with a default instead of an exception.
+"""
+import math
+import re
+from dataclasses import dataclass
+from typing import Any, Optional
+
+LOCALES = ("en", "fr")
+
+# Digits with optional grouping ("1,200", "1 200", "1.200.000") and decimals
+_NUMBER = r"\d{1,3}(?:[   .,'’]\d{3})+(?:[.,]\d+)?|\d+(?:[.,]\d+)?|[.,]\d+"
+_SCALE = r"(?:\s?(?:k|K|M|mn|millions?|thousands?|mille)\b)?"
+_CURRENCY = r"(?:€|\$|£|\b(?:EUR|USD|GBP)\b)"
+
+_NUMBER_RE = re.compile(rf"(?P<sign>[-−])?(?P<number>{_NUMBER})(?P<scale>{_SCALE})")
+_RANGE_RE = re.compile(
+    rf"(?P<low>{_NUMBER})(?P<low_scale>{_SCALE})\s*%?\s*{_CURRENCY}?\s*"
+    rf"(?:-|–|—|\bto\b|\bà\b|\ba\b)\s*{_CURRENCY}?\s*(?P<high>{_NUMBER})(?P<high_scale>{_SCALE})",
+    re.IGNORECASE
+)
+_CURRENCY_RE = re.compile(_CURRENCY)
+_PERCENT_RE = re.compile(r"%|\bper ?cent\b|\bpour ?cent\b|\bpct\b", re.IGNORECASE)
+_YEARLY_RE = re.compile(r"/\s?(?:y|yr|year|an|année)\b|\bper (?:year|annum)\b|\bpar an\b|\bannual(?:ly)?\b|\bannuel(?:le)?\b", re.IGNORECASE)
+_MONTHLY_RE = re.compile(r"/\s?(?:mo|month|mois|m)\b|\bper month\b|\bpar mois\b|\bmonthly\b|\bmensuel(?:le)?\b", re.IGNORECASE)
+_GROUP_CHARS_RE = re.compile(r"[   '’]")
+
+_CURRENCIES = {"€": "EUR", "$": "USD", "£": "GBP"}
+_SCALES = {"k": 1e3, "thousand": 1e3, "thousands": 1e3, "mille": 1e3, "m": 1e6, "mn": 1e6, "million": 1e6, "millions": 1e6}
+
+
+@dataclass(frozen=True)
+class ParsedNumber:
+    value: float  # Midpoint for ranges
+    low: float
+    high: float
+    currency: Optional[str] = None  # ISO code
+    percent: bool = False
+    period: Optional[str] = None  # "month" | "year"
+
+    @property
+    def is_range(self) -> bool:
+        return self.low != self.high
+
+
+def _to_float(token: str, locale: str) -> float:
+    """One number token, its separators read according to `locale`."""
+    token = _GROUP_CHARS_RE.sub("", token)
+    has_comma, has_dot = "," in token, "." in token
+    if has_comma and has_dot:
+        # The last mark is the decimal one ("1,200.50", "1.200,50")
+        decimal = "," if token.rfind(",") > token.rfind(".") else "."
+        return float(token.replace("." if decimal == "," else ",", "").replace(",", "."))
+    if has_comma or has_dot:
+        mark = "," if has_comma else "."
+        integer, _, fraction = token.rpartition(mark)
+        if token.count(mark) > 1:
+            return float(token.replace(mark, ""))  # Only thousands separators repeat
+        if len(fraction) != 3 or not integer or len(integer.replace(mark, "")) > 3:
+            return float(token.replace(mark, "."))  # Cannot be a thousands separator
+        # "1,200" / "1.200": ambiguous, the locale decides
+        thousands = "," if locale == "en" else "."
+        return float(token.replace(mark, "" if mark == thousands else "."))
+    return float(token)
+
+
+def _scaled(token: str, scale: str, locale: str) -> float:
+    return _to_float(token, locale) * _SCALES.get(scale.strip().lower(), 1.0)
+
+
+def parse_number(value: Any, locale: str = "en") -> Optional[ParsedNumber]:
+    """The first number (or range) in `value`, None if there is none."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        number = float(value)
+        return ParsedNumber(number, number, number) if math.isfinite(number) else None
+
+    text = str(value).strip()
+    if not text:
+        return None
+    locale = locale if locale in LOCALES else "en"
+
+    currency_match = _CURRENCY_RE.search(text)
+    currency = None
+    if currency_match:
+        symbol = currency_match.group(0)
+        currency = _CURRENCIES.get(symbol, symbol.upper())
+    percent = bool(_PERCENT_RE.search(text))
+    period = "year" if _YEARLY_RE.search(text) else "month" if _MONTHLY_RE.search(text) else None
+
+    range_match = _RANGE_RE.search(text)
+    if range_match:
+        low = _scaled(range_match.group("low"), range_match.group("low_scale"), locale)
+        high = _scaled(range_match.group("high"), range_match.group("high_scale"), locale)
+        if not range_match.group("low_scale") and range_match.group("high_scale"):
+            low *= _SCALES.get(range_match.group("high_scale").strip().lower(), 1.0)  # "10-20k"
+        low, high = min(low, high), max(low, high)
+        return ParsedNumber((low + high) / 2, low, high, currency, percent, period)
+
+    match = _NUMBER_RE.search(text)
+    if not match:
+        return None
+    number = _scaled(match.group("number"), match.group("scale"), locale)
+    if match.group("sign"):
+        number = -number
+    return ParsedNumber(number, number, number, currency, percent, period)
+
+
+def parse_lever(value: Any, default: float, kind: str = "amount", locale: str = "en") -> float:
+    """
+    A Financier lever as a float: `kind="amount"` gives € per month (yearly
+    amounts are divided by 12), `kind="percent"` a percentage, read as is:
+    0.8 is 0.8%, never rescaled (a conversion rate under 1% is common, and
+    min / max / step go through here too). `default` when nothing usable.
+    """
+    parsed = parse_number(value, locale)
+    if parsed is None or parsed.value < 0:
+        return default
+    number = parsed.value
+    if kind == "percent":
+        return number if number <= 100 else default
+    if parsed.period == "year":
+        number /= 12
+    return number
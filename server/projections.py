@@ -0,0 +1,241 @@
+"""
+Vectorized financial projection engine (Financier profit engine).
+
+Same customer / churn / cost model as the original per-point loop of
+agents.financier.calculate_projections, evaluated with NumPy over a whole
+grid of levers at once: price × ad_spend × conversion × churn arrays are
+broadcast together and the 60-month simulation advances every scenario in
+one array operation per month. A 20×20×20×5 grid (40k scenarios) takes
+~30 ms, a slider-sized grid (a few thousand) a few ms; a single point is
+the 1×1×1×1 case.
+
+Model (per month t, C = active customers):
+    leads       = 300 organic + ad_spend / 1.5
+    new         = leads × conversion%   (× 1.15 after month 0 while C < 1000, × 1.05 after)
+    C[t]        = C[t-1] + new - C[t-1] × churn
+    profit[t]   = C[t] × price - (fixed + C[t] × variable_per_user + ad_spend)
+
+The point estimate hides how fragile it is: churn, early growth, seed money
+and organic traffic are guesses. `simulate_risk` samples them from
+distributions centred on the defaults and runs 10k trajectories in one
+vectorized pass (~50 ms), returning P10 / P50 / P90 bands.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_CHURN = 0.05
+ORGANIC_LEADS = 300  # Visitors per month (sweat equity)
+COST_PER_LEAD = 1.5
+EARLY_GROWTH = 0.15  # MoM multiplier on new customers while small
+LATE_GROWTH = 0.05
+GROWTH_THRESHOLD = 1000  # Customers
+SEED_MONEY = 50000
+DEFAULT_FIXED_COSTS = 100  # Domains, minimal hosting
+MIN_GROSS_MARGIN = 0.2  # When variable costs exceed the price
+YEARS = 5
+
+STATUSES = np.array(["Risk", "Fair", "Good", "Excellent"])
+
+# Monte Carlo assumptions: (low, mode, high) of triangular distributions
+RISK_TRAJECTORIES = 10_000
+RISK_SEED = 42  # Same levers -> same bands (reports stay reproducible)
+RISK_PERCENTILES = (10, 50, 90)
+RISK_ASSUMPTIONS = {
+    "churn_rate": (0.02, DEFAULT_CHURN, 0.12),
+    "early_growth": (0.0, EARLY_GROWTH, 0.25),
+    "seed_money": (20000, SEED_MONEY, 60000),
+    "organic_leads": (50, ORGANIC_LEADS, 600),
+}
+
+
+def cost_model(cost_structure: Optional[Iterable[Any]] = None) -> Tuple[float, float]:
+    """(fixed monthly costs, variable cost per user) from the LLM cost structure (dicts or CostCategory)."""
+    if not cost_structure:
+        return float(DEFAULT_FIXED_COSTS), 0.0
+    fixed, variable = 0.0, 0.0
+    for cost in cost_structure:
+        amount = cost.get("monthly_amount", 0) if isinstance(cost, dict) else cost.monthly_amount
+        is_variable = cost.get("is_variable", False) if isinstance(cost, dict) else cost.is_variable
+        if is_variable:
+            variable += amount or 0  # Variable costs are entered as unit costs by the LLM
+        else:
+            fixed += amount or 0
+    return fixed, variable
+
+
+def project_grid(
+    monthly_price,
+    ad_spend,
+    conversion_rate,
+    churn_rate=DEFAULT_CHURN,
+    cost_structure: Optional[Iterable[Any]] = None,
+    grid: bool = True
+) -> Dict[str, np.ndarray]:
+    """
+    Evaluate the model for every lever combination.
+
+    With `grid=True` the four levers (scalars or 1-D arrays, conversion in %)
+    are crossed into a (price, ad_spend, conversion, churn) grid; with
+    `grid=False` they are broadcast together as given (paired scenarios).
+    Scalar metrics have the grid shape; yearly ones an extra axis of YEARS.
+    """
+    fixed, variable = cost_model(cost_structure)
+    levers = [np.asarray(value, dtype=np.float64) for value in (monthly_price, ad_spend, conversion_rate, churn_rate)]
+    if grid:
+        levers = np.meshgrid(*[np.atleast_1d(lever) for lever in levers], indexing="ij", sparse=True)
+    return simulate(*levers, fixed=fixed, variable=variable)
+
+
+def simulate(
+    price,
+    ads,
+    conversion,
+    churn,
+    fixed: float,
+    variable: float,
+    early_growth=EARLY_GROWTH,
+    seed_money=SEED_MONEY,
+    organic_leads=ORGANIC_LEADS
+) -> Dict[str, np.ndarray]:
+    """
+    The 60-month model for broadcastable arrays of levers and assumptions
+    (growth, seed money and organic traffic can vary per scenario too, see
+    simulate_risk). Returns the metrics of project_grid.
+    """
+    price, ads, conversion, churn, early_growth, seed_money, organic_leads = (
+        np.asarray(value, dtype=np.float64) for value in (price, ads, conversion, churn, early_growth, seed_money, organic_leads)
+    )
+    shape = np.broadcast_shapes(price.shape, ads.shape, conversion.shape, churn.shape, early_growth.shape, seed_money.shape, organic_leads.shape)
+
+    gross = price - variable
+    gross = np.where(gross <= 0, price * MIN_GROSS_MARGIN, gross)
+
+    leads = organic_leads + np.where(ads > 0, ads / COST_PER_LEAD, 0.0)
+    new_per_month = leads * (conversion / 100)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cac = np.where(new_per_month > 0, ads / new_per_month, ads)
+        ltv = gross / churn
+        ltv_cac_ratio = np.where(cac > 0, ltv / cac, 0.0)
+        break_even_users = np.where(gross > 0, np.floor(fixed / gross), 0.0)
+    runway_months = seed_money / fixed if fixed > 0 else np.full_like(seed_money, 99.0)
+
+    # Monthly simulation, all scenarios at once; yearly totals are accumulated
+    # in place instead of keeping every month
+    customers = np.zeros(shape)
+    new_per_month = np.broadcast_to(new_per_month, shape)
+    retention = np.broadcast_to(1 - churn, shape)
+    early = np.broadcast_to(1 + early_growth, shape)
+    monthly_costs = np.broadcast_to(fixed + ads, shape)
+    margin_per_customer = np.broadcast_to(price - variable, shape)
+    annual_revenue = np.empty(shape + (YEARS,))
+    annual_profit = np.empty(shape + (YEARS,))
+    year_end_customers = np.empty(shape + (YEARS,))
+    months_to_breakeven = np.full(shape, -1, dtype=np.int64)
+    year_revenue, year_profit = np.zeros(shape), np.zeros(shape)
+    growth, profit, not_yet = np.empty(shape), np.empty(shape), np.empty(shape, dtype=bool)
+    for t in range(YEARS * 12):
+        if t == 0:
+            np.copyto(growth, 1.0)
+        else:
+            # New customers × (1 + early_growth) while under GROWTH_THRESHOLD, × 1.05 after
+            np.copyto(growth, 1 + LATE_GROWTH)
+            np.copyto(growth, early, where=customers < GROWTH_THRESHOLD)
+        customers *= retention
+        customers += new_per_month * growth
+        np.multiply(customers, margin_per_customer, out=profit)
+        profit -= monthly_costs
+        year_revenue += customers * price
+        year_profit += profit
+        np.less(months_to_breakeven, 0, out=not_yet)
+        months_to_breakeven[not_yet & (profit > 0)] = t
+        if t % 12 == 11:
+            year = t // 12
+            annual_revenue[..., year] = year_revenue
+            annual_profit[..., year] = year_profit
+            year_end_customers[..., year] = customers
+            year_revenue[...] = 0
+            year_profit[...] = 0
+
+    cash = seed_money + annual_profit.sum(axis=-1)
+
+    status_code = np.select(
+        [(ltv_cac_ratio >= 3) & (runway_months > 12), ltv_cac_ratio >= 1.5, ltv_cac_ratio >= 1],
+        [3, 2, 1],
+        default=0
+    )
+
+    return {
+        "cac": np.broadcast_to(cac, shape),
+        "ltv": np.broadcast_to(ltv, shape),
+        "ltv_cac_ratio": np.broadcast_to(ltv_cac_ratio, shape),
+        "status_code": np.broadcast_to(status_code, shape),
+        "break_even_users": np.broadcast_to(break_even_users, shape),
+        "runway_months": np.where(cash > 0, np.floor(runway_months), 0).astype(np.int64),
+        "months_to_breakeven": months_to_breakeven,
+        "ending_cash": cash,
+        "cash_by_year": seed_money[..., None] + np.cumsum(annual_profit, axis=-1),
+        "annual_revenue": annual_revenue,
+        "annual_profit": annual_profit,
+        "customers": year_end_customers,
+    }
+
+
+def status_labels(status_code: np.ndarray) -> np.ndarray:
+    return STATUSES[status_code]
+
+
+def _bands(values: np.ndarray) -> List[Dict[str, float]]:
+    """P10 / P50 / P90 over the trajectory axis (0), one band per remaining entry."""
+    low, mid, high = np.percentile(values, RISK_PERCENTILES, axis=0)
+    return [
+        {"p10": round(float(a), 2), "p50": round(float(b), 2), "p90": round(float(c), 2)}
+        for a, b, c in zip(np.atleast_1d(low), np.atleast_1d(mid), np.atleast_1d(high))
+    ]
+
+
+def simulate_risk(
+    monthly_price: float,
+    ad_spend: float,
+    conversion_rate: float,
+    cost_structure: Optional[Iterable[Any]] = None,
+    trajectories: int = RISK_TRAJECTORIES,
+    seed: int = RISK_SEED
+) -> Dict[str, Any]:
+    """
+    Monte Carlo around one set of levers: `trajectories` 60-month runs with
+    churn, early growth, seed money and organic traffic drawn from
+    RISK_ASSUMPTIONS (seeded, so the same inputs give the same bands).
+
+    Months to break-even are counted as 1-based months; runs that never
+    break even count as after the horizon (None in the bands).
+    """
+    rng = np.random.default_rng(seed)
+    samples = {name: rng.triangular(*bounds, size=trajectories) for name, bounds in RISK_ASSUMPTIONS.items()}
+    fixed, variable = cost_model(cost_structure)
+    run = simulate(
+        monthly_price, ad_spend, conversion_rate, samples["churn_rate"],
+        fixed=fixed, variable=variable,
+        early_growth=samples["early_growth"],
+        seed_money=samples["seed_money"],
+        organic_leads=samples["organic_leads"]
+    )
+
+    horizon = YEARS * 12
+    breakeven = run["months_to_breakeven"]
+    months = np.where(breakeven >= 0, breakeven + 1, horizon + 1)
+    breakeven_band = {
+        key: (value if value <= horizon else None)
+        for key, value in _bands(months)[0].items()
+    }
+
+    return {
+        "trajectories": trajectories,
+        "seed": seed,
+        "revenue": _bands(run["annual_revenue"]),
+        "cash": _bands(run["cash_by_year"]),
+        "months_to_breakeven": breakeven_band,
+        "breakeven_probability": round(float((breakeven >= 0).mean()), 3),
+        "cash_out_probability": round(float((run["cash_by_year"].min(axis=-1) <= 0).mean()), 3),
+        "assumptions": {name: list(bounds) for name, bounds in RISK_ASSUMPTIONS.items()},
+    }
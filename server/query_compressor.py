@@ -0,0 +1,116 @@
+"""
+Local search-query compressor: the fast path of utils.optimize_query.
+
+Agents build Tavily queries by interpolating the whole user idea into
+templates ("{idea} market size TAM SAM CAGR ..."), which regularly goes over
+Tavily's 400 character limit. Most of the excess is prose: stop words,
+repeated words, generic filler. `compress_query` removes it locally in
+microseconds:
+    1. search operators (-aws, -"google cloud") and quoted phrases are kept as is
+    2. stop words (English + French) and repeated words are dropped
+    3. if still too long, the least informative words go first: generic
+       words from a small bundled list, then short plain words
+It returns None when it would have to drop too many content words
+(MAX_CONTENT_LOSS), so the caller can fall back to the LLM.
+"""
+import re
+from typing import List, Optional, Tuple
+
+MAX_CONTENT_LOSS = 0.35  # Share of content words we accept to drop
+
+# Quoted phrase (optionally negated), or any run of non-space characters
+_TOKEN_RE = re.compile(r'-?"[^"]*"|\S+')
+_EDGE_PUNCT = ".,;:!?()[]{}'`’“”«»"
+
+STOP_WORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being below between both
+but by can could did do does doing down during each either etc even ever every few for from further get gets got had
+has have having he her here hers him his how i if in into is it its itself just let like may me might more most must
+my no nor not now of off on once only or other our ours out over own per same she should so some such than that the
+their theirs them then there these they this those through to too under until up upon us very via was we were what
+when where which while who whom why will with within without would yet you your yours
+au aux avec ce ces cet cette dans de des du elle en et il ils je la le les leur leurs lui ma mais me mes moi mon ne
+nos notre nous on ou où par pas pour qu que qui sa se ses son sur ta te tes toi ton tu un une vos votre vous y
+""".split())
+
+# Generic startup-pitch vocabulary: dropped first when the query is still too long
+GENERIC_WORDS = frozenset("""
+ability able allow allows app application approach based best better build building builds built company companies
+easily easy enable enables everything existing experience features focus focused good great help helps idea including
+innovative instead make makes making many much need needs new offer offers one people platform powered product provide
+provides really service services simple smart solution solutions start startup system thing things tool tools use used
+user users uses using various want way ways work works
+""".split())
+
+
+def _normalize(token: str) -> str:
+    return token.strip(_EDGE_PUNCT).lower()
+
+
+def _is_operator(token: str) -> bool:
+    return token.startswith('"') or token.startswith('-') and len(token) > 1
+
+
+def _weight(word: str) -> float:
+    """Rough informativeness: generic < short < long, + names, numbers, acronyms."""
+    core = word.strip(_EDGE_PUNCT)
+    lower = core.lower()
+    if lower in GENERIC_WORDS:
+        return 0.0
+    if lower.endswith("ly") and len(lower) > 4:  # Adverbs ("automatically", "quickly")
+        return 0.1
+    weight = min(len(core), 10) / 10
+    if any(char.isdigit() for char in core):
+        weight += 1.0
+    if core[:1].isupper() or (len(core) > 1 and core.isupper()):
+        weight += 0.5
+    if "-" in core or "/" in core:
+        weight += 0.3
+    return weight
+
+
+def compress_query(query: str, max_length: int = 400) -> Optional[str]:
+    """`query` shortened to at most `max_length` characters, or None if that loses too much."""
+    if len(query) <= max_length:
+        return query
+
+    kept: List[Tuple[int, str]] = []  # (position, token)
+    content_words = set()
+    seen = set()
+    operators_length = 0
+    for position, token in enumerate(_TOKEN_RE.findall(query)):
+        if _is_operator(token):
+            kept.append((position, token))
+            operators_length += len(token) + 1
+            continue
+        word = _normalize(token)
+        if not word or word in STOP_WORDS:
+            continue
+        if word not in GENERIC_WORDS:
+            content_words.add(word)
+        if word in seen:
+            continue
+        seen.add(word)
+        kept.append((position, token.strip(_EDGE_PUNCT)))
+
+    length = sum(len(token) + 1 for _, token in kept) - 1
+    if length > max_length:
+        # Drop the least informative words first (later ones first on ties)
+        removable = sorted(
+            (item for item in kept if not _is_operator(item[1])),
+            key=lambda item: (_weight(item[1]), -item[0])
+        )
+        dropped = set()
+        for position, token in removable:
+            if length <= max_length:
+                break
+            dropped.add(position)
+            length -= len(token) + 1
+        kept = [item for item in kept if item[0] not in dropped]
+
+    if length > max_length or operators_length > max_length:
+        return None
+    remaining = {_normalize(token) for _, token in kept if not _is_operator(token)} & content_words
+    if content_words and 1 - len(remaining) / len(content_words) > MAX_CONTENT_LOSS:
+        return None
+    return " ".join(token for _, token in kept)
@@ -1,61 +1,110 @@
-
-import asyncio
+import argparse
+import json
 import os
+import time
+from datetime import datetime
 from dotenv import load_dotenv
 from sqlmodel import select, create_engine, Session
-from sqlalchemy.orm import sessionmaker
 
 # Load env variables (Supabase URL, Qdrant Keys)
 load_dotenv()
 
 from models import Project
-from database import upsert_vector, init_vector_db
+from database import upsert_vectors, init_vector_db
+from vector_indexer import project_vector_payload
+from embeddings import EMBEDDING_BATCH_SIZE
+
+CHECKPOINT_FILE = "reindex_checkpoint.json"
 
-# Connect to Supabase
-DATABASE_URL = os.getenv("DATABASE_URL")
+# Connect to Supabase (or the local SQLite fallback)
+DATABASE_URL = os.getenv("DATABASE_URL") or "sqlite:///./verdyct_v2.db"
+DATABASE_URL = DATABASE_URL.replace("sqlite+aiosqlite", "sqlite")
 if "postgresql+asyncpg" in DATABASE_URL:
     DATABASE_URL = DATABASE_URL.replace("postgresql+asyncpg", "postgresql")
-if "sslmode" not in DATABASE_URL:
+if DATABASE_URL.startswith("postgresql") and "sslmode" not in DATABASE_URL:
     separator = "&" if "?" in DATABASE_URL else "?"
     DATABASE_URL += f"{separator}sslmode=require"
 
 engine = create_engine(DATABASE_URL)
 
-def reindex():
+def load_checkpoint(path: str) -> dict:
+    if not os.path.exists(path):
+        return {"last_id": None, "indexed": 0, "skipped": 0}
+    with open(path) as f:
+        return json.load(f)
+
+def save_checkpoint(path: str, checkpoint: dict):
+    checkpoint["updated_at"] = datetime.utcnow().isoformat()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)  # Atomic: never leaves a half-written checkpoint
+
+def iter_project_batches(session: Session, after_id, batch_size: int):
+    """
+    Stream projects in primary-key order through a server-side cursor,
+    `batch_size` rows at a time, starting after `after_id`.
+    """
+    statement = (
+        select(Project)
+        .order_by(Project.id)
+        .execution_options(stream_results=True, yield_per=batch_size)
+    )
+    if after_id is not None:
+        statement = statement.where(Project.id > after_id)
+
+    result = session.exec(statement)
+    for partition in result.partitions(batch_size):
+        yield partition
+
+def reindex(batch_size: int = EMBEDDING_BATCH_SIZE, resume: bool = False, checkpoint_path: str = CHECKPOINT_FILE):
     print("🚀 Starting Vector Re-indexing...")
     print("🔹 Connecting to Supabase...")
-    
+
     # Init Qdrant Collection
     init_vector_db()
-    
+
+    checkpoint = load_checkpoint(checkpoint_path) if resume else {"last_id": None, "indexed": 0, "skipped": 0}
+    if checkpoint["last_id"]:
+        print(f"🔹 Resuming after project {checkpoint['last_id']} ({checkpoint['indexed']} already indexed).")
+
+    start = time.time()
+    indexed_this_run = 0
+
     with Session(engine) as session:
-        # Fetch all projects
-        projects = session.exec(select(Project)).all()
-        print(f"🔹 Found {len(projects)} projects to index.")
-        
-        count = 0
-        for project in projects:
-            if not project.raw_idea:
-                print(f"⚠️ Skipping project {project.id} (No raw idea)")
-                continue
-                
-            print(f"   Indexing: {project.id} ({project.status})...")
-            
-            try:
-                upsert_vector(
-                    text=project.raw_idea,
-                    metadata={
-                        "project_id": project.id, 
-                        "pos_score": project.pos_score, 
-                        "status": project.status
-                    },
-                    vector_id=project.id
-                )
-                count += 1
-            except Exception as e:
-                print(f"❌ Failed to index {project.id}: {e}")
-                
-        print(f"✅ Re-indexing Complete! {count}/{len(projects)} vectors processed.")
+        for rows in iter_project_batches(session, checkpoint["last_id"], batch_size):
+            items = []
+            for project in rows:
+                if not project.raw_idea:
+                    print(f"⚠️ Skipping project {project.id} (No raw idea)")
+                    checkpoint["skipped"] += 1
+                    continue
+                items.append({
+                    "text": project.raw_idea,
+                    "metadata": project_vector_payload(project),
+                    "vector_id": project.id
+                })
+
+            sent = upsert_vectors(items, batch_size=batch_size, wait=False)
+            if items and sent == 0:
+                # Keep the checkpoint where it is so --resume retries this batch
+                raise RuntimeError(f"Failed to index batch starting at {rows[0].id}")
+
+            checkpoint["last_id"] = rows[-1].id
+            checkpoint["indexed"] += sent
+            indexed_this_run += sent
+            save_checkpoint(checkpoint_path, checkpoint)
+
+            rate = indexed_this_run / max(time.time() - start, 1e-6)
+            print(f"   Indexed {checkpoint['indexed']} (last: {checkpoint['last_id']}, {rate:.0f} vectors/s)")
+
+    print(f"✅ Re-indexing Complete! {checkpoint['indexed']} vectors processed, {checkpoint['skipped']} skipped in {time.time() - start:.1f}s.")
 
 if __name__ == "__main__":
-    reindex()
+    parser = argparse.ArgumentParser(description="Rebuild the Qdrant idea collection from the projects table.")
+    parser.add_argument("--batch-size", type=int, default=EMBEDDING_BATCH_SIZE, help="Projects embedded/upserted per batch")
+    parser.add_argument("--resume", action="store_true", help="Continue from the last checkpoint")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE, help="Checkpoint file path")
+    args = parser.parse_args()
+
+    reindex(batch_size=args.batch_size, resume=args.resume, checkpoint_path=args.checkpoint)
@@ -0,0 +1,133 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import Response, StreamingResponse
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import metrics
+from artifact_store import ArtifactNotFound, artifact_store
+from auth import verify_token
+from database import get_session
+from models import Project
+
+router = APIRouter()
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def project_artifacts(report: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """The code artifact references of a stored report (Architect MVP)."""
+    architect = ((report or {}).get("agents") or {}).get("architect") or {}
+    return (architect.get("mvp_status") or {}).get("code_artifacts") or []
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    (start, end) inclusive for a single `bytes=` range, None to send the
+    whole artifact (no header, or several ranges). 416 if unsatisfiable.
+    """
+    if not header or "," in header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        raise HTTPException(status_code=416, detail="Invalid range", headers={"Content-Range": f"bytes */{size}"})
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the last N bytes
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise HTTPException(status_code=416, detail="Range not satisfiable", headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+
+async def _load_artifacts(project_id: str, session: AsyncSession, viewer_id: str) -> List[Dict[str, Any]]:
+    statement = select(Project).where(Project.id == project_id)
+    result = await session.exec(statement)
+    project = result.first()
+
+    if not project or (project.user_id != viewer_id and not project.is_public):
+        raise HTTPException(status_code=404, detail="Project not found")
+    return project_artifacts(project.report_json)
+
+
+@router.get("/api/projects/{project_id}/artifacts")
+async def list_artifacts(
+    project_id: str,
+    session: AsyncSession = Depends(get_session),
+    user: tuple = Depends(verify_token)
+):
+    """Generated files of the project (path, key, size, content type), without their content."""
+    user_payload, _ = user
+    artifacts = await _load_artifacts(project_id, session, user_payload['sub'])
+    return {"project_id": project_id, "artifacts": artifacts}
+
+
+def artifact_response(key: str, range_header: Optional[str] = None, accept_encoding: Optional[str] = None, if_none_match: Optional[str] = None) -> Response:
+    """
+    Download response for one artifact: 304 on a matching ETag (the key is
+    the content hash), the stored gzip bytes as is when the client accepts
+    gzip and wants the whole file, otherwise raw bytes streamed from the
+    decompressor, as a 206 when a range is asked.
+    """
+    try:
+        info = artifact_store.info(key)
+    except ArtifactNotFound:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+
+    etag = f'"{info.key}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, max-age=31536000, immutable",
+        "Vary": "Accept-Encoding",
+    }
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    byte_range = parse_range(range_header, info.size)
+    if byte_range is None and "gzip" in (accept_encoding or ""):
+        metrics.incr("artifacts.downloads.gzip")
+        return StreamingResponse(
+            artifact_store.stream_compressed(key),
+            media_type=info.content_type,
+            headers={**headers, "Content-Encoding": "gzip", "Content-Length": str(info.compressed_size)}
+        )
+
+    if byte_range is None:
+        metrics.incr("artifacts.downloads.full")
+        return StreamingResponse(
+            artifact_store.stream(key),
+            media_type=info.content_type,
+            headers={**headers, "Content-Length": str(info.size)}
+        )
+
+    start, end = byte_range
+    metrics.incr("artifacts.downloads.range")
+    return StreamingResponse(
+        artifact_store.stream(key, start, end),
+        status_code=206,
+        media_type=info.content_type,
+        headers={**headers, "Content-Range": f"bytes {start}-{end}/{info.size}", "Content-Length": str(end - start + 1)}
+    )
+
+
+@router.get("/api/projects/{project_id}/artifacts/{key}")
+async def download_artifact(
+    project_id: str,
+    key: str,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    accept_encoding: Optional[str] = Header(None, alias="Accept-Encoding"),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+    session: AsyncSession = Depends(get_session),
+    user: tuple = Depends(verify_token)
+):
+    """One generated file, streamed (Range, gzip and If-None-Match supported)."""
+    user_payload, _ = user
+    artifacts = await _load_artifacts(project_id, session, user_payload['sub'])
+    if not any(ref.get("key") == key for ref in artifacts):
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    return artifact_response(key, range_header, accept_encoding, if_none_match)
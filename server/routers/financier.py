@@ -0,0 +1,171 @@
+import asyncio
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import metrics
+from agents.financier import calculate_projections, format_financier_metrics
+from auth import verify_token
+from database import get_session
+from models import LeverRecomputeRequest, Metrics, Project, RevenueProjection
+from projections import DEFAULT_CHURN, STATUSES, YEARS, cost_model, project_grid
+
+router = APIRouter()
+
+MAX_SCENARIOS = 50_000
+MAX_STEPS = 50
+DEFAULT_CHURNS = "0.03,0.05,0.08"
+RECOMPUTE_CACHE_SIZE = 4096
+
+
+def _axis(lever: Dict[str, Any], steps: int) -> List[float]:
+    """`steps` evenly spaced values over the lever's slider range (always including its current value)."""
+    low, high = float(lever.get("min", 0)), float(lever.get("max", 0))
+    if high < low:
+        low, high = high, low
+    values = np.linspace(low, high, steps) if steps > 1 else np.array([float(lever.get("value", low))])
+    values = np.append(values, float(lever.get("value", low)))
+    return np.unique(values.round(4)).tolist()
+
+
+def _parse_churns(raw: str) -> List[float]:
+    try:
+        churns = sorted({float(value) for value in raw.split(",") if value.strip()})
+    except ValueError:
+        raise HTTPException(status_code=422, detail="churn must be a comma-separated list of rates (e.g. 0.03,0.05)")
+    if not churns or any(not 0 < churn <= 1 for churn in churns):
+        raise HTTPException(status_code=422, detail="churn rates must be in (0, 1]")
+    return churns
+
+
+def scenario_surface(financier: Dict[str, Any], price_steps: int, ad_spend_steps: int, conversion_steps: int, churns: List[float]) -> Dict[str, Any]:
+    """Evaluate the lever grid of a stored financier report (blocking, NumPy)."""
+    levers = financier["profit_engine"]["levers"]
+    axes = {
+        "monthly_price": _axis(levers["monthly_price"], price_steps),
+        "ad_spend": _axis(levers["ad_spend"], ad_spend_steps),
+        "conversion_rate": _axis(levers["conversion_rate"], conversion_steps),
+        "churn_rate": churns,
+    }
+    size = int(np.prod([len(values) for values in axes.values()]))
+    if size > MAX_SCENARIOS:
+        raise HTTPException(status_code=422, detail=f"Grid too large ({size} scenarios, max {MAX_SCENARIOS})")
+
+    start = time.perf_counter()
+    grid = project_grid(*axes.values(), cost_structure=financier.get("cost_structure"))
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    # Axis order of every metric: monthly_price, ad_spend, conversion_rate, churn_rate
+    return {
+        "axes": axes,
+        "shape": [len(values) for values in axes.values()],
+        "scenarios": size,
+        "compute_ms": round(elapsed_ms, 2),
+        "status_labels": STATUSES.tolist(),
+        "metrics": {
+            "ltv_cac_ratio": np.nan_to_num(grid["ltv_cac_ratio"], posinf=0).round(2).tolist(),
+            "cac": grid["cac"].round(2).tolist(),
+            "status": grid["status_code"].tolist(),
+            "months_to_breakeven": grid["months_to_breakeven"].tolist(),
+            "ending_cash": grid["ending_cash"].round(0).tolist(),
+            f"year_{YEARS}_revenue": grid["annual_revenue"][..., -1].round(0).tolist(),
+            f"year_{YEARS}_profit": grid["annual_profit"][..., -1].round(0).tolist(),
+            f"year_{YEARS}_customers": grid["customers"][..., -1].astype(int).tolist(),
+        },
+    }
+
+
+@lru_cache(maxsize=RECOMPUTE_CACHE_SIZE)
+def recompute_levers(
+    monthly_price: float, ad_spend: float, conversion_rate: float, churn_rate: float, fixed_costs: float, variable_costs: float
+) -> Tuple[Metrics, RevenueProjection]:
+    """
+    Metrics and projections for one lever tuple. The costs only enter the
+    model as (fixed, variable per user), so they are part of the key instead
+    of the whole cost structure: identical what-ifs are shared across projects.
+    """
+    costs = [
+        {"monthly_amount": fixed_costs, "is_variable": False},
+        {"monthly_amount": variable_costs, "is_variable": True},
+    ]
+    calculations = calculate_projections(monthly_price, ad_spend, conversion_rate, costs, churn_rate=churn_rate)
+    return Metrics(**format_financier_metrics(calculations)), RevenueProjection(projections=calculations["projections"])
+
+
+async def _load_financier(project_id: str, session: AsyncSession, viewer_id: str) -> Dict[str, Any]:
+    """The stored financier report of a project the viewer can see (404 otherwise)."""
+    statement = select(Project).where(Project.id == project_id)
+    result = await session.exec(statement)
+    project = result.first()
+
+    if not project or (project.user_id != viewer_id and not project.is_public):
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    financier: Optional[Dict[str, Any]] = ((project.report_json or {}).get("agents") or {}).get("financier")
+    if not financier or not (financier.get("profit_engine") or {}).get("levers"):
+        raise HTTPException(status_code=404, detail="No financier analysis for this project")
+    return financier
+
+
+@router.get("/api/projects/{project_id}/financier/scenarios")
+async def financier_scenarios(
+    project_id: str,
+    price_steps: int = Query(11, ge=1, le=MAX_STEPS),
+    ad_spend_steps: int = Query(11, ge=1, le=MAX_STEPS),
+    conversion_steps: int = Query(11, ge=1, le=MAX_STEPS),
+    churn: str = Query(DEFAULT_CHURNS, description=f"Comma-separated monthly churn rates (default model: {DEFAULT_CHURN})"),
+    session: AsyncSession = Depends(get_session),
+    user: tuple = Depends(verify_token)
+):
+    """
+    What-if surface for the Financier sliders: the projection model evaluated
+    over a price × ad_spend × conversion × churn grid spanning the levers'
+    ranges, in one call and without any LLM.
+    """
+    user_payload, _ = user
+    financier = await _load_financier(project_id, session, user_payload['sub'])
+
+    surface = await asyncio.to_thread(
+        scenario_surface, financier, price_steps, ad_spend_steps, conversion_steps, _parse_churns(churn)
+    )
+    return {"project_id": project_id, **surface}
+
+
+@router.post("/api/projects/{project_id}/financier/recompute")
+async def financier_recompute(
+    project_id: str,
+    levers: LeverRecomputeRequest,
+    session: AsyncSession = Depends(get_session),
+    user: tuple = Depends(verify_token)
+):
+    """
+    Slider edits: Metrics and RevenueProjection for the edited levers against
+    the project's stored cost structure. Deterministic engine only (no
+    Tavily, no LLM), memoized per lever tuple; a fresh point takes ~1 ms, so
+    it runs inline.
+    """
+    user_payload, _ = user
+    financier = await _load_financier(project_id, session, user_payload['sub'])
+    fixed_costs, variable_costs = cost_model(financier.get("cost_structure"))
+
+    start = time.perf_counter()
+    hits = recompute_levers.cache_info().hits
+    result_metrics, revenue_projection = recompute_levers(
+        levers.monthly_price, levers.ad_spend, levers.conversion_rate, levers.churn_rate, fixed_costs, variable_costs
+    )
+    cached = recompute_levers.cache_info().hits > hits
+    metrics.incr("financier.recompute.hits" if cached else "financier.recompute.misses")
+
+    return {
+        "project_id": project_id,
+        "levers": levers.model_dump(),
+        "metrics": result_metrics.model_dump(),
+        "revenue_projection": revenue_projection.model_dump(),
+        "cached": cached,
+        "compute_ms": round((time.perf_counter() - start) * 1000, 3),
+    }
@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from auth import verify_token
+from cta_funnel import compile_matcher
+from database import get_session
+from models import CTAFunnelDaily, Project
+
+router = APIRouter()
+
+MAX_DAYS = 365
+
+
+def _click_through(cta_clicks: int, clicks: int) -> float:
+    return round(cta_clicks / clicks, 4) if clicks else 0.0
+
+
+def funnel_summary(rows: List[CTAFunnelDaily]) -> Dict[str, Any]:
+    """Totals and per-day series from the daily counters (oldest day first)."""
+    clicks = sum(row.clicks for row in rows)
+    cta_clicks = sum(row.cta_clicks for row in rows)
+    return {
+        "totals": {"clicks": clicks, "cta_clicks": cta_clicks, "click_through": _click_through(cta_clicks, clicks)},
+        "daily": [
+            {"day": row.day, "clicks": row.clicks, "cta_clicks": row.cta_clicks, "click_through": _click_through(row.cta_clicks, row.clicks)}
+            for row in rows
+        ]
+    }
+
+
+@router.get("/api/projects/{project_id}/funnel")
+async def get_cta_funnel(
+    project_id: str,
+    days: int = Query(30, ge=1, le=MAX_DAYS),
+    session: AsyncSession = Depends(get_session),
+    user: tuple = Depends(verify_token)
+):
+    """
+    CTA click-through of a project: clicks on the verified CTA vs all pixel
+    clicks, per day over the last `days` days. Reads the counters maintained
+    at ingest (cta_funnel.py), never the raw events.
+    """
+    user_payload, _ = user
+    statement = select(Project).where(Project.id == project_id, Project.user_id == user_payload['sub'])
+    project = (await session.exec(statement)).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    since = (datetime.utcnow() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+    rows = (await session.exec(
+        select(CTAFunnelDaily)
+        .where(CTAFunnelDaily.project_id == project_id, CTAFunnelDaily.day >= since)
+        .order_by(CTAFunnelDaily.day)
+    )).all()
+
+    matcher = compile_matcher(project.cta_selector, project.cta_text)
+    return {
+        "project_id": project_id,
+        "cta": {
+            "text": project.cta_text,
+            "selector": project.cta_selector,
+            "last_verified": project.last_verified,
+            "matched_by": matcher.kind if matcher else None,
+        },
+        "days": days,
+        **funnel_summary(rows)
+    }
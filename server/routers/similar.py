@@ -0,0 +1,129 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import metrics
+from auth import verify_token
+from database import get_session, search_similar
+from models import Project
+from vector_indexer import vector_indexer
+
+router = APIRouter()
+
+SIMILAR_CACHE_TTL_SECONDS = 300
+SIMILAR_CACHE_MAX_ENTRIES = 1024
+MAX_SIMILAR_RESULTS = 20
+
+
+class _SimilarCache:
+    """
+    Small in-process LRU for similarity results. Entries remember the
+    indexer version they were computed at and are dropped as soon as new
+    vectors land (vector_indexer.version moves), or after the TTL.
+    """
+
+    def __init__(self, max_entries: int = SIMILAR_CACHE_MAX_ENTRIES, ttl_seconds: float = SIMILAR_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple, Tuple[int, float, List[Dict[str, Any]]]]" = OrderedDict()
+
+    def get(self, key: Tuple) -> Optional[List[Dict[str, Any]]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            metrics.incr("similar.cache.misses")
+            return None
+        version, stored_at, results = entry
+        if version != vector_indexer.version or time.time() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            metrics.incr("similar.cache.misses")
+            return None
+        self._entries.move_to_end(key)
+        metrics.incr("similar.cache.hits")
+        return results
+
+    def set(self, key: Tuple, results: List[Dict[str, Any]]):
+        self._entries[key] = (vector_indexer.version, time.time(), results)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+similar_cache = _SimilarCache()
+
+
+def _format_hit(hit: Dict[str, Any]) -> Dict[str, Any]:
+    payload = hit.get("metadata") or {}
+    return {
+        "project_id": payload.get("project_id", hit.get("id")),
+        "name": payload.get("name"),
+        "idea": hit.get("document") or payload.get("text"),
+        "summary": payload.get("summary"),
+        "pos_score": payload.get("pos_score"),
+        "status": payload.get("status"),
+        "is_public": payload.get("is_public", False),
+        "similarity": round(hit.get("score") or 0.0, 4),
+    }
+
+
+async def _search(cache_key: Tuple, text: str, limit: int, status: Optional[str], viewer_id: str, exclude_id: Optional[str] = None):
+    results = similar_cache.get(cache_key)
+    if results is None:
+        # Embedding + HNSW search are blocking: keep them off the event loop
+        hits = await asyncio.to_thread(
+            search_similar, text, limit, status=status, viewer_id=viewer_id, exclude_id=exclude_id
+        )
+        results = [_format_hit(hit) for hit in hits]
+        similar_cache.set(cache_key, results)
+    return results
+
+
+@router.get("/api/projects/{project_id}/similar")
+async def similar_projects(
+    project_id: str,
+    limit: int = Query(5, ge=1, le=MAX_SIMILAR_RESULTS),
+    status: Optional[str] = Query(None, description="'approved' or 'rejected'"),
+    session: AsyncSession = Depends(get_session),
+    user: tuple = Depends(verify_token)
+):
+    """
+    Prior analyses similar to this project (public ones and the user's own).
+    """
+    user_payload, _ = user
+    viewer_id = user_payload['sub']
+
+    statement = select(Project).where(Project.id == project_id)
+    result = await session.exec(statement)
+    project = result.first()
+
+    if not project or (project.user_id != viewer_id and not project.is_public):
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    cache_key = ("project", project_id, viewer_id, limit, status)
+    results = await _search(cache_key, project.raw_idea, limit, status, viewer_id, exclude_id=project_id)
+    return {"project_id": project_id, "results": results}
+
+
+@router.get("/api/ideas/similar")
+async def similar_ideas(
+    q: str = Query(..., min_length=3, max_length=5000, description="Idea text to compare before submitting"),
+    limit: int = Query(5, ge=1, le=MAX_SIMILAR_RESULTS),
+    status: Optional[str] = Query(None, description="'approved' or 'rejected'"),
+    user: tuple = Depends(verify_token)
+):
+    """
+    Pre-submission check: existing analyses close to an idea, so users can
+    open a prior report instead of paying for a new one.
+    """
+    user_payload, _ = user
+    viewer_id = user_payload['sub']
+
+    query_hash = hashlib.sha256(q.strip().lower().encode("utf-8")).hexdigest()
+    cache_key = ("query", query_hash, viewer_id, limit, status)
+    results = await _search(cache_key, q.strip(), limit, status, viewer_id)
+    return {"query": q, "results": results}
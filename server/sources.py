@@ -0,0 +1,173 @@
+"""
+Source registry: the structured side of a formatted research context.
+
+Agents build their prompt context from Tavily results (`[SOURCE n]` blocks,
+see utils.format_tavily_context). A `SourceRegistry` builds that same text
+and, at the same time, records one compact `Source` per result (url, title,
+where its content sits in the text). URL validation of the LLM output is
+then a dict lookup instead of re-parsing the context with a regex.
+"""
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+from text_normalize import clean_text, result_fields
+
+# Only for contexts that arrive as plain text (see SourceRegistry.from_context)
+_SOURCE_BLOCK_RE = re.compile(r"\[SOURCE \d+\].*?VERIFIED_URL: ([^\n]*)", re.DOTALL)
+
+
+class Source:
+    __slots__ = ("id", "url", "title", "offset", "length", "group")
+
+    def __init__(self, id: int, url: str, title: str, offset: int, length: int, group: str = ""):
+        self.id = id
+        self.url = url
+        self.title = title
+        self.offset = offset  # Start of the [SOURCE n] block in the registry text
+        self.length = length  # Length of the block, up to the VERIFIED_URL line
+        self.group = group  # Header text written before it (e.g. "--- HubSpot PRICING ---")
+
+    def __repr__(self) -> str:
+        return f"Source(id={self.id}, url={self.url!r})"
+
+
+class SourceRegistry:
+    """
+    Formatted context text + the sources it contains.
+
+        registry = SourceRegistry()
+        registry.add_results(tavily_results)
+        registry.add_text("\\n\\n--- HubSpot PRICING ---\\n")
+        registry.add_results(more_results)
+        prompt = registry.text
+        "https://..." in registry  # URL validation
+    """
+
+    __slots__ = ("_parts", "_length", "_text", "sources", "_by_url", "_group")
+
+    def __init__(self):
+        self._parts: List[str] = []
+        self._length = 0
+        self._text: Optional[str] = ""
+        self.sources: List[Source] = []
+        self._by_url: Dict[str, Source] = {}
+        self._group = ""
+
+    # ---------- Building ----------
+
+    def _write(self, chunk: str):
+        self._parts.append(chunk)
+        self._length += len(chunk)
+        self._text = None
+
+    def add_text(self, text: str) -> "SourceRegistry":
+        """Append free text (headers, separators) to the context."""
+        if text:
+            self._write(text)
+            if text.strip():
+                self._group = text.strip()
+        return self
+
+    def add_results(self, results: Iterable[Any]) -> "SourceRegistry":
+        """
+        Append Tavily results as `[SOURCE n]` blocks (numbered per call,
+        exactly like format_tavily_context) and register each one.
+        """
+        first = True
+        for idx, result in enumerate(results or [], 1):
+            if not isinstance(result, dict) and not hasattr(result, "__dict__"):
+                continue
+            title, content, url = result_fields(result)
+            title = clean_text(title)
+            content = clean_text(content)
+            if not (title or content):
+                continue
+            if not first:
+                self._write("\n\n")
+            first = False
+            self._add_block(idx, f"Title: {title}\nContent: {content}\n", clean_text(url), title)
+        return self
+
+    def add_block(self, idx: int, body: str, url: str, title: str = "") -> Source:
+        """
+        Append an already formatted block body ("Title: ...\nContent: ...\n",
+        see body()) as `[SOURCE idx]`. Used to repack sources into a new context.
+        """
+        return self._add_block(idx, body, url, title)
+
+    def _add_block(self, idx: int, body: str, url: str, title: str) -> Source:
+        offset = self._length
+        head = f"[SOURCE {idx}]\n{body}"
+        self._write(head)
+        self._write(f"VERIFIED_URL: {url}\n---")
+        source = Source(len(self.sources), url, title, offset, len(head), self._group)
+        self._register(source)
+        return source
+
+    @classmethod
+    def from_context(cls, context: str) -> "SourceRegistry":
+        """
+        Registry for an already formatted context string (callers that only
+        have the text). Parses it once; prefer building the registry at
+        search time.
+        """
+        registry = cls()
+        if not context:
+            return registry
+        registry._write(context)
+        for match in _SOURCE_BLOCK_RE.finditer(context):
+            url = match.group(1).strip()
+            url_start = match.start(1) - len("VERIFIED_URL: ")
+            registry._register(Source(len(registry.sources), url, "", match.start(), url_start - match.start()))
+        return registry
+
+    def _register(self, source: Source):
+        self.sources.append(source)
+        if source.url and source.url not in self._by_url:
+            self._by_url[source.url] = source
+
+    # ---------- Reading ----------
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = "".join(self._parts)
+            self._parts = [self._text]
+        return self._text
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._by_url
+
+    def __len__(self) -> int:
+        return len(self._by_url)
+
+    def __bool__(self) -> bool:
+        return self._length > 0
+
+    def urls(self) -> List[str]:
+        """Distinct non-empty URLs, in first-seen order."""
+        return list(self._by_url)
+
+    def get(self, url: str) -> Optional[Source]:
+        return self._by_url.get(url)
+
+    def block(self, source: Source) -> str:
+        """The source's `[SOURCE n] Title/Content` block from the text."""
+        return self.text[source.offset:source.offset + source.length]
+
+    def body(self, source: Source) -> str:
+        """The block without its `[SOURCE n]` line."""
+        block = self.block(source)
+        return block[block.find("\n") + 1:]
+
+
+def collect_urls(*registries: Optional[SourceRegistry]) -> Dict[str, Source]:
+    """{url: Source} across several registries (first occurrence wins)."""
+    urls: Dict[str, Source] = {}
+    for registry in registries:
+        if not registry:
+            continue
+        for source in registry.sources:
+            if source.url and source.url not in urls:
+                urls[source.url] = source
+    return urls
@@ -0,0 +1,132 @@
+"""
+Analyst DAG: nodes run as soon as their dependencies are done, share one
+prompt prefix (same response schema, same first message) and merge into the
+usual AnalystResponse. Uses a fake OpenAI client; no API calls.
+
+Run: python test_analyst_dag.py  (or pytest)
+"""
+import os
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+import metrics
+from agents import analyst
+from models import (
+    AnalystCore, AnalystGTM, AnalystRisks, AnalystSEO, AnalystStepOutput, AnalystUnitEconomics, AnalystVerdict,
+    AnalystFooter, ScoreCard, SEOOpportunity, Keyword, MarketMetric, IdealCustomerPersona, PersonaDetails
+)
+
+NODE_DELAY = 0.1
+
+
+def fake_output(field):
+    """Minimal valid node outputs (only what the final Analyst model validates)."""
+    outputs = {
+        "core": AnalystCore.model_construct(
+            market_metrics=[MarketMetric(name="TAM", value="$1B", change_percentage="+5%", note="", verified_url="https://a.com")],
+            value_proposition="Less admin",
+            ideal_customer_persona=IdealCustomerPersona(
+                title="ICP", subtitle="", persona_name="Dr. D", persona_role="Dentist", persona_department="Clinic",
+                persona_quote="", details=PersonaDetails(age_range="", income="", education="", team_size=""),
+                pain_points=[], jobs_to_be_done=[], where_to_find=[]
+            ),
+            competitors_preview=[],
+            market_overview="Bloodbath",
+        ),
+        "gtm": AnalystGTM.model_construct(market_segments=[], marketing_playbook=None, gtm_action_plan=None),
+        "unit_economics": AnalystUnitEconomics.model_construct(unit_economics_preview=None),
+        "risks": AnalystRisks.model_construct(risk_validation=None),
+        "seo": AnalystSEO.model_construct(seo_opportunity=SEOOpportunity(
+            title="SEO", subtitle="", high_opportunity_keywords=[Keyword(keyword="dental crm", opportunity_level="High")]
+        )),
+        "verdict": AnalystVerdict.model_construct(
+            score_card=ScoreCard(title="", level="", description=""),
+            analyst_footer=AnalystFooter(
+                verdyct_summary="VERDICT: CROWDED.", scoring_breakdown=[], data_confidence_level="Medium",
+                recommendation_title="", recommendation_text=""
+            ),
+            pcs_score=42,
+        ),
+    }
+    return AnalystStepOutput.model_construct(**{name: outputs[name] if name == field else None for name in outputs})
+
+
+class FakeCompletions:
+    def __init__(self):
+        self.calls = []
+        self.intervals = {}
+        self._lock = threading.Lock()
+
+    def parse(self, **kwargs):
+        field = re.search(r"Fill the `(\w+)` field", kwargs["messages"][1]["content"]).group(1)
+        start = time.time()
+        time.sleep(NODE_DELAY)
+        with self._lock:
+            first = not self.calls
+            self.calls.append((field, kwargs))
+            self.intervals[field] = (start, time.time())
+        usage = SimpleNamespace(
+            prompt_tokens=3000,
+            completion_tokens=500,
+            prompt_tokens_details=SimpleNamespace(cached_tokens=0 if first else 2048),
+        )
+        return SimpleNamespace(usage=usage, choices=[SimpleNamespace(message=SimpleNamespace(parsed=fake_output(field)))])
+
+
+def run_with_fake_client(func):
+    fake = FakeCompletions()
+    original = analyst.openai_client
+    analyst.openai_client = SimpleNamespace(beta=SimpleNamespace(chat=SimpleNamespace(completions=fake)))
+    try:
+        return fake, func()
+    finally:
+        analyst.openai_client = original
+
+
+def test_dag_runs_in_parallel_and_merges():
+    metrics.reset()
+    events = []
+    idea, context = "CRM for dentists", "[SOURCE 1]\nTitle: Dental CRM\nContent: ...\nVERIFIED_URL: https://a.com\n---"
+    start = time.time()
+    fake, response = run_with_fake_client(lambda: analyst.generate_analysis(idea, context, on_node=events.append))
+    elapsed = time.time() - start
+
+    # 6 nodes, 3 levels deep: roughly 3 node delays, not 6
+    assert len(fake.calls) == 6
+    assert elapsed < NODE_DELAY * 5
+    for node in analyst.ANALYST_DAG:
+        for dep in node.depends_on:
+            assert fake.intervals[dep][1] <= fake.intervals[node.name][0]
+    assert "UPSTREAM ANALYSIS" in dict(fake.calls)["verdict"]["messages"][1]["content"]
+
+    # Shared prefix: same schema and first message for every node
+    assert {kwargs["messages"][0]["content"] for _, kwargs in fake.calls} == {analyst.build_shared_prefix(idea, context)}
+    assert {kwargs["response_format"] for _, kwargs in fake.calls} == {AnalystStepOutput}
+    assert metrics.get("llm.cached_tokens.analyst") == 5 * 2048
+
+    assert sorted(event["node"] for event in events) == sorted(node.name for node in analyst.ANALYST_DAG)
+    assert events[-1]["node"] == "verdict" and events[-1]["depends_on"] == ["core", "gtm", "unit_economics", "risks"]
+
+    assert response.analyst.pcs_score == 42
+    assert response.analyst.market_overview == "Bloodbath"
+    assert response.analyst.seo_opportunity.high_opportunity_keywords[0].keyword == "dental crm"
+
+
+def test_dag_rejects_unknown_dependency():
+    bad = [analyst.AnalystNode(name="verdict", label="", instructions="", task="", depends_on=("core",))]
+    try:
+        analyst._check_dag(bad)
+    except ValueError:
+        return
+    raise AssertionError("Expected ValueError")
+
+
+if __name__ == "__main__":
+    test_dag_runs_in_parallel_and_merges()
+    test_dag_rejects_unknown_dependency()
+    print("✅ Analyst DAG tests passed.")
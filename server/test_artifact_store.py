@@ -0,0 +1,120 @@
+"""
+artifact_store: content addressing, dedup, gzip storage and byte ranges
+streamed across decompression chunks; routers.artifacts serves them with
+Range / gzip / ETag.
+
+Run: python test_artifact_store.py  (or pytest)
+"""
+import gzip
+import os
+import random
+import tempfile
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+from fastapi import FastAPI, Header
+from fastapi.testclient import TestClient
+
+import metrics
+import routers.artifacts as artifacts_router
+from artifact_store import ArtifactStore, LocalBackend
+from routers.artifacts import artifact_response, parse_range, project_artifacts
+
+
+def make_store() -> ArtifactStore:
+    return ArtifactStore(LocalBackend(tempfile.mkdtemp()))
+
+
+def big_html() -> bytes:
+    rng = random.Random(0)
+    words = ["<div>", "</div>", "class", "button", "hero", "section", "Verdyct", "MVP", "\n"]
+    return " ".join(rng.choice(words) for _ in range(200_000)).encode()  # ~1 MB, several chunks
+
+
+def test_put_is_content_addressed_and_deduplicated():
+    store = make_store()
+    metrics.reset()
+    first = store.put_text("<h1>MVP</h1>", "text/html")
+    again = store.put_text("<h1>MVP</h1>", "text/html")
+    other = store.put_text("<h1>MVP v2</h1>", "text/html")
+    assert first == again and first.key != other.key
+    assert first.content_type == "text/html; charset=utf-8"
+    assert metrics.get("artifacts.dedup.hits") == 1 and metrics.get("artifacts.dedup.misses") == 2
+    assert store.read(first.key) == b"<h1>MVP</h1>"
+
+    data = big_html()
+    info = store.put(data, "text/html")
+    assert info.size == len(data) and info.compressed_size < len(data) / 3
+    assert gzip.decompress(b"".join(store.stream_compressed(info.key))) == data
+
+
+def test_ranges_across_chunks():
+    store = make_store()
+    data = big_html()
+    key = store.put(data).key
+    size = len(data)
+    for start, end in [(0, 0), (0, 99), (65_530, 65_600), (100_000, 400_000), (size - 10, size - 1), (0, size - 1)]:
+        assert b"".join(store.stream(key, start, end)) == data[start:end + 1], (start, end)
+    assert b"".join(store.stream(key, size - 5)) == data[-5:]
+
+    assert parse_range(None, size) is None and parse_range("bytes=0-1,5-6", size) is None
+    assert parse_range("bytes=10-", 100) == (10, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=50-500", 100) == (50, 99)
+    for bad in ("bytes=100-", "bytes=5-2", "items=0-1", "bytes=-"):
+        try:
+            parse_range(bad, 100)
+            assert False, bad
+        except Exception as e:
+            assert e.status_code == 416
+
+
+def test_download_responses():
+    store = make_store()
+    original, artifacts_router.artifact_store = artifacts_router.artifact_store, store
+    try:
+        _check_download_responses(store)
+    finally:
+        artifacts_router.artifact_store = original
+
+
+def _check_download_responses(store: ArtifactStore):
+    data = big_html()
+    info = store.put(data, "text/html")
+
+    app = FastAPI()
+
+    @app.get("/a/{key}")
+    def download(key: str, range_header: str = Header(None, alias="Range"), if_none_match: str = Header(None, alias="If-None-Match"), accept_encoding: str = Header(None, alias="Accept-Encoding")):
+        return artifact_response(key, range_header, accept_encoding, if_none_match)
+
+    client = TestClient(app)
+    full = client.get(f"/a/{info.key}", headers={"Accept-Encoding": "identity"})
+    assert full.status_code == 200 and full.content == data and full.headers["etag"] == f'"{info.key}"'
+
+    gzipped = client.get(f"/a/{info.key}", headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["content-encoding"] == "gzip" and gzipped.content == data  # httpx decodes it
+
+    partial = client.get(f"/a/{info.key}", headers={"Range": "bytes=1000-1999", "Accept-Encoding": "gzip"})
+    assert partial.status_code == 206 and partial.content == data[1000:2000]
+    assert partial.headers["content-range"] == f"bytes 1000-1999/{len(data)}"
+
+    assert client.get(f"/a/{info.key}", headers={"If-None-Match": f'"{info.key}"'}).status_code == 304
+    assert client.get(f"/a/{info.key}", headers={"Range": f"bytes={len(data)}-"}).status_code == 416
+    assert client.get("/a/" + "0" * 64).status_code == 404
+
+
+def test_project_artifacts_from_report():
+    refs = [{"path": "index.html", "key": "abc", "size": 3, "content_type": "text/html"}]
+    report = {"agents": {"architect": {"mvp_status": {"code_artifacts": refs}}}}
+    assert project_artifacts(report) == refs
+    assert project_artifacts(None) == [] and project_artifacts({"agents": {"architect": None}}) == []
+
+
+if __name__ == "__main__":
+    test_put_is_content_addressed_and_deduplicated()
+    test_ranges_across_chunks()
+    test_download_responses()
+    test_project_artifacts_from_report()
+    print("✅ Artifact store tests passed.")
@@ -0,0 +1,98 @@
+"""
+Context packing: budgets are respected, duplicates dropped, every section
+keeps a source, and the packed text keeps the [SOURCE n] format.
+Uses the hashing embedder (no model download) and whatever tokenizer is available.
+
+Run: python test_context_packing.py  (or pytest)
+"""
+import metrics
+from context_packing import count_tokens, truncate_to_tokens, pack_sections, pack_context
+from embeddings import embedding_service
+from sources import SourceRegistry
+
+
+def setup_module(module=None):
+    # Force the hashing fallback: deterministic and offline
+    embedding_service._cache = None
+    embedding_service._model = None
+    embedding_service._loaded.set()
+    embedding_service._state = "unavailable"
+
+
+def result(title, content, url):
+    return {"title": title, "content": content, "url": url}
+
+
+FILLER = " ".join(["generic market commentary about software trends"] * 30)
+
+
+def test_truncate_to_tokens():
+    text = "word " * 500
+    assert truncate_to_tokens(text, 1000) == text
+    assert count_tokens(truncate_to_tokens(text, 50)) <= 50
+
+
+def test_pack_sections_respects_budget_and_sections():
+    metrics.reset()
+    landscape = SourceRegistry().add_results([
+        result("Dental CRM leaders", "Dentrix and Curve are the main dental practice CRM tools.", "https://a.com"),
+        result("Dental CRM leaders", "Dentrix and Curve are the main dental practice CRM tools.", "https://mirror.a.com"),
+        result("Unrelated", FILLER, "https://b.com"),
+    ])
+    pricing = SourceRegistry().add_text("\n\n--- Dentrix PRICING ---\n").add_results([
+        result("Dentrix pricing", "Dentrix costs $400 per month per dental practice.", "https://dentrix.com/pricing"),
+    ])
+
+    packed = pack_sections("CRM for dental practices", {"landscape": landscape, "pricing": pricing, "pain": None}, "spy", budget=120)
+
+    assert packed["landscape"].urls() == ["https://a.com"]  # Duplicate and off-topic filler dropped
+    assert packed["pricing"].urls() == ["https://dentrix.com/pricing"]
+    assert packed["pricing"].text.startswith("--- Dentrix PRICING ---\n[SOURCE 1]\nTitle: Dentrix pricing")
+    assert not packed["pain"]
+    assert sum(count_tokens(r.text) for r in packed.values()) <= 120 + 20
+    assert metrics.get("context.tokens_out.spy") < metrics.get("context.tokens_in.spy")
+
+
+def test_best_source_is_trimmed_when_larger_than_budget():
+    # Typical spy_competitors input: every source alone exceeds the budget
+    long_a = "Dental CRM tools compared: Dentrix, Curve, Open Dental. " * 120
+    long_b = "Practice management software for dentists and clinics. " * 90
+    registry = SourceRegistry().add_results([
+        result("Dental CRM comparison", long_a, "https://a.com"),
+        result("Practice software", long_b, "https://b.com"),
+    ])
+    assert all(count_tokens(registry.body(source)) > 600 for source in registry.sources)
+
+    packed = pack_context("CRM for dental practices", registry, "spy_competitors", budget=600)
+    assert len(packed.urls()) == 1
+    assert packed.text.startswith("[SOURCE 1]")
+    assert 0 < count_tokens(packed.text) <= 600 + 20
+    # The trimmed body keeps its line break: the citation marker stays on its own line
+    assert "\nVERIFIED_URL: https://a.com\n" in packed.text
+    assert all(line.startswith("VERIFIED_URL: ") for line in packed.text.splitlines() if "VERIFIED_URL:" in line)
+
+    # Several sections over one small budget: each keeps a trimmed best source
+    sections = {"landscape": registry, "pricing": SourceRegistry().add_results([result("Pricing", "Dentrix costs $400 per month per practice. " * 100, "https://p.com")])}
+    packed = pack_sections("CRM for dental practices", sections, "spy", budget=400)
+    assert packed["landscape"] and packed["pricing"]
+    assert sum(count_tokens(r.text) for r in packed.values()) <= 400 + 40
+    for section in packed.values():
+        assert all(line.startswith("VERIFIED_URL: ") for line in section.text.splitlines() if "VERIFIED_URL:" in line)
+
+
+def test_pack_context_keeps_everything_when_it_fits():
+    registry = SourceRegistry().add_results([
+        result("One", "First source about invoices.", "https://1.com"),
+        result("Two", "Second source about payroll.", "https://2.com"),
+    ])
+    packed = pack_context("invoicing tool", registry, "financier", budget=10_000)
+    assert packed.text == registry.text
+
+
+if __name__ == "__main__":
+    setup_module()
+    test_truncate_to_tokens()
+    test_pack_sections_respects_budget_and_sections()
+    test_best_source_is_trimmed_when_larger_than_budget()
+    test_pack_context_keeps_everything_when_it_fits()
+    print("✅ Context packing tests passed.")
@@ -0,0 +1,100 @@
+"""
+CTA funnel: selectors compile to the right matcher (id, classes, text
+fallback), pixel clicks are matched at ingest and counted per project and
+day with an upsert, and the stats summary is computed from the counters.
+Uses a temporary SQLite database; no network.
+
+Run: python test_cta_funnel.py  (or pytest)
+"""
+import asyncio
+import os
+import tempfile
+from datetime import datetime
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from cta_funnel import compile_matcher, is_cta_click, record_funnel_event
+from models import CTAFunnelDaily, PixelEvent, Project
+from routers.funnel import funnel_summary
+
+
+def _click(element_id="", element_class="", element_text="", tag_name="A"):
+    return PixelEvent(project_id="p1", page_url="https://mvp.example/", element_id=element_id,
+                      element_class=element_class, element_text=element_text, tag_name=tag_name)
+
+
+def test_compile_matcher():
+    assert compile_matcher("#signup", "Sign up").kind == "id"
+    by_class = compile_matcher("#hero > a.btn.btn-primary", "Get started")
+    assert by_class.kind == "class" and by_class.classes == {"btn", "btn-primary"} and by_class.tag == "a"
+    # Positional / attribute selectors can't be seen in an event: text decides
+    assert compile_matcher("#hero > button:nth-of-type(2)", "Join").kind == "text"
+    assert compile_matcher('a[href="/signup"]', "Sign up").kind == "text"
+    assert compile_matcher(None, "Sign up").kind == "text"
+    assert compile_matcher("#hero > button:nth-of-type(2)", None) is None
+    assert compile_matcher(None, None) is None
+    # Compiled once per (selector, text)
+    assert compile_matcher("#signup", "Sign up") is compile_matcher("#signup", "Sign up")
+
+
+def test_event_matching():
+    project = Project(id="p1", name="p", raw_idea="idea", user_id="u1", cta_selector="a.btn.btn-primary", cta_text="Get started")
+    assert is_cta_click(project, _click(element_class="btn btn-primary btn-lg", element_text="Get started"))
+    assert not is_cta_click(project, _click(element_class="btn", element_text="Get started"))
+    assert not is_cta_click(project, _click(element_class="btn btn-primary", tag_name="BUTTON"))
+
+    project.cta_selector, project.cta_text = "#hero > button:nth-of-type(1)", "Start your free trial"
+    assert is_cta_click(project, _click(element_text="  Start your\nFREE trial ", tag_name="BUTTON"))
+    assert not is_cta_click(project, _click(element_text="Start", tag_name="BUTTON"))
+
+    # The pixel keeps the first 50 characters only
+    long_text = "Join the waitlist and get early access to every feature we ship this year"
+    project.cta_selector, project.cta_text = None, long_text
+    assert is_cta_click(project, _click(element_text=long_text[:50], tag_name="BUTTON"))
+
+    project.cta_selector, project.cta_text = "#signup", None
+    assert is_cta_click(project, _click(element_id="signup"))
+    assert not is_cta_click(project, _click(element_id="signup-footer"))
+
+
+def test_counters_and_summary():
+    project = Project(id="p1", name="p", raw_idea="idea", user_id="u1", cta_selector="#signup", cta_text="Sign up")
+    clicks = [_click(element_id="signup"), _click(element_text="Pricing"), _click(element_id="signup"), _click(element_text="Log in")]
+
+    async def run():
+        path = os.path.join(tempfile.mkdtemp(), "funnel.db")
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        maker = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with maker() as session:
+            for index, event in enumerate(clicks):
+                day = datetime(2026, 3, 1 + index // 3)
+                session.add(event)
+                await record_funnel_event(session, project, event, now=day)
+                await session.commit()
+            rows = (await session.exec(select(CTAFunnelDaily).order_by(CTAFunnelDaily.day))).all()
+            events = (await session.exec(select(PixelEvent))).all()
+        await engine.dispose()
+        return rows, events
+
+    rows, events = asyncio.run(run())
+    assert len(events) == 4
+    assert [(row.day, row.clicks, row.cta_clicks) for row in rows] == [("2026-03-01", 3, 2), ("2026-03-02", 1, 0)]
+
+    summary = funnel_summary(rows)
+    assert summary["totals"] == {"clicks": 4, "cta_clicks": 2, "click_through": 0.5}
+    assert summary["daily"][0]["click_through"] == 0.6667
+
+
+if __name__ == "__main__":
+    test_compile_matcher()
+    test_event_matching()
+    test_counters_and_summary()
+    print("✅ CTA funnel tests passed.")
@@ -0,0 +1,157 @@
+"""
+CTA sweeps: only due projects with a URL are checked, busy and stale ones
+first, within the global and per-host caps; results are written back in
+batches, failures leave the project due and show up in the run summary.
+Uses a temporary SQLite database and a fake verify function; no network.
+
+Run: python test_cta_sweeper.py  (or pytest)
+"""
+import asyncio
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from cta_sweeper import CTASweeper, host_of, sweep_priority
+from models import CTAFunnelDaily, Project
+
+
+class FakeVerifier:
+    def __init__(self, failing=(), delay=0.01):
+        self.failing = set(failing)
+        self.delay = delay
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.host_in_flight = {}
+        self.max_host_in_flight = {}
+
+    async def __call__(self, project_id, url):
+        host = host_of(url)
+        self.calls.append(project_id)
+        self.in_flight += 1
+        self.host_in_flight[host] = self.host_in_flight.get(host, 0) + 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        self.max_host_in_flight[host] = max(self.max_host_in_flight.get(host, 0), self.host_in_flight[host])
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        self.host_in_flight[host] -= 1
+        if project_id in self.failing:
+            return {"error": "503 Service Unavailable"}
+        return {"cta_text": f"Sign up {project_id}", "cta_selector": "#signup", "confidence": "High", "source": "heuristic"}
+
+
+async def _setup(projects, events):
+    path = os.path.join(tempfile.mkdtemp(), "sweep.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    maker = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with maker() as session:
+        session.add_all(projects + events)
+        await session.commit()
+    return engine, maker
+
+
+async def _projects(maker):
+    async with maker() as session:
+        return {project.id: project for project in (await session.exec(select(Project))).all()}
+
+
+def _project(project_id, url, last_verified=None):
+    return Project(id=project_id, name=project_id, raw_idea="idea", user_id="u1", url=url, last_verified=last_verified)
+
+
+def test_priority():
+    now = datetime(2026, 1, 10)
+    day = 24 * 3600
+    stale_busy = sweep_priority(100, (now - timedelta(days=2)).isoformat(), now, day)
+    stale_idle = sweep_priority(0, (now - timedelta(days=2)).isoformat(), now, day)
+    fresh_busy = sweep_priority(100, (now - timedelta(hours=1)).isoformat(), now, day)
+    never = sweep_priority(0, None, now, day)
+    assert stale_busy > stale_idle > fresh_busy
+    assert never > stale_idle
+
+
+def test_sweep_due_projects_in_batches():
+    now = datetime.utcnow()
+    old = (now - timedelta(days=3)).isoformat()
+    projects = [
+        _project("busy", "https://busy.example/", old),
+        _project("idle", "https://idle.example/", old),
+        _project("never", "https://never.example/"),
+        _project("fresh", "https://fresh.example/", now.isoformat()),
+        _project("no-url", None),
+        _project("down", "https://down.example/", old),
+    ] + [_project(f"shared-{i}", f"https://mvps.example/{i}", old) for i in range(6)]
+    events = [
+        CTAFunnelDaily(project_id="busy", day=now.strftime("%Y-%m-%d"), clicks=20),
+        # Outside the activity window: doesn't count
+        CTAFunnelDaily(project_id="idle", day=(now - timedelta(days=30)).strftime("%Y-%m-%d"), clicks=500),
+    ]
+
+    async def run():
+        engine, maker = await _setup(projects, events)
+        verifier = FakeVerifier(failing={"down"})
+        sweeper = CTASweeper(
+            verify=verifier, session_maker=maker, stale_seconds=24 * 3600,
+            concurrency=3, per_host=1, host_delay_seconds=0, write_batch=4
+        )
+        targets = await sweeper.due_targets()
+        capped = await sweeper.due_targets(limit=2)
+        summary = await sweeper.run_once()
+        stored = await _projects(maker)
+        second = await sweeper.run_once()
+        await engine.dispose()
+        return targets, capped, summary, stored, second, verifier
+
+    targets, capped, summary, stored, second, verifier = asyncio.run(run())
+
+    ids = [target.project_id for target in targets]
+    assert "fresh" not in ids and "no-url" not in ids
+    assert ids[0] == "busy" and ids.index("never") < ids.index("idle")
+    assert targets[0].events == 20 and next(t for t in targets if t.project_id == "idle").events == 0
+    assert [target.project_id for target in capped] == ids[:2]
+
+    assert summary.due == summary.checked == 10
+    assert summary.updated == 9 and summary.failed == 1
+    assert summary.failures[0]["project_id"] == "down"
+    assert summary.sources == {"heuristic": 9}
+    assert verifier.max_in_flight <= 3 and verifier.max_host_in_flight["mvps.example"] == 1
+
+    assert stored["busy"].cta_text == "Sign up busy" and stored["busy"].cta_selector == "#signup"
+    assert stored["busy"].last_verified > old
+    assert stored["down"].last_verified == old  # Untouched: still due
+    assert stored["fresh"].cta_text is None
+
+    # Second run: only the failed project is still due
+    assert second.due == 1 and verifier.calls[-1] == "down"
+
+
+def test_max_projects_per_run():
+    projects = [_project(f"p{i}", f"https://p{i}.example/") for i in range(5)]
+
+    async def run():
+        engine, maker = await _setup(projects, [])
+        sweeper = CTASweeper(verify=FakeVerifier(), session_maker=maker, max_projects=2, host_delay_seconds=0)
+        summary = await sweeper.run_once()
+        await engine.dispose()
+        return summary, sweeper
+
+    summary, sweeper = asyncio.run(run())
+    assert summary.due == 5 and summary.checked == 2 and summary.updated == 2
+    assert sweeper.summary_dict()["checked"] == 2
+
+
+if __name__ == "__main__":
+    test_priority()
+    test_sweep_due_projects_in_batches()
+    test_max_projects_per_run()
+    print("✅ CTA sweeper tests passed.")
@@ -0,0 +1,82 @@
+"""
+Embedding cache: identical texts are only encoded once and cached vectors
+come back bit-for-bit. Uses a fake model, no sentence-transformers needed.
+
+Run: python test_embedding_cache.py  (or pytest)
+"""
+import os
+import tempfile
+
+import numpy as np
+
+import metrics
+from embeddings import EmbeddingService
+from kv_store import KVStore
+
+
+class FakeModel:
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, **kwargs):
+        self.encoded.extend(texts)
+        vectors = np.array([[len(t), t.count("a"), 1.0] for t in texts], dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def make_service(tmp_dir):
+    service = EmbeddingService()
+    service._cache = KVStore("embeddings_test", path=os.path.join(tmp_dir, "cache.sqlite3"))
+    service._model = FakeModel()
+    service._loaded.set()
+    service._state = "ready"
+    return service
+
+
+def test_identical_text_is_encoded_once():
+    metrics.reset()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        service = make_service(tmp_dir)
+
+        first = service.encode(["alpha", "beta"])
+        second = service.encode(["beta", "gamma", "alpha"])
+        single = service.encode("gamma")
+
+        assert service._model.encoded == ["alpha", "beta", "gamma"]
+        assert np.array_equal(second[0], first[1])
+        assert np.array_equal(second[2], first[0])
+        assert single.shape == (3,) and np.array_equal(single, second[1])
+        assert metrics.get("embeddings.cache.hits") == 3
+        assert metrics.get("embeddings.cache.misses") == 3
+        assert metrics.hit_rate("embeddings.cache") == 0.5
+
+
+def test_cache_survives_restart():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        make_service(tmp_dir).encode(["persisted idea"])
+
+        restarted = make_service(tmp_dir)
+        restarted._model = None  # Would fail if it had to encode
+        vector = restarted.encode("persisted idea")
+
+        assert vector is not None and vector.dtype == np.float32
+
+
+def test_kv_store_evicts_least_recently_used():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = KVStore("lru", max_entries=3, path=os.path.join(tmp_dir, "lru.sqlite3"))
+        for key in ("a", "b", "c"):
+            store.set(key, key.encode())
+        store.get("a")
+        store.set("d", b"d")
+
+        assert len(store) == 3
+        assert store.get("b") is None
+        assert store.get("a") == b"a"
+
+
+if __name__ == "__main__":
+    test_identical_text_is_encoded_once()
+    test_cache_survives_restart()
+    test_kv_store_evicts_least_recently_used()
+    print("✅ Embedding cache tests passed.")
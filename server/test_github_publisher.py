@@ -0,0 +1,235 @@
+"""
+github_publisher against a local GitHub stub: one commit per publish via the
+Git Data API, re-publishing identical files is a no-op, transient errors are
+retried and jobs can be queued from the agents' worker threads.
+
+The stub is a small FastAPI app (run it with `uvicorn test_github_publisher:stub_app`
+and set GITHUB_API_URL to try the publisher by hand); the tests plug it in-process.
+
+Run: python test_github_publisher.py  (or pytest)
+"""
+import asyncio
+import base64
+import hashlib
+import os
+import threading
+from typing import Any, Dict, List
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+import httpx
+from fastapi import Body, FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+
+from github_publisher import GitHubPublisher, PublishJob, git_blob_sha
+
+
+# ========== GITHUB STUB ==========
+
+class GitHubStub:
+    def __init__(self):
+        self.repos: Dict[str, Dict[str, Any]] = {}
+        self.blobs: Dict[str, bytes] = {}
+        self.trees: Dict[str, Dict[str, str]] = {}  # sha -> {path: blob sha}
+        self.commits: Dict[str, Dict[str, Any]] = {}
+        self.refs: Dict[str, str] = {}  # "owner/repo:branch" -> commit sha
+        self.calls: List[str] = []
+        self.fail_next: List[int] = []  # Status codes to answer before serving normally
+
+    def _tree(self, entries: Dict[str, str]) -> str:
+        sha = hashlib.sha1(repr(sorted(entries.items())).encode()).hexdigest()
+        self.trees[sha] = dict(entries)
+        return sha
+
+    def _commit(self, message: str, tree: str, parents: List[str]) -> str:
+        sha = hashlib.sha1(f"{message}{tree}{parents}{len(self.commits)}".encode()).hexdigest()
+        self.commits[sha] = {"sha": sha, "message": message, "tree": {"sha": tree}, "parents": [{"sha": p} for p in parents]}
+        return sha
+
+    def files(self, full_name: str) -> Dict[str, str]:
+        head = self.refs[f"{full_name}:main"]
+        tree = self.trees[self.commits[head]["tree"]["sha"]]
+        return {path: self.blobs[sha].decode() for path, sha in tree.items()}
+
+    def history(self, full_name: str) -> List[str]:
+        sha, messages = self.refs[f"{full_name}:main"], []
+        while sha:
+            commit = self.commits[sha]
+            messages.append(commit["message"])
+            sha = commit["parents"][0]["sha"] if commit["parents"] else None
+        return messages
+
+
+def build_stub_app(stub: GitHubStub) -> FastAPI:
+    app = FastAPI()
+
+    @app.middleware("http")
+    async def record(request: Request, call_next):
+        stub.calls.append(f"{request.method} {request.url.path}")
+        if stub.fail_next:
+            return JSONResponse({"message": "Server Error"}, status_code=stub.fail_next.pop(0))
+        return await call_next(request)
+
+    def repo_json(full_name: str):
+        return {"full_name": full_name, "html_url": f"https://github.com/{full_name}", "default_branch": "main"}
+
+    @app.post("/user/repos", status_code=201)
+    async def create_repo(payload: dict = Body(...)):
+        full_name = f"verdyct/{payload['name']}"
+        if full_name in stub.repos:
+            raise HTTPException(status_code=422, detail="name already exists on this account")
+        stub.repos[full_name] = payload
+        if payload.get("auto_init"):
+            blob = b"# init\n"
+            stub.blobs[git_blob_sha(blob)] = blob
+            stub.refs[f"{full_name}:main"] = stub._commit("Initial commit", stub._tree({"README.md": git_blob_sha(blob)}), [])
+        return repo_json(full_name)
+
+    @app.get("/repos/{owner}/{repo}")
+    async def get_repo(owner: str, repo: str):
+        if f"{owner}/{repo}" not in stub.repos:
+            raise HTTPException(status_code=404)
+        return repo_json(f"{owner}/{repo}")
+
+    @app.get("/repos/{owner}/{repo}/git/ref/heads/{branch}")
+    async def get_ref(owner: str, repo: str, branch: str):
+        sha = stub.refs.get(f"{owner}/{repo}:{branch}")
+        if not sha:
+            raise HTTPException(status_code=404)
+        return {"object": {"sha": sha, "type": "commit"}}
+
+    @app.get("/repos/{owner}/{repo}/git/commits/{sha}")
+    async def get_commit(owner: str, repo: str, sha: str):
+        return stub.commits[sha]
+
+    @app.get("/repos/{owner}/{repo}/git/trees/{sha}")
+    async def get_tree(owner: str, repo: str, sha: str):
+        return {"sha": sha, "tree": [{"path": p, "type": "blob", "sha": s, "mode": "100644"} for p, s in stub.trees[sha].items()]}
+
+    @app.post("/repos/{owner}/{repo}/git/blobs", status_code=201)
+    async def create_blob(owner: str, repo: str, payload: dict = Body(...)):
+        content = base64.b64decode(payload["content"])
+        sha = git_blob_sha(content)
+        stub.blobs[sha] = content
+        return {"sha": sha}
+
+    @app.post("/repos/{owner}/{repo}/git/trees", status_code=201)
+    async def create_tree(owner: str, repo: str, payload: dict = Body(...)):
+        entries = dict(stub.trees.get(payload.get("base_tree"), {}))
+        entries.update({item["path"]: item["sha"] for item in payload["tree"]})
+        return {"sha": stub._tree(entries)}
+
+    @app.post("/repos/{owner}/{repo}/git/commits", status_code=201)
+    async def create_commit(owner: str, repo: str, payload: dict = Body(...)):
+        return {"sha": stub._commit(payload["message"], payload["tree"], payload["parents"])}
+
+    @app.patch("/repos/{owner}/{repo}/git/refs/heads/{branch}")
+    async def update_ref(owner: str, repo: str, branch: str, payload: dict = Body(...)):
+        key = f"{owner}/{repo}:{branch}"
+        parents = [p["sha"] for p in stub.commits[payload["sha"]]["parents"]]
+        if not payload.get("force") and stub.refs.get(key) not in parents:
+            raise HTTPException(status_code=422, detail="Update is not a fast forward")
+        stub.refs[key] = payload["sha"]
+        return {"object": {"sha": payload["sha"]}}
+
+    return app
+
+
+stub_app = build_stub_app(GitHubStub())
+
+
+# ========== TESTS ==========
+
+FILES = {"index.html": "<h1>MVP</h1>", "styles.css": "h1 { color: red; }", "script.js": "console.log(1)", "README.md": "# MVP\n"}
+
+
+def make_publisher(stub: GitHubStub) -> GitHubPublisher:
+    return GitHubPublisher(
+        token="test", owner="verdyct", base_url="http://github.stub",
+        transport=httpx.ASGITransport(app=build_stub_app(stub)), backoff_seconds=0
+    )
+
+
+async def _publish(publisher: GitHubPublisher, *jobs: PublishJob):
+    publisher.start()
+    try:
+        for job in jobs:
+            assert publisher.enqueue(job)
+            await publisher.join()
+    finally:
+        await publisher.stop()
+
+
+def test_single_commit_then_noop():
+    stub = GitHubStub()
+    publisher = make_publisher(stub)
+    asyncio.run(_publish(publisher, PublishJob("mvp-1", FILES)))
+
+    result = publisher.results["mvp-1"]
+    assert result.state == "published" and result.html_url == "https://github.com/verdyct/mvp-1"
+    assert stub.files("verdyct/mvp-1") == FILES
+    assert stub.history("verdyct/mvp-1") == ["Add generated MVP", "Initial commit"]
+    assert sum(call.endswith("/git/commits") and call.startswith("POST") for call in stub.calls) == 1
+    assert publisher.is_live("mvp-1") and not publisher.is_live("mvp-unknown")
+
+    # Same files again (retry of the same report): nothing uploaded, no commit
+    stub.calls.clear()
+    publisher = make_publisher(stub)
+    asyncio.run(_publish(publisher, PublishJob("mvp-1", FILES)))
+    assert publisher.results["mvp-1"].state == "unchanged"
+    assert not any(call.startswith("POST /repos") for call in stub.calls)
+
+    # One file changed: one more commit on top
+    publisher = make_publisher(stub)
+    asyncio.run(_publish(publisher, PublishJob("mvp-1", {**FILES, "styles.css": "h1 { color: blue; }"}, message="Update")))
+    assert publisher.results["mvp-1"].state == "published"
+    assert stub.history("verdyct/mvp-1")[0] == "Update"
+    assert stub.files("verdyct/mvp-1")["styles.css"] == "h1 { color: blue; }"
+
+
+def test_transient_errors_are_retried():
+    stub = GitHubStub()
+    stub.fail_next = [503, 502]
+    publisher = make_publisher(stub)
+    asyncio.run(_publish(publisher, PublishJob("mvp-2", FILES)))
+    assert publisher.results["mvp-2"].state == "published"
+    assert stub.files("verdyct/mvp-2") == FILES
+
+    stub.fail_next = [500] * 10
+    publisher = make_publisher(stub)
+    asyncio.run(_publish(publisher, PublishJob("mvp-3", FILES)))
+    assert publisher.results["mvp-3"].state == "failed"
+    assert not publisher.is_live("mvp-3")
+
+
+def test_enqueue_from_thread_and_disabled():
+    stub = GitHubStub()
+    publisher = make_publisher(stub)
+
+    async def run():
+        publisher.start()
+        queued = []
+        thread = threading.Thread(target=lambda: queued.append(publisher.enqueue(PublishJob("mvp-4", FILES))))
+        thread.start()
+        await asyncio.to_thread(thread.join)
+        await asyncio.sleep(0)
+        await publisher.join()
+        await publisher.stop()
+        return queued
+
+    assert asyncio.run(run()) == [True]
+    assert publisher.is_live("mvp-4")
+    publisher.results["mvp-4"].state = "queued"  # Accepted, not published yet: no repo to deploy from
+    assert not publisher.is_live("mvp-4")
+    assert stub.files("verdyct/mvp-4") == FILES
+
+    # No token (or not started): the architect simply skips GitHub
+    assert not GitHubPublisher(token=None).enqueue(PublishJob("mvp-5", FILES))
+
+
+if __name__ == "__main__":
+    test_single_commit_then_noop()
+    test_transient_errors_are_retried()
+    test_enqueue_from_thread_and_disabled()
+    print("✅ GitHub publisher tests passed.")
@@ -0,0 +1,107 @@
+"""
+LLM gateway memoization: cacheable calls are answered from the store on
+repeat, structured outputs come back parsed, incomplete answers aren't stored.
+Uses a fake OpenAI client; no API calls.
+
+Run: python test_llm_gateway.py  (or pytest)
+"""
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+from openai.types.chat import ChatCompletion, ParsedChatCompletion
+from pydantic import BaseModel
+
+import llm_gateway
+import metrics
+import utils
+from kv_store import KVStore
+
+
+class Verdict(BaseModel):
+    is_saas: bool
+    rejection_reason: str
+
+
+def completion_payload(content, finish_reason="stop"):
+    return {
+        "id": "chatcmpl-test", "object": "chat.completion", "created": 1, "model": "gpt-4o-mini",
+        "choices": [{"index": 0, "finish_reason": finish_reason, "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": 50, "completion_tokens": 5, "total_tokens": 55},
+    }
+
+
+class FakeClient:
+    def __init__(self, finish_reason="stop"):
+        self.calls = 0
+        self.finish_reason = finish_reason
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+        self.beta = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(parse=self.parse)))
+
+    def create(self, **params):
+        self.calls += 1
+        return ChatCompletion.model_validate(completion_payload(f"answer {self.calls}", self.finish_reason))
+
+    def parse(self, response_format, **params):
+        self.calls += 1
+        payload = completion_payload(json.dumps({"is_saas": True, "rejection_reason": ""}), self.finish_reason)
+        payload["choices"][0]["message"]["parsed"] = {"is_saas": True, "rejection_reason": ""}
+        return ParsedChatCompletion[response_format].model_validate(payload)
+
+
+@contextmanager
+def with_fake(client):
+    """The gateway on `client` and a fresh cache for the block; the real ones are put back after."""
+    original = (utils.openai_client, llm_gateway._cache)
+    utils.openai_client = client
+    llm_gateway._cache = KVStore("llm_responses", path=os.path.join(tempfile.mkdtemp(), "llm.sqlite3"))
+    metrics.reset()
+    try:
+        yield client
+    finally:
+        utils.openai_client, llm_gateway._cache = original
+
+
+MESSAGES = [{"role": "user", "content": "condense: crm for dentists with ai scheduling"}]
+
+
+def test_cacheable_completion_is_memoized():
+    with with_fake(FakeClient()) as fake:
+        first = llm_gateway.chat_completion("query_optimizer", cacheable=True, model="gpt-4o-mini", messages=MESSAGES, temperature=0)
+        second = llm_gateway.chat_completion("query_optimizer", cacheable=True, model="gpt-4o-mini", messages=MESSAGES, temperature=0)
+        assert fake.calls == 1
+        assert second.choices[0].message.content == first.choices[0].message.content == "answer 1"
+        assert metrics.get("llm.cache.hits") == 1 and metrics.get("llm.cache_hits.query_optimizer") == 1
+        assert metrics.get("llm.calls.query_optimizer") == 1  # Hits don't count as model calls
+
+        # Any parameter change is a different entry; non-cacheable calls always hit the model
+        llm_gateway.chat_completion("query_optimizer", cacheable=True, model="gpt-4o-mini", messages=MESSAGES, temperature=0.3)
+        llm_gateway.chat_completion("query_optimizer", model="gpt-4o-mini", messages=MESSAGES, temperature=0)
+        assert fake.calls == 3
+
+
+def test_parse_returns_parsed_model_from_cache():
+    with with_fake(FakeClient()) as fake:
+        for _ in range(2):
+            response = llm_gateway.chat_parse("gatekeeper", cacheable=True, model="gpt-4o", messages=MESSAGES, response_format=Verdict)
+            assert isinstance(response.choices[0].message.parsed, Verdict)
+        assert fake.calls == 1
+
+
+def test_truncated_answers_are_not_stored():
+    with with_fake(FakeClient(finish_reason="length")) as fake:
+        for _ in range(2):
+            llm_gateway.chat_completion("spy", cacheable=True, model="gpt-4o-mini", messages=MESSAGES, max_tokens=5)
+        assert fake.calls == 2
+
+
+if __name__ == "__main__":
+    test_cacheable_completion_is_memoized()
+    test_parse_returns_parsed_model_from_cache()
+    test_truncated_answers_are_not_stored()
+    print("✅ LLM gateway tests passed.")
@@ -0,0 +1,178 @@
+"""
+In-process vector index: memmapped storage, top-k, filters, deletes, and
+the database-level fallback (local backend, hashing embedder, Qdrant sync).
+
+Run: python test_local_index.py  (or pytest)
+"""
+import json
+import os
+import tempfile
+
+import numpy as np
+from qdrant_client import QdrantClient
+
+import database
+from embeddings import embedding_service, HASHING_MODEL_NAME
+from local_index import LocalVectorIndex
+
+
+def unit(*values):
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_upsert_search_delete_and_reload():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index = LocalVectorIndex("test", dim=3, directory=tmp_dir)
+        index.upsert(["a", "b", "c"], [unit(1, 0, 0), unit(0, 1, 0), unit(1, 1, 0)], [{"n": 1}, {"n": 2}, {"n": 3}])
+        index.upsert(["b"], [unit(0, 0, 1)], [{"n": 20}])  # Overwrite in place
+
+        hits = index.search(unit(1, 0.1, 0), limit=2)
+        assert [hit["id"] for hit in hits] == ["a", "c"]
+        assert hits[0]["score"] > hits[1]["score"]
+
+        hits = index.search(unit(1, 0, 0), limit=5, payload_filter=lambda point_id, payload: payload["n"] > 1)
+        assert [hit["id"] for hit in hits] == ["c", "b"]
+
+        assert index.delete(["a", "missing"]) == 1
+        reloaded = LocalVectorIndex("test", dim=3, directory=tmp_dir)
+        assert len(reloaded) == 2
+        assert reloaded.search(unit(0, 0, 1), limit=1)[0] == {"id": "b", "score": 1.0, "payload": {"n": 20}}
+
+
+def test_grows_past_initial_capacity():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index = LocalVectorIndex("grow", dim=4, directory=tmp_dir)
+        vectors = np.random.default_rng(0).normal(size=(3000, 4)).astype(np.float32)
+        index.upsert([str(i) for i in range(3000)], vectors, [{}] * 3000)
+
+        assert len(index) == 3000
+        assert index.search(vectors[2500], limit=1)[0]["id"] == "2500"
+
+
+def test_writes_touch_only_changed_rows():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index = LocalVectorIndex("rows", dim=3, directory=tmp_dir)
+        index.upsert(["a", "b", "c", "d"], [unit(1, 0, 0), unit(0, 1, 0), unit(0, 0, 1), unit(1, 1, 1)], [{"n": i} for i in range(4)])
+        # Record every row the index writes from now on
+        index._db.execute("CREATE TEMP TABLE writes (id TEXT)")
+        index._db.execute("CREATE TEMP TRIGGER count_inserts AFTER INSERT ON main.points BEGIN INSERT INTO writes VALUES (new.id); END")
+
+        index.upsert(["b"], [unit(0, 1, 1)], [{"n": 10}])
+        index.delete(["a"])  # "d" moves into row 0
+        written = [point_id for (point_id,) in index._db.execute("SELECT id FROM writes")]
+        assert written == ["b", "d"]
+
+        reloaded = LocalVectorIndex("rows", dim=3, directory=tmp_dir)
+        assert sorted(reloaded.ids()) == ["b", "c", "d"]
+        hit = reloaded.search(unit(1, 1, 1), limit=1)[0]
+        assert hit["id"] == "d" and hit["payload"] == {"n": 3}
+        assert reloaded.search(unit(0, 1, 1), limit=1)[0]["payload"] == {"n": 10}
+
+
+def test_legacy_meta_json_is_migrated():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        vectors = np.memmap(os.path.join(tmp_dir, "vectors.f32"), dtype=np.float32, mode="w+", shape=(1024, 3))
+        vectors[0], vectors[1] = unit(1, 0, 0), unit(0, 1, 0)
+        vectors.flush()
+        with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+            json.dump({"dim": 3, "capacity": 1024, "ids": ["a", "b"], "payloads": [{"n": 1}, {"n": 2}]}, f)
+
+        index = LocalVectorIndex("legacy", dim=3, directory=tmp_dir)
+        assert not os.path.exists(os.path.join(tmp_dir, "meta.json"))
+        assert index.search(unit(0, 1, 0), limit=1)[0]["payload"] == {"n": 2}
+        assert len(LocalVectorIndex("legacy", dim=3, directory=tmp_dir)) == 2
+
+
+def test_single_writer():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        writer = LocalVectorIndex("lock", dim=3, directory=tmp_dir)
+        assert writer.upsert(["a"], [unit(1, 0, 0)], [{}]) == 1
+        # Another holder of the directory (flock is per open file, so this stands in for another process)
+        other = LocalVectorIndex("lock", dim=3, directory=tmp_dir)
+        assert other.upsert(["b"], [unit(0, 1, 0)], [{}]) == 0
+        assert other.delete(["a"]) == 0
+        assert writer.upsert(["c"], [unit(0, 0, 1)], [{}]) == 1
+        assert sorted(LocalVectorIndex("lock", dim=3, directory=tmp_dir).ids()) == ["a", "c"]
+
+
+def _use_local_backend(tmp_dir):
+    """Point database at a local-only backend stored in tmp_dir; returns a restore function."""
+    saved = (database.VECTOR_BACKEND, database.LOCAL_VECTOR_INDEX, database.LocalVectorIndex)
+    database.VECTOR_BACKEND = "local"
+    database.LOCAL_VECTOR_INDEX = True
+    database._local_indexes.clear()
+    database.LocalVectorIndex = lambda namespace, dim: saved[2](namespace, dim, directory=f"{tmp_dir}/{namespace}")
+
+    def restore():
+        database.VECTOR_BACKEND, database.LOCAL_VECTOR_INDEX, database.LocalVectorIndex = saved
+        database._local_indexes.clear()
+        database._qdrant_client = None
+
+    return restore
+
+
+def test_local_backend_with_hashing_fallback():
+    embedding_service._cache = None
+    embedding_service._model = None
+    embedding_service._loaded.set()
+    embedding_service._state = "unavailable"
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        restore = _use_local_backend(tmp_dir)
+        try:
+            assert database.vector_store_ready()
+            database.upsert_vectors([
+                {"text": "AI CRM for dentists", "metadata": {"status": "approved", "is_public": True, "user_id": "bob", "text": "AI CRM for dentists"}, "vector_id": "p1"},
+                {"text": "Dog walking marketplace", "metadata": {"status": "approved", "is_public": False, "user_id": "bob", "text": "Dog walking marketplace"}, "vector_id": "p2"},
+            ], raise_errors=True)
+
+            hits = database.search_similar("crm for dentists", 5, viewer_id="alice")
+            assert [hit["id"] for hit in hits] == ["p1"]
+            assert hits[0]["document"] == "AI CRM for dentists"
+            assert len(database.get_local_index(HASHING_MODEL_NAME)) == 2
+
+            database.delete_vectors(["p1"], raise_errors=True)
+            assert [hit["id"] for hit in database.search_similar("crm for dentists", 5)] == ["p2"]
+        finally:
+            restore()
+
+
+def test_sync_from_qdrant():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        restore = _use_local_backend(tmp_dir)
+        client = QdrantClient(":memory:")
+        client.create_collection(
+            database.COLLECTION_NAME,
+            vectors_config=database.models.VectorParams(size=database.EMBEDDING_DIM, distance=database.models.Distance.COSINE)
+        )
+        vectors = np.random.default_rng(1).normal(size=(300, database.EMBEDDING_DIM)).astype(np.float32)
+        client.upsert(database.COLLECTION_NAME, points=[
+            database.models.PointStruct(id=database.vector_point_id(f"p{i}"), vector=vectors[i].tolist(), payload={"project_id": f"p{i}"})
+            for i in range(300)
+        ])
+        try:
+            database.VECTOR_BACKEND = "qdrant"
+            database._qdrant_client = client
+            index = database.get_local_index()
+            index.upsert(["p7", "gone"], [vectors[7], vectors[8]], [{"project_id": "p7"}, {"project_id": "gone"}])
+            searches = []
+            upsert = index.upsert
+            index.upsert = lambda *args: (searches.append(len(index.search(vectors[7], limit=1))), upsert(*args))[1]
+            database.sync_local_index(batch_size=128)
+
+            assert len(index) == 300 and "gone" not in index.ids()
+            assert index.search(vectors[42], limit=1)[0]["id"] == "p42"
+            assert searches and all(searches)  # Never empty while syncing
+        finally:
+            restore()
+
+
+if __name__ == "__main__":
+    test_upsert_search_delete_and_reload()
+    test_grows_past_initial_capacity()
+    test_writes_touch_only_changed_rows()
+    test_legacy_meta_json_is_migrated()
+    test_single_writer()
+    test_local_backend_with_hashing_fallback()
+    test_sync_from_qdrant()
+    print("✅ Local vector index tests passed.")
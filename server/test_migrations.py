@@ -0,0 +1,71 @@
+import os
+import sys
+import tempfile
+
+from sqlalchemy import inspect, text
+from sqlmodel import SQLModel, create_engine
+
+# Models must be imported to register them with SQLModel.metadata
+import models  # noqa: F401
+from migrations import MIGRATIONS, run_migrations, check_query_plans, applied_versions
+
+
+def _engine():
+    db_path = os.path.join(tempfile.mkdtemp(), "migrations_test.db")
+    return create_engine(f"sqlite:///{db_path}")
+
+
+def test_fresh_database():
+    print("Testing migrations on a fresh database...")
+    engine = _engine()
+    with engine.begin() as conn:
+        SQLModel.metadata.create_all(conn)
+        run_migrations(conn)
+        assert applied_versions(conn) == {m.version for m in MIGRATIONS}
+
+        # Second run is a no-op
+        assert run_migrations(conn) == []
+    print("✅ Fresh database migrated.")
+
+
+def test_legacy_database():
+    print("\nTesting migrations on a pre-migrations database...")
+    engine = _engine()
+    with engine.begin() as conn:
+        # Old 'project' table: no social columns, no composite indexes
+        conn.execute(text(
+            "CREATE TABLE project (id VARCHAR PRIMARY KEY, name VARCHAR, raw_idea VARCHAR, "
+            "pos_score FLOAT, status VARCHAR, api_key VARCHAR, created_at DATETIME, url VARCHAR, "
+            "cta_text VARCHAR, cta_selector VARCHAR, last_verified VARCHAR, report_json JSON, user_id VARCHAR)"
+        ))
+        conn.execute(text("CREATE INDEX ix_project_user_id ON project (user_id)"))
+        SQLModel.metadata.create_all(conn)
+        run_migrations(conn)
+
+        columns = {c["name"] for c in inspect(conn).get_columns("project")}
+        assert {"is_public", "upvotes", "views"} <= columns
+        indexes = {i["name"] for i in inspect(conn).get_indexes("project")}
+        assert "ix_project_user_id_created_at" in indexes
+    print("✅ Legacy database migrated.")
+
+
+def test_hot_query_plans():
+    print("\nTesting hot query plans (EXPLAIN)...")
+    engine = _engine()
+    with engine.begin() as conn:
+        SQLModel.metadata.create_all(conn)
+        run_migrations(conn)
+        plans = check_query_plans(conn)
+        for name, plan in plans.items():
+            print(f"   {name}: {plan}")
+    print("✅ All hot queries use index range scans.")
+
+
+if __name__ == "__main__":
+    try:
+        test_fresh_database()
+        test_legacy_database()
+        test_hot_query_plans()
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
@@ -0,0 +1,108 @@
+"""
+Streamed MVP builder: one streamed completion per file, CSS/JS after the
+HTML, each file stored and announced as soon as it is done; a truncated or
+failed file does not lose the others. OpenAI is replaced by a fake stream.
+
+Run: python test_mvp_builder.py  (or pytest)
+"""
+import os
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+import agents.mvp_builder as mvp_builder
+import utils
+from agents.mvp_builder import build_mvp_files, strip_fences
+from artifact_store import ArtifactStore, LocalBackend
+
+OUTPUTS = {
+    "index.html": "```html\n<main class=\"hero\">MVP</main>\n```",
+    "README.md": "# MVP\n\nDeploy anywhere.",
+    "styles.css": ".hero { color: #111; }",
+    "script.js": "document.querySelector('.hero')",
+}
+
+
+def _chunk(content=None, finish_reason=None, usage=None):
+    choices = [] if usage else [SimpleNamespace(delta=SimpleNamespace(content=content), finish_reason=finish_reason)]
+    return SimpleNamespace(choices=choices, usage=usage)
+
+
+class FakeCompletions:
+    def __init__(self, truncate=(), fail=(), delay=0.05):
+        self.truncate, self.fail, self.delay = truncate, fail, delay
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def create(self, **params):
+        task = params["messages"][1]["content"]
+        path = next(name for name in OUTPUTS if f"content of {name}" in task)
+        with self.lock:
+            self.calls.append((path, time.perf_counter(), task))
+        assert params["stream"] and params["messages"][0]["content"].endswith("SITE")
+        if path in self.fail:
+            raise RuntimeError("upstream error")
+
+        def stream():
+            text = OUTPUTS[path]
+            for i in range(0, len(text), 8):
+                time.sleep(self.delay / 4)
+                yield _chunk(text[i:i + 8])
+            yield _chunk(finish_reason="length" if path in self.truncate else "stop")
+            yield _chunk(usage=SimpleNamespace(prompt_tokens=100, completion_tokens=20, prompt_tokens_details=None))
+        return stream()
+
+
+def run_build(fake: FakeCompletions):
+    original_client, original_store = utils.openai_client, mvp_builder.artifact_store
+    utils.openai_client = SimpleNamespace(chat=SimpleNamespace(completions=fake))
+    mvp_builder.artifact_store = store = ArtifactStore(LocalBackend(tempfile.mkdtemp()))
+    events = []
+    try:
+        contents, refs = build_mvp_files("SITE", events.append)
+    finally:
+        utils.openai_client, mvp_builder.artifact_store = original_client, original_store
+    return contents, refs, events, store
+
+
+def test_files_are_streamed_and_stored_in_dependency_order():
+    fake = FakeCompletions()
+    contents, refs, events, store = run_build(fake)
+
+    assert contents["html"] == '<main class="hero">MVP</main>'  # Fences stripped
+    assert set(contents) == {"html", "readme", "css", "javascript"}
+    by_path = {ref["path"]: ref for ref in refs}
+    assert store.read(by_path["styles.css"]["key"]).decode() == OUTPUTS["styles.css"]
+
+    started = {path: at for path, at, _ in fake.calls}
+    completed = [event["file"] for event in events if event["type"] == "artifact_complete"]
+    assert completed.index("index.html") < completed.index("styles.css")
+    assert abs(started["index.html"] - started["README.md"]) < 0.05  # Independent: together
+    assert started["styles.css"] > started["index.html"]
+    css_task = next(task for path, _, task in fake.calls if path == "styles.css")
+    assert 'class="hero"' in css_task  # Gets the generated HTML
+
+
+def test_truncated_or_failed_file_keeps_the_others():
+    contents, refs, events, _ = run_build(FakeCompletions(truncate=("styles.css",), fail=("script.js",)))
+    assert "javascript" not in contents and {"html", "readme", "css"} <= set(contents)
+    assert next(ref for ref in refs if ref["path"] == "styles.css")["truncated"] is True
+    assert not any(ref.get("truncated") for ref in refs if ref["path"] != "styles.css")
+    assert [event["file"] for event in events if event["type"] == "artifact_failed"] == ["script.js"]
+
+
+def test_strip_fences():
+    assert strip_fences("```css\na {}\n```") == "a {}"
+    assert strip_fences("```js\nlet a = 1") == "let a = 1"  # Truncated, never closed
+    assert strip_fences("<p>```</p>") == "<p>```</p>"
+
+
+if __name__ == "__main__":
+    test_files_are_streamed_and_stored_in_dependency_order()
+    test_truncated_or_failed_file_keeps_the_others()
+    test_strip_fences()
+    print("✅ MVP builder tests passed.")
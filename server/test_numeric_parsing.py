@@ -0,0 +1,93 @@
+"""
+numeric_parsing: the lever formats the LLM actually produces, in both locales.
+
+Run: python test_numeric_parsing.py  (or pytest)
+"""
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+from agents.financier import parse_levers
+from numeric_parsing import parse_lever, parse_number
+
+
+def test_separators_follow_locale():
+    assert parse_number("1,200").value == 1200
+    assert parse_number("1,200", "fr").value == 1.2
+    assert parse_number("1 200,50 €", "fr").value == 1200.5
+    assert parse_number("1.200", "fr").value == 1200
+    # Unambiguous whatever the locale
+    for locale in ("en", "fr"):
+        assert parse_number("$1,200.50", locale).value == 1200.5
+        assert parse_number("1.200,50", locale).value == 1200.5
+        assert parse_number("12,345,678", locale).value == 12345678
+        assert parse_number("2,5", locale).value == 2.5
+
+
+def test_currencies_percentages_periods():
+    price = parse_number("€29/month")
+    assert (price.value, price.currency, price.period) == (29, "EUR", "month")
+    assert parse_number("Pro : 49 €/mois", "fr").period == "month"
+    assert parse_number("EUR 49").currency == "EUR"
+    assert parse_number("2,5 %", "fr").percent
+    assert parse_number("1.5k").value == 1500
+    assert parse_number("free") is None and parse_number("") is None and parse_number(None) is None
+    assert parse_number(float("nan")) is None
+
+
+def test_ranges_use_midpoint():
+    for text, locale in (("2–3%", "en"), ("2-3 %", "en"), ("de 2 à 3 %", "fr")):
+        parsed = parse_number(text, locale)
+        assert (parsed.low, parsed.value, parsed.high, parsed.percent) == (2, 2.5, 3, True)
+    assert parse_number("€20 to €40").value == 30
+    assert parse_number("10-20k").low == 10_000
+
+
+def test_parse_lever():
+    assert parse_lever("€290/year", 29.0) == 290 / 12
+    # Percent levers are never rescaled: a 0.8% conversion rate stays 0.8
+    assert parse_lever(0.8, 2.0, "percent") == 0.8
+    assert parse_lever("0.8", 2.0, "percent") == 0.8
+    assert parse_lever("0.8%", 2.0, "percent") == 0.8
+    assert parse_lever("250%", 2.0, "percent") == 2.0
+    assert parse_lever("n/a", 29.0) == 29.0
+    assert parse_lever(-10, 0.0) == 0.0
+
+
+def test_parse_levers_never_raises():
+    levers = {
+        "monthly_price": {"value": "€29/month", "min": "€9", "max": "€99", "step": "1"},
+        "ad_spend": {"value": "1,200", "min": 0, "max": "5k", "step": 50},
+        "conversion_rate": "2–3%",
+    }
+    parsed = parse_levers(levers)
+    assert parsed["monthly_price"] == {"value": 29, "min": 9, "max": 99, "step": 1}
+    assert parsed["ad_spend"]["value"] == 1200 and parsed["ad_spend"]["max"] == 5000
+    assert parsed["conversion_rate"]["value"] == 2.5
+
+    conversion = parse_levers({"conversion_rate": {"value": 0.8, "min": 0.5, "max": 5, "step": 0.1}})["conversion_rate"]
+    assert conversion == {"value": 0.8, "min": 0.5, "max": 5, "step": 0.1}
+    assert conversion["min"] < 1 < conversion["max"]
+
+    assert parse_levers({"ad_spend": {"value": "1,200"}}, "fr")["ad_spend"]["value"] == 1.2
+    assert parse_levers({})["monthly_price"]["value"] == 29.0
+
+
+def test_single_financier_route():
+    # The legacy handler (string-stripping lever parsing) must stay gone:
+    # generate_report calls financier_analysis by name
+    import main
+    routes = [route for route in main.app.routes if getattr(route, "path", None) == "/financier"]
+    assert len(routes) == 1
+    assert routes[0].endpoint is main.financier_analysis
+
+
+if __name__ == "__main__":
+    test_separators_follow_locale()
+    test_currencies_percentages_periods()
+    test_ranges_use_midpoint()
+    test_parse_lever()
+    test_parse_levers_never_raises()
+    test_single_financier_route()
+    print("✅ Numeric parsing tests passed.")
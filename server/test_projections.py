@@ -0,0 +1,329 @@
+"""
+Vectorized projection engine: a single point matches the original
+month-by-month loop, every cell of a grid matches its own single-point run,
+and the Monte Carlo bands are seeded, ordered and fast.
+
+Run: python test_projections.py  (or pytest)
+"""
+import asyncio
+import os
+import tempfile
+import time
+from typing import Dict
+
+import numpy as np
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from agents.financier import calculate_projections, format_financier_metrics
+from models import LeverRecomputeRequest, Project, RiskSimulation
+from projections import cost_model, project_grid, simulate, simulate_risk, status_labels
+from routers.financier import financier_recompute, financier_scenarios, recompute_levers, scenario_surface
+
+
+# Original scalar implementation (before projections.py), kept as the reference
+def legacy_calculate_projections(monthly_price: float, ad_spend: float, conversion_rate: float, cost_structure: list = []) -> Dict:
+    """
+    Calcule les projections financières (Revenue, Profit, Break-Even, Runway).
+    Now includes Fixed Cost analysis from LLM data.
+    """
+    # 1. Analyze Costs
+    fixed_costs = 0
+    variable_costs_per_user = 0
+    
+    # Defaults if no structure provided
+    if not cost_structure:
+        fixed_costs = 100 # Low default for lean startups (Domains, minimal hosting)
+    else:
+        for cost in cost_structure:
+            # Handle both dict and Pydantic object
+            c_amount = cost.get('monthly_amount', 0) if isinstance(cost, dict) else cost.monthly_amount
+            c_var = cost.get('is_variable', False) if isinstance(cost, dict) else cost.is_variable
+            
+            if c_var:
+                variable_costs_per_user += c_amount # Assuming 'variable' costs are entered as unit costs by LLM
+            else:
+                fixed_costs += c_amount
+
+    # Gross Margin (Unit Economics)
+    # Revenue per user - Variable Cost
+    gross_profit_per_user = monthly_price - variable_costs_per_user
+    if gross_profit_per_user <= 0: gross_profit_per_user = monthly_price * 0.2 # Fallback to 20% if costs > price
+
+    # 2. Key Metrics
+    churn_rate = 0.05
+    
+    # LEAN VISIBILITY ALGORITHM
+    # 1. Base Organic Traffic (SEO/Social/Communities) - Every founder does some manual work
+    base_organic_traffic = 300 # Visitors per month (Sweat Equity)
+    
+    # 2. Paid Traffic
+    paid_leads = ad_spend / 1.5 if ad_spend > 0 else 0
+    
+    # Total Leads
+    total_leads = base_organic_traffic + paid_leads
+    
+    customers_per_month = total_leads * (conversion_rate / 100)
+    
+    cac = ad_spend / customers_per_month if customers_per_month > 0 else ad_spend
+    ltv = gross_profit_per_user / churn_rate
+    ltv_cac_ratio = ltv / cac if cac > 0 else 0
+
+    # 3. Break-Even Analysis
+    # Breakeven Users = Fixed Costs / Gross Profit per User
+    break_even_users = fixed_costs / gross_profit_per_user if gross_profit_per_user > 0 else 0
+    break_even_users = int(break_even_users)
+
+    # 4. Burn Rate & Runway
+    seed_money = 50000 # Assumption: Friends & Family / Pre-seed
+    # Runway = Seed / Net Burn (Fixed Costs - Revenue) -> Simplified to (Seed / Fixed Costs) for Day 0
+    runway_months = seed_money / fixed_costs if fixed_costs > 0 else 99
+    
+    # Status
+    if ltv_cac_ratio >= 3 and runway_months > 12: status = "Excellent"
+    elif ltv_cac_ratio >= 1.5: status = "Good"
+    elif ltv_cac_ratio >= 1: status = "Fair"
+    else: status = "Risk"
+
+    # 5. Projections (5 Years)
+    growth_rate = 0.15 # 15% MoM early stage
+    projections = []
+    current_customers = 0
+    
+    # Track when we hit breakeven
+    months_to_breakeven = None
+    accumulated_cash = seed_money
+
+    for year in range(1, 6):
+        customers_end_year = 0
+        annual_revenue = 0
+        annual_profit = 0
+        
+        # Monthly simulation for precision
+        for m in range(12):
+            if year == 1 and m == 0:
+                new = customers_per_month
+            else:
+                new = customers_per_month * ((1 + growth_rate) if current_customers < 1000 else 1.05)
+            
+            churn = current_customers * churn_rate
+            current_customers += (new - churn)
+            
+            # Monthly Financials
+            m_revenue = current_customers * monthly_price
+            m_costs = fixed_costs + (current_customers * variable_costs_per_user) + ad_spend
+            m_profit = m_revenue - m_costs
+            
+            annual_revenue += m_revenue
+            annual_profit += m_profit
+            accumulated_cash += m_profit
+
+            if m_profit > 0 and months_to_breakeven is None:
+                months_to_breakeven = ((year - 1) * 12) + m
+
+        # Format
+        fmt = lambda x: f"€{x:,.0f}".replace(",", " ")
+        projections.append({
+            "year": f"Year {year}",
+            "revenue": fmt(annual_revenue),
+            "profit": fmt(annual_profit),
+            "customers": f"{int(current_customers)}"
+        })
+
+    return {
+        "cac": cac,
+        "ltv": ltv,
+        "ltv_cac_ratio": ltv_cac_ratio,
+        "status": status,
+        "projections": projections,
+        "break_even_users": f"{break_even_users:,}".replace(",", " "),
+        "projected_runway_months": f"{int(runway_months)} months" if accumulated_cash > 0 else "0 months"
+    }
+
+
+COSTS = [
+    {"name": "Hosting", "monthly_amount": 40, "is_variable": False},
+    {"name": "Tools", "monthly_amount": 60, "is_variable": False},
+    {"name": "Stripe fees", "monthly_amount": 1.2, "is_variable": True},
+]
+
+
+def test_single_point_matches_legacy_loop():
+    for price, ads, conversion, costs in [(29, 500, 2.0, COSTS), (9, 0, 1.0, []), (99, 2000, 4.5, COSTS), (1, 100, 3.0, COSTS)]:
+        expected = legacy_calculate_projections(price, ads, conversion, costs)
+        actual = calculate_projections(price, ads, conversion, costs)
+        for key in ("cac", "ltv", "ltv_cac_ratio"):
+            assert np.isclose(actual[key], expected[key]), key
+        for key in ("status", "projections", "break_even_users", "projected_runway_months"):
+            assert actual[key] == expected[key], key
+
+
+def test_grid_matches_points():
+    prices = np.array([9.0, 29.0, 99.0])
+    ads = np.array([0.0, 500.0, 3000.0])
+    conversions = np.array([0.5, 2.0, 5.0])
+    churns = np.array([0.03, 0.05, 0.1])
+    grid = project_grid(prices, ads, conversions, churns, COSTS)
+    assert grid["annual_revenue"].shape == (3, 3, 3, 3, 5)
+
+    for i, j, k, l in [(0, 0, 0, 0), (1, 1, 1, 1), (2, 2, 2, 1), (2, 0, 1, 2)]:
+        point = calculate_projections(prices[i], ads[j], conversions[k], COSTS, churn_rate=churns[l])
+        assert np.isclose(grid["ltv_cac_ratio"][i, j, k, l], point["ltv_cac_ratio"])
+        assert str(status_labels(grid["status_code"][i, j, k, l])) == point["status"]
+        assert f"{int(grid['customers'][i, j, k, l, 4])}" == point["projections"][4]["customers"]
+
+
+def test_large_grid_is_fast():
+    start = time.perf_counter()
+    grid = project_grid(np.linspace(5, 200, 20), np.linspace(0, 5000, 20), np.linspace(0.5, 10, 20), np.linspace(0.02, 0.1, 5), COSTS)
+    elapsed = time.perf_counter() - start
+    assert grid["ending_cash"].size == 40_000
+    assert elapsed < 1.0
+
+
+def stored_financier() -> Dict:
+    return {
+        "profit_engine": {"levers": {
+            "monthly_price": {"value": 29, "min": 9, "max": 99, "step": 1},
+            "ad_spend": {"value": 250, "min": 0, "max": 1000, "step": 50},
+            "conversion_rate": {"value": 2.5, "min": 1, "max": 5, "step": 0.5},
+        }},
+        "cost_structure": COSTS,
+    }
+
+
+async def call_with_project(report_json: Dict, endpoint, **params):
+    """Run a financier endpoint against a temporary DB holding one project owned by "u1"."""
+    path = os.path.join(tempfile.mkdtemp(), "financier.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    maker = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        async with maker() as session:
+            session.add(Project(id="p1", name="p", raw_idea="idea", user_id="u1", report_json=report_json))
+            await session.commit()
+            return await endpoint("p1", session=session, user=({"sub": "u1"}, None), **params)
+    finally:
+        await engine.dispose()
+
+
+def test_scenario_surface_from_stored_report():
+    financier = stored_financier()
+    surface = scenario_surface(financier, 5, 5, 5, [0.03, 0.05])
+    assert surface["axes"]["monthly_price"] == [9.0, 29.0, 31.5, 54.0, 76.5, 99.0]  # Current value included
+    assert surface["shape"] == [6, 5, 6, 2] and surface["scenarios"] == 360
+    ratios = np.array(surface["metrics"]["ltv_cac_ratio"])
+    assert ratios.shape == (6, 5, 6, 2)
+
+    i, j, k = (surface["axes"][name].index(value) for name, value in (("monthly_price", 29.0), ("ad_spend", 250.0), ("conversion_rate", 2.5)))
+    point = calculate_projections(29, 250, 2.5, COSTS, churn_rate=0.05)
+    assert np.isclose(ratios[i, j, k, 1], round(point["ltv_cac_ratio"], 2))
+
+
+def test_scenarios_endpoint_reads_nested_report():
+    # Stored reports are VerdyctReportResponse dicts: agents live under "agents"
+    grid = dict(price_steps=3, ad_spend_steps=3, conversion_steps=3, churn="0.05")
+    surface = asyncio.run(call_with_project({"agents": {"financier": stored_financier()}}, financier_scenarios, **grid))
+    assert surface["project_id"] == "p1" and surface["shape"] == [4, 4, 4, 1]  # 3 steps + current value
+
+    for report in ({"financier": stored_financier()}, {"agents": {}}, None):
+        try:
+            asyncio.run(call_with_project(report, financier_scenarios, **grid))
+        except HTTPException as e:
+            assert e.status_code == 404
+        else:
+            raise AssertionError(f"expected a 404 for {report}")
+
+
+def test_risk_simulation_bands():
+    start = time.perf_counter()
+    risk = simulate_risk(29, 250, 2.5, COSTS, trajectories=20_000)
+    elapsed = time.perf_counter() - start
+    assert elapsed < 1.0
+    RiskSimulation(**risk)  # Fits the Financier report schema
+
+    assert risk == simulate_risk(29, 250, 2.5, COSTS, trajectories=20_000)  # Seeded
+    assert risk != simulate_risk(29, 250, 2.5, COSTS, trajectories=20_000, seed=7)
+    assert len(risk["revenue"]) == len(risk["cash"]) == 5
+    for band in risk["revenue"] + risk["cash"]:
+        assert band["p10"] <= band["p50"] <= band["p90"]
+    assert 0 <= risk["breakeven_probability"] <= 1
+
+    # The median trajectory sits near the deterministic point estimate
+    point = project_grid(29, 250, 2.5, cost_structure=COSTS)
+    assert risk["revenue"][4]["p10"] < float(point["annual_revenue"][0, 0, 0, 0, 4]) < risk["revenue"][4]["p90"]
+
+
+def test_risk_simulation_never_breaking_even():
+    # €3 with €3 000 of ads: no trajectory breaks even within 60 months
+    risk = simulate_risk(3, 3000, 0.5, COSTS, trajectories=1000)
+    assert risk["breakeven_probability"] == 0
+    assert risk["months_to_breakeven"] == {"p10": None, "p50": None, "p90": None}
+
+
+def test_simulate_broadcasts_assumptions():
+    seeds = np.array([10_000.0, 50_000.0])
+    run = simulate(29, 250, 2.5, 0.05, fixed=100, variable=1.2, seed_money=seeds)
+    assert run["ending_cash"].shape == (2,)
+    assert np.isclose(run["ending_cash"][1] - run["ending_cash"][0], 40_000)
+
+
+def test_recompute_levers_is_memoized():
+    recompute_levers.cache_clear()
+    expected = calculate_projections(39, 400, 3.0, COSTS, churn_rate=0.04)
+    result_metrics, projection = recompute_levers(39.0, 400.0, 3.0, 0.04, *cost_model(COSTS))
+    assert result_metrics.model_dump() == format_financier_metrics(expected)
+    assert [item.model_dump() for item in projection.projections] == expected["projections"]
+
+    start = time.perf_counter()
+    again = recompute_levers(39.0, 400.0, 3.0, 0.04, *cost_model(COSTS))
+    assert (time.perf_counter() - start) * 1000 < 5
+    assert again[0] is result_metrics and recompute_levers.cache_info().hits == 1
+
+    # Default costs (no stored cost structure) survive the (fixed, variable) key
+    default = calculate_projections(39, 400, 3.0, [])
+    assert recompute_levers(39.0, 400.0, 3.0, 0.05, *cost_model([]))[0].model_dump() == format_financier_metrics(default)
+
+
+def test_recompute_endpoint_reads_nested_report():
+    recompute_levers.cache_clear()
+    report = {"agents": {"financier": stored_financier()}}
+    levers = LeverRecomputeRequest(monthly_price=39, ad_spend=400, conversion_rate=3.0, churn_rate=0.04)
+
+    first = asyncio.run(call_with_project(report, financier_recompute, levers=levers))
+    expected = calculate_projections(39, 400, 3.0, COSTS, churn_rate=0.04)
+    assert first["metrics"] == format_financier_metrics(expected)  # Stored cost structure applied
+    assert first["revenue_projection"]["projections"] == expected["projections"]
+    assert first["cached"] is False
+
+    again = asyncio.run(call_with_project(report, financier_recompute, levers=levers))
+    assert again["cached"] is True and again["metrics"] == first["metrics"]
+
+    try:
+        asyncio.run(call_with_project({"financier": stored_financier()}, financier_recompute, levers=levers))
+    except HTTPException as e:
+        assert e.status_code == 404
+    else:
+        raise AssertionError("expected a 404 for a report without agents")
+
+
+if __name__ == "__main__":
+    test_single_point_matches_legacy_loop()
+    test_grid_matches_points()
+    test_large_grid_is_fast()
+    test_scenario_surface_from_stored_report()
+    test_scenarios_endpoint_reads_nested_report()
+    test_risk_simulation_bands()
+    test_risk_simulation_never_breaking_even()
+    test_simulate_broadcasts_assumptions()
+    test_recompute_levers_is_memoized()
+    test_recompute_endpoint_reads_nested_report()
+    print("✅ Projection engine tests passed.")
@@ -0,0 +1,59 @@
+"""
+Local query compression: long idea-based queries fit Tavily's limit without
+an LLM call, operators survive, and too-lossy cases fall back to the LLM.
+
+Run: python test_query_compressor.py  (or pytest)
+"""
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+import metrics
+import utils
+from query_compressor import compress_query
+
+IDEA = (
+    "We are building an AI-powered platform that helps independent dental practices and small dental clinics "
+    "in France manage their patient appointments, automatically send reminders by SMS and email, reduce no-shows, "
+    "handle online booking from their website, and integrate with existing practice management software like "
+    "Logos or Julie, so that the receptionist can focus on patients instead of the phone. It will also offer "
+    "analytics dashboards."
+)
+
+
+def test_compresses_idea_queries_locally():
+    query = (
+        f"{IDEA} competitors alternatives startups SaaS tools products "
+        f"-aws -\"google cloud\" -azure -\"amazon web services\" customer reviews pricing reddit g2"
+    )
+    compressed = compress_query(query)
+    assert compressed is not None and len(compressed) <= 400
+    for term in ['-"google cloud"', '-"amazon web services"', "-aws", "dental", "Logos", "no-shows", "pricing", "g2"]:
+        assert term in compressed
+    assert " the " not in compressed and compressed.count("dental") == 1
+
+
+def test_short_queries_untouched_and_lossy_ones_rejected():
+    assert compress_query("crm for dentists", 400) == "crm for dentists"
+    words = " ".join(f"keyword{i}" for i in range(80))
+    assert compress_query(words, 100) is None  # Would drop most of the content
+
+
+def test_optimize_query_skips_the_llm():
+    metrics.reset()
+    original = utils.chat_completion
+    utils.chat_completion = lambda *args, **kwargs: (_ for _ in ()).throw(AssertionError("LLM called"))
+    try:
+        optimized = utils.optimize_query(f"{IDEA} market size TAM SAM CAGR revenue forecast statistics")
+    finally:
+        utils.chat_completion = original
+    assert len(optimized) <= 400 and "CAGR" in optimized
+    assert metrics.get("query_optimizer.local") == 1
+
+
+if __name__ == "__main__":
+    test_compresses_idea_queries_locally()
+    test_short_queries_untouched_and_lossy_ones_rejected()
+    test_optimize_query_skips_the_llm()
+    print("✅ Query compressor tests passed.")
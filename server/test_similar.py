@@ -0,0 +1,90 @@
+"""
+Similarity search filters and the similar-results cache, against an
+in-memory Qdrant collection and a fake embedding model.
+
+Run: python test_similar.py  (or pytest)
+"""
+import numpy as np
+from qdrant_client import QdrantClient
+
+import database
+from embeddings import embedding_service
+from models import Project
+from routers.similar import _SimilarCache
+from vector_indexer import project_vector_payload, vector_indexer
+
+WORDS = ["crm", "dentist", "invoice", "ai", "dog", "walking", "app", "marketplace"]
+
+
+class FakeModel:
+    def encode(self, texts, **kwargs):
+        vectors = np.array([[t.lower().count(w) for w in WORDS] for t in texts], dtype=np.float32) + 0.01
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+_saved = []  # (object, attribute, original value), restored by teardown_module
+
+
+def _patch(target, name, value):
+    _saved.append((target, name, getattr(target, name)))
+    setattr(target, name, value)
+
+
+def setup_module(module=None):
+    _saved.append((embedding_service._loaded, None, embedding_service._loaded.is_set()))
+    _patch(embedding_service, "_cache", None)
+    _patch(embedding_service, "_model", FakeModel())
+    _patch(embedding_service, "_state", "ready")
+    embedding_service._loaded.set()
+    _patch(database, "_qdrant_client", QdrantClient(":memory:"))
+    _patch(database, "LOCAL_VECTOR_INDEX", False)  # Qdrant path only (see test_local_index.py)
+    _patch(database, "EMBEDDING_DIM", len(WORDS))
+    database.init_vector_db()
+
+
+def teardown_module(module=None):
+    """Later test modules in the session get the real database / embedding state back."""
+    while _saved:
+        target, name, value = _saved.pop()
+        if name is not None:
+            setattr(target, name, value)
+        elif not value:
+            target.clear()  # The embedding model's "loaded" event
+
+
+def index(project_id, idea, user_id, is_public=False, status="approved"):
+    project = Project(id=project_id, name=idea.title(), raw_idea=idea, status=status, user_id=user_id, is_public=is_public)
+    database.upsert_vectors([{"text": idea, "metadata": project_vector_payload(project), "vector_id": project_id}], wait=True)
+
+
+def test_search_respects_visibility_and_status():
+    index("p-own", "AI CRM for dentist clinics", "alice")
+    index("p-public", "CRM and invoice app for dentist offices", "bob", is_public=True)
+    index("p-private", "Dentist CRM marketplace", "bob")
+    index("p-rejected", "Dog walking app", "bob", is_public=True, status="rejected")
+
+    hits = database.search_similar("dentist crm", 10, viewer_id="alice")
+    ids = [hit["id"] for hit in hits]
+    assert set(ids) == {"p-own", "p-public", "p-rejected"}
+    assert "p-private" not in ids
+    assert hits[0]["document"] and hits[0]["metadata"]["summary"] == ""
+
+    hits = database.search_similar("dentist crm", 10, status="approved", viewer_id="alice", exclude_id="p-own")
+    assert [hit["id"] for hit in hits] == ["p-public"]
+
+
+def test_cache_invalidated_when_vectors_land():
+    cache = _SimilarCache()
+    cache.set(("project", "p", "u", 5, None), [{"project_id": "x"}])
+    assert cache.get(("project", "p", "u", 5, None)) == [{"project_id": "x"}]
+
+    vector_indexer.version += 1
+    assert cache.get(("project", "p", "u", 5, None)) is None
+
+
+if __name__ == "__main__":
+    setup_module()
+    test_search_respects_visibility_and_status()
+    test_cache_invalidated_when_vectors_land()
+    teardown_module()
+    print("✅ Similar ideas tests passed.")
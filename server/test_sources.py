@@ -0,0 +1,49 @@
+"""
+SourceRegistry builds the exact context text format_tavily_context does and
+knows the URLs in it, without re-parsing.
+
+Run: python test_sources.py  (or pytest)
+"""
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+from bench_clean_text import make_searches
+from sources import SourceRegistry, collect_urls
+from utils import extract_urls_from_context, format_tavily_context
+
+
+def test_registry_matches_formatted_context():
+    for results in make_searches(30):
+        registry = SourceRegistry().add_text("\n").add_results(results)
+        context = "\n" + format_tavily_context(results)
+
+        assert registry.text == context
+        assert registry.urls() == list(extract_urls_from_context(context))
+        for source in registry.sources:
+            block = registry.block(source)
+            assert block.startswith("[SOURCE ") and f"Title: {source.title}\n" in block
+
+
+def test_from_context_and_collect_urls():
+    pricing = SourceRegistry().add_text("\n\n--- Acme PRICING ---\n").add_results([
+        {"title": "Acme pricing", "content": "From $10/mo", "url": "https://acme.com/pricing"},
+        {"title": "No url", "content": "Forum post", "url": ""},
+    ])
+    costs = SourceRegistry.from_context(format_tavily_context([
+        {"title": "Hosting costs", "content": "$20/mo", "url": "https://hosting.example/costs"},
+        {"title": "Acme again", "content": "Same page", "url": "https://acme.com/pricing"},
+    ]))
+
+    assert "https://acme.com/pricing" in pricing and "" not in pricing
+    assert len(pricing) == 1 and len(pricing.sources) == 2
+    assert costs.urls() == ["https://hosting.example/costs", "https://acme.com/pricing"]
+    assert list(collect_urls(pricing, costs, None)) == ["https://acme.com/pricing", "https://hosting.example/costs"]
+    assert not SourceRegistry.from_context("")
+
+
+if __name__ == "__main__":
+    test_registry_matches_formatted_context()
+    test_from_context_and_collect_urls()
+    print("✅ Source registry tests passed.")
@@ -0,0 +1,34 @@
+"""
+text_normalize must produce exactly what the original implementation did
+(the prompts and citation matching depend on it).
+
+Run: python test_text_normalize.py  (or pytest)
+"""
+import random
+
+from bench_clean_text import legacy_clean_text_for_json, legacy_format_tavily_context, make_searches
+from text_normalize import clean_text, format_sources
+
+ALPHABET = "ab \n\r\t\x00\x07\x0b\x0c\x1c\x1f\x7f\xa0 é"
+
+
+def test_clean_text_matches_legacy():
+    rng = random.Random(0)
+    for _ in range(5000):
+        text = "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 30)))
+        assert clean_text(text) == legacy_clean_text_for_json(text), repr(text)
+    assert clean_text(None) == ""
+
+
+def test_format_sources_matches_legacy():
+    for results in make_searches(50):
+        assert format_sources(results) == legacy_format_tavily_context(results)
+
+    results = [{"title": "", "content": " \n"}, {"title": "T", "content": "C", "url": ""}]
+    assert format_sources(results) == legacy_format_tavily_context(results) == "[SOURCE 2]\nTitle: T\nContent: C\nVERIFIED_URL: \n---"
+
+
+if __name__ == "__main__":
+    test_clean_text_matches_legacy()
+    test_format_sources_matches_legacy()
+    print("✅ Text normalization tests passed.")
@@ -0,0 +1,97 @@
+"""
+Field-level translation: only translatable leaves are sent, known strings come
+from the translation memory, and a failed chunk keeps its original text.
+The model call is replaced by a fake; no API calls.
+
+Run: python test_translation.py  (or pytest)
+"""
+import os
+import tempfile
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+import translation
+from kv_store import KVStore
+from models import AnalystFooter, Keyword, MarketMetric, ScoringBreakdown, SEOOpportunity
+from translation import TranslationMemory, extract_strings, translate_model
+
+sent = []
+
+
+def fake_chunk(texts, language_name, context):
+    sent.append(list(texts))
+    if any("boom" in text for text in texts):
+        raise RuntimeError("model unavailable")
+    return {text: f"[{language_name}] {text}" for text in texts}
+
+
+def make_memory():
+    return TranslationMemory(KVStore("translations", path=os.path.join(tempfile.mkdtemp(), "tm.sqlite3")))
+
+
+def setup_module(module=None):
+    translation._translate_chunk = fake_chunk
+
+
+def test_extract_skips_urls_numbers_and_enums():
+    metric = MarketMetric(name="TAM", value="$4.2B", change_percentage="+12%", note="Growing fast in Europe", verified_url="https://a.com")
+    keyword = Keyword(keyword="dental crm", opportunity_level="High", search_volume="1,200/mo", difficulty="Easy")
+    texts = [text for _, text in extract_strings(metric.model_dump()) + extract_strings(keyword.model_dump())]
+    assert texts == ["Growing fast in Europe", "dental crm", "1,200/mo"]
+
+
+def test_translate_model_uses_memory():
+    sent.clear()
+    memory = make_memory()
+    footer = AnalystFooter(
+        verdyct_summary="VERDICT: CROWDED. Too many players.",
+        scoring_breakdown=[ScoringBreakdown(name="Market Magnitude", score=6.5, max_score=10)],
+        data_confidence_level="Medium",
+        risk_flags=["Saturated Market"],
+        recommendation_title="Niche down",
+        recommendation_text="Niche down",
+    )
+    translated = translate_model(footer, "fr", memory=memory)
+
+    assert isinstance(translated, AnalystFooter)
+    assert translated.verdyct_summary == "[French] VERDICT: CROWDED. Too many players."
+    assert translated.risk_flags == ["[French] Saturated Market"]
+    assert translated.recommendation_title == translated.recommendation_text == "[French] Niche down"
+    # Identifiers the backend matches on stay untouched
+    assert translated.scoring_breakdown[0].name == "Market Magnitude"
+    assert translated.data_confidence_level == "Medium"
+    assert sum(len(chunk) for chunk in sent) == 3  # Duplicates sent once
+
+    sent.clear()
+    assert translate_model(footer, "fr", memory=memory) == translated
+    assert sent == []  # All from memory
+
+
+def test_failed_chunk_keeps_original():
+    sent.clear()
+    original_size = translation.TRANSLATION_CHUNK_SIZE
+    translation.TRANSLATION_CHUNK_SIZE = 1
+    try:
+        seo = SEOOpportunity(
+            title="Long tail boom",
+            subtitle="Buyers search for alternatives",
+            high_opportunity_keywords=[Keyword(keyword="crm for dentists", opportunity_level="High")],
+        )
+        translated = translate_model(seo, "de", memory=make_memory())
+    finally:
+        translation.TRANSLATION_CHUNK_SIZE = original_size
+
+    assert len(sent) == 3
+    assert translated.title == "Long tail boom"
+    assert translated.subtitle == "[German] Buyers search for alternatives"
+    assert translated.high_opportunity_keywords[0].keyword == "[German] crm for dentists"
+    assert translate_model(seo, "en") is seo
+
+
+if __name__ == "__main__":
+    setup_module()
+    test_extract_skips_urls_numbers_and_enums()
+    test_translate_model_uses_memory()
+    test_failed_chunk_keeps_original()
+    print("✅ Translation tests passed.")
@@ -0,0 +1,160 @@
+"""
+Vector outbox: the latest op per point wins even across retries (an old
+upsert backing off never resurrects a deleted point), failures are tracked
+per point (a failing upsert doesn't block deletes), and "done" rows older
+than the retention window are deleted. Uses a temporary SQLite database and
+fake vector writes; no Qdrant, no embeddings.
+
+Run: python test_vector_indexer.py  (or pytest)
+"""
+import asyncio
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import vector_indexer
+from models import VectorOutbox
+from vector_indexer import VectorIndexer
+
+
+class FakeVectors:
+    """Stands in for database.upsert_vectors / delete_vectors; records what was applied."""
+
+    def __init__(self, failing_upserts=()):
+        self.failing_upserts = set(failing_upserts)
+        self.upserted, self.deleted = [], []
+
+    def upsert(self, items, batch_size, wait, raise_errors):
+        ids = [item["vector_id"] for item in items]
+        if self.failing_upserts & set(ids):
+            raise RuntimeError("Embedding model unavailable")
+        self.upserted += ids
+        return len(ids)
+
+    def delete(self, vector_ids, raise_errors):
+        self.deleted += vector_ids
+        return len(vector_ids)
+
+
+async def _database(rows):
+    path = os.path.join(tempfile.mkdtemp(), "outbox.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    maker = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with maker() as session:
+        session.add_all(rows)
+        await session.commit()
+    return engine, maker
+
+
+async def _statuses(maker):
+    async with maker() as session:
+        rows = (await session.exec(select(VectorOutbox).order_by(VectorOutbox.id))).all()
+    return [(row.point_id, row.operation, row.status) for row in rows]
+
+
+def _drain(rows, fake):
+    async def run():
+        engine, maker = await _database(rows)
+        saved = (vector_indexer.vector_store_ready, vector_indexer.upsert_vectors, vector_indexer.delete_vectors)
+        vector_indexer.vector_store_ready = lambda: True
+        vector_indexer.upsert_vectors, vector_indexer.delete_vectors = fake.upsert, fake.delete
+        try:
+            processed = await VectorIndexer(session_maker=maker).drain_once()
+        finally:
+            vector_indexer.vector_store_ready, vector_indexer.upsert_vectors, vector_indexer.delete_vectors = saved
+        statuses = await _statuses(maker)
+        await engine.dispose()
+        return processed, statuses
+
+    return asyncio.run(run())
+
+
+def test_latest_op_wins_across_retries():
+    later = datetime.utcnow() + timedelta(minutes=5)
+    rows = [
+        # p1: an upsert backing off, then a delete: the delete wins, the upsert is dropped
+        VectorOutbox(operation="upsert", point_id="p1", text="idea", attempts=1, next_attempt_at=later),
+        VectorOutbox(operation="delete", point_id="p1"),
+        # p2: a due upsert, then a delete backing off: the upsert must not run first
+        VectorOutbox(operation="upsert", point_id="p2", text="idea"),
+        VectorOutbox(operation="delete", point_id="p2", attempts=1, next_attempt_at=later),
+        # p3: two due upserts, one write
+        VectorOutbox(operation="upsert", point_id="p3", text="v1"),
+        VectorOutbox(operation="upsert", point_id="p3", text="v2"),
+    ]
+    fake = FakeVectors()
+    processed, statuses = _drain(rows, fake)
+
+    assert processed == 4
+    assert fake.deleted == ["p1"] and fake.upserted == ["p3"]
+    assert statuses == [
+        ("p1", "upsert", "superseded"),
+        ("p1", "delete", "done"),
+        ("p2", "upsert", "superseded"),
+        ("p2", "delete", "pending"),
+        ("p3", "upsert", "superseded"),
+        ("p3", "upsert", "done"),
+    ]
+
+
+def test_failures_are_per_point():
+    rows = [
+        VectorOutbox(operation="upsert", point_id="bad", text="idea"),
+        VectorOutbox(operation="upsert", point_id="good", text="idea"),
+        VectorOutbox(operation="delete", point_id="gone"),
+    ]
+    fake = FakeVectors(failing_upserts={"bad"})
+    processed, statuses = _drain(rows, fake)
+
+    assert processed == 3
+    assert fake.upserted == ["good"] and fake.deleted == ["gone"]
+    assert statuses == [("bad", "upsert", "pending"), ("good", "upsert", "done"), ("gone", "delete", "done")]
+
+
+def test_prune_done_rows_after_retention():
+    now = datetime.utcnow()
+    rows = [
+        VectorOutbox(operation="upsert", point_id=f"old-{i}", status="done", processed_at=now - timedelta(hours=30))
+        for i in range(5)
+    ] + [
+        VectorOutbox(operation="upsert", point_id="superseded", status="superseded", processed_at=now - timedelta(hours=30)),
+        VectorOutbox(operation="upsert", point_id="recent", status="done", processed_at=now - timedelta(hours=1)),
+        VectorOutbox(operation="upsert", point_id="failed", status="failed", processed_at=now - timedelta(hours=30)),
+        VectorOutbox(operation="delete", point_id="pending"),
+    ]
+
+    async def run():
+        engine, maker = await _database(rows)
+        indexer = VectorIndexer(retention=timedelta(hours=24), session_maker=maker)
+        saved = vector_indexer.OUTBOX_PRUNE_BATCH
+        vector_indexer.OUTBOX_PRUNE_BATCH = 2  # Several DELETE rounds
+        try:
+            pruned = await indexer.prune_done(now)
+            again = await indexer.prune_done(now)
+        finally:
+            vector_indexer.OUTBOX_PRUNE_BATCH = saved
+        async with maker() as session:
+            left = sorted((await session.exec(select(VectorOutbox.point_id))).all())
+        await engine.dispose()
+        return pruned, again, left
+
+    pruned, again, left = asyncio.run(run())
+    assert pruned == 6 and again == 0
+    assert left == ["failed", "pending", "recent"]
+
+
+if __name__ == "__main__":
+    test_latest_op_wins_across_retries()
+    test_failures_are_per_point()
+    test_prune_done_rows_after_retention()
+    print("✅ Vector indexer tests passed.")
@@ -0,0 +1,181 @@
+"""
+Watchdog CTA verification: candidates are extracted locally with unique
+selectors, a confident heuristic skips the LLM, the LLM only ever sees the
+compact candidate list, and unchanged pages (304 or same hash) reuse the
+previous result. Pages are served by an httpx MockTransport; no network, no
+API calls.
+
+Run: python test_watchdog.py  (or pytest)
+"""
+import asyncio
+import json
+import os
+from types import SimpleNamespace
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+import httpx
+
+import agents.watchdog as watchdog
+from cta_extraction import confident_pick, extract_candidates, rank_candidates
+from kv_store import KVStore
+
+CLEAR_PAGE = """<html><head><style>.btn { color: red }</style>
+<script>document.write('<button>Fake</button>')</script></head><body>
+<header><nav><a href="/login">Log in</a><a href="/pricing">Pricing</a></nav></header>
+<section id="hero"><h1>Ship faster</h1>
+  <a class="btn btn-primary" href="/signup">Get started <span>for free</span></a>
+  <button class="secondary">Learn more</button>
+</section>
+<footer><a href="/privacy">Privacy</a></footer></body></html>"""
+
+AMBIGUOUS_PAGE = """<html><body>
+<div><div><button>Go</button></div><div><button>Go</button></div></div>
+<p><a href="/a">Option A</a> <a href="/b">Option B</a></p></body></html>"""
+
+
+class FakeLLM:
+    def __init__(self, index):
+        self.index = index
+        self.prompts = []
+
+    def __call__(self, agent, **params):
+        self.prompts.append(params["messages"][-1]["content"])
+        content = json.dumps({"index": self.index, "confidence": "Medium"})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+class Site:
+    """Serves one page with an ETag and answers 304 to a matching If-None-Match."""
+
+    def __init__(self, html, etag='"v1"'):
+        self.html, self.etag = html, etag
+        self.requests = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if self.etag and request.headers.get("If-None-Match") == self.etag:
+            return httpx.Response(304)
+        headers = {"Content-Type": "text/html; charset=utf-8"}
+        if self.etag:
+            headers["ETag"] = self.etag
+        return httpx.Response(200, headers=headers, text=self.html)
+
+
+def make_watchdog(site: Site) -> watchdog.CTAWatchdog:
+    return watchdog.CTAWatchdog(store=KVStore("watchdog_test", path=":memory:"), transport=httpx.MockTransport(site.handler))
+
+
+def test_candidates_and_selectors():
+    candidates = extract_candidates(CLEAR_PAGE)
+    by_text = {candidate.text: candidate for candidate in candidates}
+
+    assert "Fake" not in by_text  # script content is skipped
+    assert by_text["Get started for free"].selector == "a.btn.btn-primary"
+    assert by_text["Learn more"].selector == "button.secondary"
+    assert by_text["Log in"].selector == 'a[href="/login"]' and by_text["Log in"].in_nav
+    assert by_text["Privacy"].in_nav
+
+    same = extract_candidates(AMBIGUOUS_PAGE)
+    selectors = [candidate.selector for candidate in same if candidate.text == "Go"]
+    assert len(set(selectors)) == 2 and all("nth-of-type" in selector for selector in selectors)
+
+    # "a.btn" would also match the secondary button: not unique
+    shared = extract_candidates('<div><a class="btn" href="/signup">Sign up</a><a class="btn secondary" href="/demo">Demo</a></div>')
+    by_text = {candidate.text: candidate.selector for candidate in shared}
+    assert by_text == {"Sign up": 'a[href="/signup"]', "Demo": "a.btn.secondary"}
+    shared = extract_candidates('<div><button class="btn">Go</button><button class="btn secondary">Later</button></div>')
+    assert [candidate.selector for candidate in shared] == ["div:nth-of-type(1) > button:nth-of-type(1)", "button.btn.secondary"]
+
+    with_id = extract_candidates('<form id="signup"><input type="email"><input type="submit" value="Join the waitlist"></form>')
+    assert [(c.text, c.selector, c.in_form) for c in with_id] == [("Join the waitlist", "#signup > input:nth-of-type(2)", True)]
+
+
+def test_confident_heuristic_skips_llm():
+    ranked = rank_candidates(extract_candidates(CLEAR_PAGE))
+    assert confident_pick(ranked).text == "Get started for free"
+    assert confident_pick(rank_candidates(extract_candidates(AMBIGUOUS_PAGE))) is None
+
+    site = Site(CLEAR_PAGE)
+    llm = FakeLLM(0)
+    watchdog.chat_completion = llm
+    agent = make_watchdog(site)
+
+    async def verify():
+        try:
+            return await agent.verify("p1", "https://mvp.example/")
+        finally:
+            await agent.aclose()
+
+    result = asyncio.run(verify())
+    assert result["source"] == "heuristic" and result["cta_selector"] == "a.btn.btn-primary"
+    assert llm.prompts == []
+
+
+def test_llm_sees_only_candidates():
+    site = Site(AMBIGUOUS_PAGE + "<!--" + "x" * 50_000 + "-->")
+    llm = FakeLLM(2)
+    watchdog.chat_completion = llm
+    agent = make_watchdog(site)
+
+    async def verify():
+        try:
+            return await agent.verify("p2", "https://mvp.example/")
+        finally:
+            await agent.aclose()
+
+    result = asyncio.run(verify())
+    assert result["source"] == "llm" and result["cta_text"] in {"Option A", "Option B", "Go"}
+    assert len(llm.prompts) == 1
+    prompt = llm.prompts[0]
+    assert "xxxx" not in prompt and "<div>" not in prompt and len(prompt) < 3000
+
+
+def test_unchanged_pages_reuse_result():
+    site = Site(CLEAR_PAGE)
+    llm = FakeLLM(0)
+    watchdog.chat_completion = llm
+    agent = make_watchdog(site)
+
+    async def verify_repeatedly():
+        try:
+            first = await agent.verify("p3", "https://mvp.example/")
+            second = await agent.verify("p3", "https://mvp.example/")  # 304
+            site.etag = None  # Server stops sending validators, same body
+            third = await agent.verify("p3", "https://mvp.example/")
+            site.html = CLEAR_PAGE.replace("Get started", "Start your trial")
+            fourth = await agent.verify("p3", "https://mvp.example/")
+            return first, second, third, fourth
+        finally:
+            await agent.aclose()
+
+    first, second, third, fourth = asyncio.run(verify_repeatedly())
+    assert site.requests[1].headers["If-None-Match"] == '"v1"'
+    assert second["source"] == "not_modified" and second["cta_selector"] == first["cta_selector"]
+    assert third["source"] == "unchanged" and third["cta_text"] == first["cta_text"]
+    assert fourth["source"] == "heuristic" and fourth["cta_text"] == "Start your trial for free"
+
+
+def test_fetch_error():
+    agent = watchdog.CTAWatchdog(
+        store=KVStore("watchdog_test", path=":memory:"),
+        transport=httpx.MockTransport(lambda request: httpx.Response(503))
+    )
+
+    async def verify():
+        try:
+            return await agent.verify("p4", "https://down.example/")
+        finally:
+            await agent.aclose()
+
+    assert "error" in asyncio.run(verify())
+
+
+if __name__ == "__main__":
+    test_candidates_and_selectors()
+    test_confident_heuristic_skips_llm()
+    test_llm_sees_only_candidates()
+    test_unchanged_pages_reuse_result()
+    test_fetch_error()
+    print("✅ Watchdog tests passed.")
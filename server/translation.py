@@ -0,0 +1,220 @@
+"""
+Field-level translation of agent outputs, with a translation memory.
+
+Instead of sending a whole report as JSON and parsing it back (one failure
+loses everything), `translate_model`:
+    1. extracts the translatable string leaves of a pydantic model, skipping
+       URLs, numbers and enum-like fields the frontend compares against
+       ("High", "Critical", ...) or the backend parses (scoring names)
+    2. serves the strings it already knows from the translation memory
+       (KVStore, keyed by language + source hash): boilerplate comes back
+       instantly and is never paid twice
+    3. translates the rest in small JSON chunks, in parallel (gpt-4o-mini)
+    4. writes the translations back into the same structure
+A chunk that fails keeps its English strings; the rest is still translated.
+"""
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, TypeVar
+
+from pydantic import BaseModel
+
+import metrics
+from kv_store import KVStore
+
+TRANSLATION_MODEL = "gpt-4o-mini"
+TRANSLATION_CHUNK_SIZE = int(os.getenv("TRANSLATION_CHUNK_SIZE", "40"))  # Strings per call
+TRANSLATION_CHUNK_CHARS = int(os.getenv("TRANSLATION_CHUNK_CHARS", "6000"))
+TRANSLATION_MAX_PARALLEL = int(os.getenv("TRANSLATION_MAX_PARALLEL", "6"))
+TRANSLATION_MEMORY_SIZE = int(os.getenv("TRANSLATION_MEMORY_SIZE", "200000"))
+
+LANGUAGE_NAMES = {
+    "fr": "French", "es": "Spanish", "de": "German", "it": "Italian",
+    "pt": "Portuguese", "nl": "Dutch", "pl": "Polish", "ru": "Russian",
+    "zh": "Chinese", "ja": "Japanese", "ko": "Korean", "ar": "Arabic"
+}
+
+# Never translated: identifiers, proper nouns, and values the code compares against
+SKIP_FIELDS = {
+    "verified_url", "url", "source_url", "website",
+    "name", "persona_name",  # Competitor names, scoring dimensions (calculate_pos / rescue plan match them)
+    "level", "opportunity_level", "difficulty", "attractiveness", "roi_potential",
+    "priority", "urgency_level", "impact_level", "confidence_level", "data_confidence_level",
+    "status", "id",
+}
+
+_URL_RE = re.compile(r"^(https?://|www\.)\S+$", re.IGNORECASE)
+_WORD_RE = re.compile(r"[^\W\d_]{2,}")  # At least one real word (not "$120-$180", "4.5x", "40%")
+
+T = TypeVar("T", bound=BaseModel)
+Path = Tuple[Any, ...]
+
+
+class TranslationMemory:
+    """(language, source text) -> translation, persisted in a KVStore."""
+
+    def __init__(self, store: Optional[KVStore] = None):
+        self.store = store if store is not None else KVStore("translations", max_entries=TRANSLATION_MEMORY_SIZE)
+
+    @staticmethod
+    def key(text: str, language: str) -> str:
+        return f"{language}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+    def get_many(self, texts: List[str], language: str) -> Dict[str, str]:
+        keys = {self.key(text, language): text for text in texts}
+        try:
+            found = self.store.get_many(list(keys))
+        except Exception as e:
+            print(f"⚠️ Translation memory read failed: {e}")
+            return {}
+        return {keys[key]: value.decode("utf-8") for key, value in found.items()}
+
+    def set_many(self, translations: Dict[str, str], language: str):
+        if not translations:
+            return
+        try:
+            self.store.set_many({self.key(text, language): value.encode("utf-8") for text, value in translations.items()})
+        except Exception as e:
+            print(f"⚠️ Translation memory write failed: {e}")
+
+
+translation_memory = TranslationMemory()
+
+
+# ========== EXTRACTION ==========
+
+def is_translatable(key: Any, value: str) -> bool:
+    if key in SKIP_FIELDS or (isinstance(key, str) and key.endswith("_url")):
+        return False
+    text = value.strip()
+    return bool(text) and not _URL_RE.match(text) and bool(_WORD_RE.search(text))
+
+
+def extract_strings(data: Any, path: Path = (), key: Any = None) -> List[Tuple[Path, str]]:
+    """(path, text) of every translatable string leaf of a dumped model."""
+    if isinstance(data, dict):
+        leaves = []
+        for child_key, value in data.items():
+            leaves.extend(extract_strings(value, path + (child_key,), child_key))
+        return leaves
+    if isinstance(data, list):
+        leaves = []
+        for idx, value in enumerate(data):
+            # List items inherit the field name (e.g. risk_flags -> each flag)
+            leaves.extend(extract_strings(value, path + (idx,), key))
+        return leaves
+    if isinstance(data, str) and is_translatable(key, data):
+        return [(path, data)]
+    return []
+
+
+def _set_path(data: Any, path: Path, value: str):
+    for step in path[:-1]:
+        data = data[step]
+    data[path[-1]] = value
+
+
+# ========== TRANSLATION ==========
+
+def _chunks(texts: List[str]) -> List[List[str]]:
+    chunks, current, size = [], [], 0
+    for text in texts:
+        if current and (len(current) >= TRANSLATION_CHUNK_SIZE or size + len(text) > TRANSLATION_CHUNK_CHARS):
+            chunks.append(current)
+            current, size = [], 0
+        current.append(text)
+        size += len(text)
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _translate_chunk(texts: List[str], language_name: str, context: str) -> Dict[str, str]:
+    """{source: translation} for one chunk. Missing or empty answers are left out."""
+    from utils import openai_client
+
+    payload = json.dumps({str(i): text for i, text in enumerate(texts)}, ensure_ascii=False)
+    response = openai_client.chat.completions.create(
+        model=TRANSLATION_MODEL,
+        messages=[
+            {
+                "role": "system",
+                "content": (
+                    f"You are a professional translator for startup and market analysis reports. "
+                    f"Translate each value of the JSON object to {language_name} and return a JSON object with the same keys. "
+                    f"Keep numbers, currency amounts, percentages, URLs, product and company names unchanged. "
+                    f"Keep standard industry terms (SaaS, B2B, CAC, LTV, TAM, MVP...) as they are commonly used in {language_name}. "
+                    f"Professional, natural tone."
+                )
+            },
+            {"role": "user", "content": f"Report about: {context}\n\n{payload}" if context else payload}
+        ],
+        temperature=0.2,
+        response_format={"type": "json_object"}
+    )
+    metrics.record_llm_usage("translation", response)
+    translated = json.loads(response.choices[0].message.content)
+    result = {}
+    for i, text in enumerate(texts):
+        value = translated.get(str(i))
+        if isinstance(value, str) and value.strip():
+            result[text] = value
+    return result
+
+
+def translate_texts(texts: List[str], language: str, context: str = "", memory: Optional[TranslationMemory] = None) -> Dict[str, str]:
+    """
+    {source: translation} for distinct `texts`: memory first, then parallel
+    chunked calls for the misses. Strings that couldn't be translated are absent.
+    """
+    memory = memory or translation_memory
+    texts = list(dict.fromkeys(texts))
+    translations = memory.get_many(texts, language)
+    missing = [text for text in texts if text not in translations]
+    metrics.incr("translation.memory.hits", len(texts) - len(missing))
+    metrics.incr("translation.memory.misses", len(missing))
+    if not missing:
+        return translations
+
+    language_name = LANGUAGE_NAMES.get(language, language)
+    chunks = _chunks(missing)
+    with ThreadPoolExecutor(max_workers=min(TRANSLATION_MAX_PARALLEL, len(chunks)), thread_name_prefix="translate") as pool:
+        futures = [pool.submit(_translate_chunk, chunk, language_name, context) for chunk in chunks]
+        for chunk, future in zip(chunks, futures):
+            metrics.incr("translation.chunks")
+            try:
+                translated = future.result()
+            except Exception as e:
+                metrics.incr("translation.chunk_failures")
+                print(f"[Translation] ⚠️ Chunk of {len(chunk)} strings failed: {e}. Keeping the original text.")
+                continue
+            memory.set_many(translated, language)
+            translations.update(translated)
+    return translations
+
+
+def translate_model(model: T, language: str, context: str = "", memory: Optional[TranslationMemory] = None) -> T:
+    """
+    Copy of `model` with its translatable string fields in `language`.
+    Returns `model` unchanged for English or if the result doesn't validate.
+    """
+    if not language or language == "en":
+        return model
+
+    data = model.model_dump()
+    leaves = extract_strings(data)
+    if not leaves:
+        return model
+
+    translations = translate_texts([text for _, text in leaves], language, context, memory)
+    for path, text in leaves:
+        if text in translations:
+            _set_path(data, path, translations[text])
+    try:
+        return type(model).model_validate(data)
+    except Exception as e:
+        print(f"[Translation] ⚠️ Translated {type(model).__name__} is invalid: {e}. Keeping the original.")
+        return model
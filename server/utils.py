@@ -5,6 +5,10 @@ from typing import Dict, List, Any, Union
 from dotenv import load_dotenv
 from openai import OpenAI
 from tavily import TavilyClient
+from text_normalize import clean_text, format_sources
+import metrics
+from llm_gateway import chat_completion
+from query_compressor import compress_query
 
 # Load environment variables
 load_dotenv()
@@ -20,17 +24,8 @@ VERCEL_API_TOKEN = os.getenv("VERCEL_API_TOKEN")
 
 def clean_text_for_json(text: str) -> str:
     """Nettoie le texte pour éviter les caractères de contrôle invalides dans JSON"""
-    if not text:
-        return ""
-    # Remplacer les caractères de contrôle invalides (sauf \n, \r, \t qui sont valides dans JSON strings)
-    text = re.sub(r'[\x00-\x08\x0B-\x0C\x0E-\x1F\x7F]', ' ', text)
-    # Remplacer les retours à la ligne multiples par un seul espace pour les citations
-    text = re.sub(r'\n+', ' ', text)
-    text = re.sub(r'\r+', ' ', text)
-    text = re.sub(r'\t+', ' ', text)
-    # Normaliser les espaces multiples
-    text = re.sub(r'\s+', ' ', text)
-    return text.strip()
+    # Caractères de contrôle + espaces multiples -> un seul espace (une passe, mémoïsé)
+    return clean_text(text)
 
 def extract_tavily_results(response):
     """Helper pour extraire les résultats de Tavily (gère dict ou objet)"""
@@ -49,29 +44,7 @@ def format_tavily_context(results):
     """Formate les résultats Tavily en contexte texte avec URLs clairement associées"""
     if not results:
         return ""
-    
-    context_parts = []
-    for idx, r in enumerate(results, 1):
-        if isinstance(r, dict):
-            title = r.get('title', '')
-            content = r.get('content', '')
-            url = r.get('url', '')
-        elif hasattr(r, '__dict__'):
-            title = getattr(r, 'title', '')
-            content = getattr(r, 'content', '')
-            url = getattr(r, 'url', '')
-        else:
-            continue
-        
-        # Nettoyer le contenu
-        title = clean_text_for_json(title)
-        content = clean_text_for_json(content)
-        url = clean_text_for_json(url) if url else ""
-        
-        if title or content:
-            context_parts.append(f"[SOURCE {idx}]\nTitle: {title}\nContent: {content}\nVERIFIED_URL: {url}\n---")
-    
-    return "\n\n".join(context_parts)
+    return format_sources(results)
 
 def extract_urls_from_context(context: str) -> Dict[str, str]:
     """Extrait les URLs et leurs contenus associés depuis le contexte formaté"""
@@ -94,15 +67,25 @@ def extract_urls_from_context(context: str) -> Dict[str, str]:
 def optimize_query(query: str, max_length: int = 400) -> str:
     """
     Optimise une requête Tavily pour qu'elle reste sous la limite de caractères.
-    Utilise GPT-4o-mini pour condenser intelligemment la requête si nécessaire.
+    Compression locale d'abord (query_compressor, quelques µs), GPT-4o-mini
+    seulement si elle perd trop de mots-clés.
     """
     # Si la requête est déjà sous la limite, on la retourne telle quelle
     if len(query) <= max_length:
         return query
     
+    compressed = compress_query(query, max_length)
+    if compressed is not None:
+        metrics.incr("query_optimizer.local")
+        print(f"Query compressed locally: {len(query)} -> {len(compressed)} chars")
+        return compressed
+    metrics.incr("query_optimizer.llm_fallback")
+    
     try:
         # Utiliser GPT-4o-mini (low cost) pour optimiser la requête
-        response = openai_client.chat.completions.create(
+        response = chat_completion(
+            "query_optimizer",
+            cacheable=True,
             model="gpt-4o-mini",
             messages=[
                 {
@@ -154,6 +137,7 @@ def generate_project_name(idea: str) -> str:
             temperature=0.7,
             max_tokens=20
         )
+        metrics.record_llm_usage("naming", response)
         name = response.choices[0].message.content.strip().replace('"', '')
         return name
     except Exception as e:
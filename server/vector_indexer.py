@@ -0,0 +1,288 @@
+"""
+Transactional outbox for Qdrant writes.
+
+Request handlers never talk to Qdrant directly. They add a `VectorOutbox` row
+in the same transaction as the project change (`enqueue_vector_upsert` /
+`enqueue_vector_delete`), so the SQL commit and the pending vector write are
+atomic, and the response doesn't wait for embedding + Qdrant round trips.
+
+`VectorIndexer` drains the outbox in the background:
+    - rows are claimed with SELECT ... FOR UPDATE SKIP LOCKED (Postgres), so
+      several workers can run side by side
+    - ops on the same point are coalesced, the latest one wins: older pending
+      rows for a point, even ones backing off, are marked "superseded", and a
+      claimed row is skipped when a newer one for its point is still pending
+      (a retrying upsert never resurrects a deleted point)
+    - upserts are embedded in one batch and sent with a single bulk call,
+      deletes in another; a failed bulk call is retried point by point, so
+      one bad point (or an upsert-only outage such as the embedding model)
+      doesn't hold back the rest
+    - failures are retried per row with exponential backoff, then marked
+      "failed"
+    - "done" and "superseded" rows are deleted once older than VECTOR_OUTBOX_RETENTION_HOURS
+      (checked every OUTBOX_PRUNE_INTERVAL_SECONDS, OUTBOX_PRUNE_BATCH rows
+      per DELETE), so the table stays the size of the backlog; "failed"
+      rows are kept for inspection
+Nothing is drained while the vector store (client or model) isn't ready:
+rows simply wait for the next pass.
+"""
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import delete, update
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database import engine, upsert_vectors, delete_vectors, vector_store_ready
+from models import Project, VectorOutbox
+
+OUTBOX_BATCH_SIZE = int(os.getenv("VECTOR_OUTBOX_BATCH_SIZE", "64"))
+OUTBOX_POLL_SECONDS = float(os.getenv("VECTOR_OUTBOX_POLL_SECONDS", "5"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("VECTOR_OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_BACKOFF_SECONDS = 2.0
+OUTBOX_MAX_BACKOFF_SECONDS = 600.0
+OUTBOX_RETENTION = timedelta(hours=float(os.getenv("VECTOR_OUTBOX_RETENTION_HOURS", "24")))
+OUTBOX_PRUNE_INTERVAL_SECONDS = 600.0
+OUTBOX_PRUNE_BATCH = 1000
+SUMMARY_MAX_CHARS = 600
+
+
+# ========== PRODUCERS ==========
+
+def project_vector_payload(project: Project) -> Dict[str, Any]:
+    """
+    Qdrant payload for a project: the filter fields (status, is_public,
+    user_id) plus the idea text and a short summary, so similarity results
+    can be shown without loading every project from SQL.
+    """
+    report = project.report_json or {}
+    analyst = (report.get("agents") or {}).get("analyst") or {}
+    summary = (analyst.get("analyst_footer") or {}).get("verdyct_summary") or report.get("global_summary") or ""
+    return {
+        "project_id": project.id,
+        "name": project.name,
+        "text": project.raw_idea,
+        "summary": summary[:SUMMARY_MAX_CHARS],
+        "pos_score": project.pos_score,
+        "status": project.status,
+        "is_public": bool(project.is_public),
+        "user_id": project.user_id,
+        "created_at": project.created_at.isoformat() if project.created_at else None,
+    }
+
+
+def enqueue_project_vector(session: AsyncSession, project: Project) -> VectorOutbox:
+    """Queue an upsert of the project's idea embedding and payload."""
+    return enqueue_vector_upsert(session, project.id, project.raw_idea, project_vector_payload(project))
+
+
+def enqueue_vector_upsert(session: AsyncSession, project_id: str, text: str, metadata: Dict[str, Any]) -> VectorOutbox:
+    """
+    Queue an embedding upsert for a project. Added to `session` but not
+    committed: the caller commits it together with the project row.
+    """
+    row = VectorOutbox(operation="upsert", point_id=project_id, text=text, payload=metadata)
+    session.add(row)
+    return row
+
+
+def enqueue_vector_delete(session: AsyncSession, project_id: str) -> VectorOutbox:
+    """Queue a vector delete for a project (committed by the caller)."""
+    row = VectorOutbox(operation="delete", point_id=project_id)
+    session.add(row)
+    return row
+
+
+# ========== CONSUMER ==========
+
+def _backoff(attempts: int) -> timedelta:
+    return timedelta(seconds=min(OUTBOX_BACKOFF_SECONDS * 2 ** (attempts - 1), OUTBOX_MAX_BACKOFF_SECONDS))
+
+
+def _coalesce(rows: List[VectorOutbox]) -> Dict[str, VectorOutbox]:
+    """Latest op per point id (rows are in id order)."""
+    latest: Dict[str, VectorOutbox] = {}
+    for row in rows:
+        latest[row.point_id] = row
+    return latest
+
+
+async def _apply(write: Callable[[List[Any]], Any], items: List[Any], point_ids: List[str]) -> Dict[str, str]:
+    """
+    Run `write` on all items in one call; if it fails, item by item.
+    Returns {point_id: error} for the points that could not be written.
+    """
+    if not items:
+        return {}
+    try:
+        await asyncio.to_thread(write, items)
+        return {}
+    except Exception as e:
+        if len(items) == 1:
+            return {point_ids[0]: str(e)}
+    errors = {}
+    for item, point_id in zip(items, point_ids):
+        try:
+            await asyncio.to_thread(write, [item])
+        except Exception as e:
+            errors[point_id] = str(e)
+    return errors
+
+
+class VectorIndexer:
+    def __init__(
+        self,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        poll_seconds: float = OUTBOX_POLL_SECONDS,
+        retention: timedelta = OUTBOX_RETENTION,
+        session_maker=None
+    ):
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.retention = retention
+        self._session_maker = session_maker or sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        self._next_prune = 0.0  # time.monotonic() deadline
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        # Bumped whenever vectors land, so cached search results can be invalidated
+        self.version = 0
+
+    # ---------- Lifecycle ----------
+
+    def start(self) -> None:
+        """Start the drain loop on the running event loop."""
+        if self._task and not self._task.done():
+            return
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="vector-indexer")
+
+    async def stop(self) -> None:
+        if not self._task:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def notify(self) -> None:
+        """Wake the loop now instead of at the next poll (new rows committed)."""
+        if self._wake:
+            self._wake.set()
+
+    async def _run(self):
+        while True:
+            try:
+                # Keep going while full batches come back, then wait
+                while await self.drain_once() >= self.batch_size:
+                    pass
+                if time.monotonic() >= self._next_prune:
+                    self._next_prune = time.monotonic() + OUTBOX_PRUNE_INTERVAL_SECONDS
+                    await self.prune_done()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Vector indexer pass failed: {e}")
+
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    # ---------- Draining ----------
+
+    async def drain_once(self) -> int:
+        """
+        Apply one batch of due outbox rows. Returns the number of rows
+        processed (done, retried or failed).
+        """
+        if not vector_store_ready():
+            return 0
+
+        async with self._session_maker() as session:
+            statement = (
+                select(VectorOutbox)
+                .where(VectorOutbox.status == "pending", VectorOutbox.next_attempt_at <= datetime.utcnow())
+                .order_by(VectorOutbox.id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            rows = (await session.exec(statement)).all()
+            if not rows:
+                return 0
+
+            latest = _coalesce(rows)
+            # Newest pending row per claimed point, including rows still backing off
+            newest = dict((await session.exec(
+                select(VectorOutbox.point_id, func.max(VectorOutbox.id))
+                .where(VectorOutbox.status == "pending", VectorOutbox.point_id.in_(list(latest)))
+                .group_by(VectorOutbox.point_id)
+            )).all())
+            live = {point_id: row for point_id, row in latest.items() if row.id >= newest.get(point_id, row.id)}
+            upserts = [row for row in live.values() if row.operation == "upsert"]
+            deletes = [row.point_id for row in live.values() if row.operation == "delete"]
+
+            errors = await _apply(
+                lambda items: upsert_vectors(items, len(items), False, True),
+                [{"text": row.text or "", "metadata": row.payload or {}, "vector_id": row.point_id} for row in upserts],
+                [row.point_id for row in upserts]
+            )
+            errors.update(await _apply(lambda point_ids: delete_vectors(point_ids, True), deletes, deletes))
+
+            now = datetime.utcnow()
+            for row in rows:
+                if live.get(row.point_id) is not row:
+                    row.status = "superseded"
+                    row.processed_at = now
+                elif row.point_id not in errors:
+                    row.status = "done"
+                    row.processed_at = now
+                else:
+                    row.attempts += 1
+                    row.last_error = errors[row.point_id][:1000]
+                    if row.attempts >= OUTBOX_MAX_ATTEMPTS:
+                        row.status = "failed"
+                        row.processed_at = now
+                    else:
+                        row.next_attempt_at = now + _backoff(row.attempts)
+                session.add(row)
+            # Older rows of the applied points that weren't claimed (backing off): nothing left to do
+            for row in live.values():
+                await session.exec(
+                    update(VectorOutbox)
+                    .where(VectorOutbox.point_id == row.point_id, VectorOutbox.status == "pending", VectorOutbox.id < row.id)
+                    .values(status="superseded", processed_at=now)
+                )
+            await session.commit()
+
+            if errors:
+                print(f"⚠️ Vector outbox: {len(errors)} of {len(live)} points failed (will retry): {next(iter(errors.values()))}")
+            if len(errors) < len(live):
+                self.version += 1
+            return len(rows)
+
+    async def prune_done(self, now: Optional[datetime] = None) -> int:
+        """Delete "done" / "superseded" rows processed more than `retention` ago, in bounded batches. Returns the count."""
+        cutoff = (now or datetime.utcnow()) - self.retention
+        pruned = 0
+        while True:
+            expired = (
+                select(VectorOutbox.id)
+                .where(VectorOutbox.status.in_(("done", "superseded")), VectorOutbox.processed_at < cutoff)
+                .limit(OUTBOX_PRUNE_BATCH)
+            )
+            async with self._session_maker() as session:
+                result = await session.exec(delete(VectorOutbox).where(VectorOutbox.id.in_(expired)))
+                await session.commit()
+            pruned += result.rowcount
+            if result.rowcount < OUTBOX_PRUNE_BATCH:
+                return pruned
+
+
+vector_indexer = VectorIndexer()